@@ -82,10 +82,38 @@ class ProductAdmin(admin.ModelAdmin):
 
 
 from .models import Order
+from django import forms
+from django.db.models import F
+
+from . import archive
+from . import inventory
+from . import rollups
+
+
+class OrderAdminForm(forms.ModelForm):
+    class Meta:
+        model = Order
+        fields = "__all__"
+
+    def clean(self):
+        cleaned_data = super().clean()
+        # Taking an order out of "denied" takes its stock again.
+        if (
+            self.instance.pk
+            and self.initial.get("status") == "denied"
+            and cleaned_data.get("status") not in (None, "denied")
+        ):
+            short = self.instance.items.filter(product__stock__lt=F("quantity"))
+            if short.exists():
+                raise forms.ValidationError(
+                    "Not enough stock left to take this order out of denied."
+                )
+        return cleaned_data
 
 
 @admin.register(Order)
 class OrderAdmin(admin.ModelAdmin):
+    form = OrderAdminForm
     list_display = ("id", "get_products", "buyer", "status", "created_at")
     list_filter = ("status", "created_at")
 
@@ -93,3 +121,17 @@ class OrderAdmin(admin.ModelAdmin):
         return ", ".join([item.product.title for item in obj.items.all()])
 
     get_products.short_description = "Products"
+
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        if change and "status" in form.changed_data:
+            inventory.record_status_change(obj, form.initial["status"], obj.status)
+            rollups.record_status_change(obj, form.initial["status"], obj.status)
+
+    # Sub-order ledger rows are not cascaded (they survive archiving).
+    def delete_model(self, request, obj):
+        archive.delete_order(obj)
+
+    def delete_queryset(self, request, queryset):
+        for order in queryset:
+            archive.delete_order(order)
@@ -0,0 +1,91 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import rollups
+from .models import ArchivedOrder, ArchivedOrderItem, ArtisanOrder, Order, OrderItem
+
+# ---------------------------------------------------
+# ✅ Order Archive (hot / cold tables)
+# ---------------------------------------------------
+#
+# Closed orders (denied, or delivered) older than ORDER_ARCHIVE_AFTER_DAYS
+# are moved, with their items, from Order/OrderItem into ArchivedOrder /
+# ArchivedOrderItem by ``manage.py archive_orders``. The live tables then
+# only hold recent and still-open orders. Every archived order is older
+# than ``horizon()``, which lets listings skip the archive entirely while
+# they are paging through newer orders.
+
+CLOSED = Q(status="denied") | Q(delivery_status="delivered")
+
+
+def archive_after():
+    return timedelta(days=getattr(settings, "ORDER_ARCHIVE_AFTER_DAYS", 180))
+
+
+def horizon(now=None):
+    """Every archived order was created before this moment."""
+    return (now or timezone.now()) - archive_after()
+
+
+def archivable(before=None):
+    return Order.objects.filter(CLOSED, created_at__lt=before or horizon())
+
+
+def _copy(instance, model):
+    return model(
+        **{
+            field.attname: getattr(instance, field.attname)
+            for field in instance._meta.concrete_fields
+        }
+    )
+
+
+@transaction.atomic
+def archive_batch(order_ids, before=None):
+    """
+    Move the given orders (those still archivable) and their items into the
+    archive tables. Returns the number of orders moved.
+    """
+    orders = list(
+        archivable(before).select_for_update().filter(pk__in=order_ids).order_by("pk")
+    )
+    if not orders:
+        return 0
+    ids = [order.pk for order in orders]
+
+    ArchivedOrder.objects.bulk_create([_copy(order, ArchivedOrder) for order in orders])
+    ArchivedOrderItem.objects.bulk_create(
+        [
+            _copy(item, ArchivedOrderItem)
+            for item in OrderItem.objects.filter(order_id__in=ids)
+        ]
+    )
+    # OrderItems go with the cascade; ArtisanOrder ledger rows stay.
+    Order.objects.filter(pk__in=ids).delete()
+    return len(orders)
+
+
+def delete_order(order):
+    """Really delete an order, including its ledger rows and rolled-up sales."""
+    with transaction.atomic():
+        rollups.remove_order(order)
+        order.artisan_orders.all().delete()
+        order.delete()
+
+
+def forget_buyer(buyer):
+    """
+    Before a buyer is deleted: their orders (live and archived) go with the
+    cascade, but their ledger rows and rolled-up sales must go too.
+    """
+    with transaction.atomic():
+        for model in (Order, ArchivedOrder):
+            for order in model.objects.filter(buyer=buyer):
+                rollups.remove_order(order)
+            ArtisanOrder.objects.filter(
+                order_id__in=model.objects.filter(buyer=buyer).values("pk")
+            ).delete()
@@ -0,0 +1,103 @@
+import hashlib
+import time
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+
+# ---------------------------------------------------
+# ✅ Catalog Response Cache
+# ---------------------------------------------------
+#
+# Public catalog responses are cached under a key that embeds a catalog
+# version number. Any product write bumps the version, which orphans every
+# cached page at once; stale entries simply age out via the timeout.
+#
+# The counter lives in the same (evictable) cache as the pages. It starts
+# from the current time in microseconds rather than 1, so a counter that
+# was evicted comes back higher than before and never reuses the key of
+# a page cached under an older version.
+
+VERSION_KEY = "catalog_cache_version"
+HITS_KEY = "catalog_cache_hits"
+MISSES_KEY = "catalog_cache_misses"
+
+
+def get_timeout():
+    return getattr(settings, "CATALOG_CACHE_TIMEOUT", 300)
+
+
+def _seed():
+    return time.time_ns() // 1000
+
+
+def get_version():
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        seed = _seed()
+        cache.add(VERSION_KEY, seed, timeout=None)
+        version = cache.get(VERSION_KEY, seed)
+    return version
+
+
+def bump_version():
+    try:
+        return cache.incr(VERSION_KEY)
+    except ValueError:
+        # Evicted: a fresh seed is already past every earlier version
+        return get_version()
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, timeout=None)
+
+
+def get_stats():
+    hits = cache.get(HITS_KEY, 0)
+    misses = cache.get(MISSES_KEY, 0)
+    total = hits + misses
+    return {
+        "version": get_version(),
+        "hits": hits,
+        "misses": misses,
+        "hit_ratio": round(hits / total, 4) if total else 0.0,
+    }
+
+
+def response_key(request):
+    # Sorted, blank-stripped params so ?page=2&category=X and
+    # ?category=X&page=2&search= share an entry.
+    params = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values
+        if value != ""
+    )
+    raw = f"{request.build_absolute_uri(request.path)}?{urlencode(params)}"
+    digest = hashlib.md5(raw.encode()).hexdigest()
+    return f"catalog:v{get_version()}:{digest}"
+
+
+class CatalogCacheMixin:
+    """
+    Serves GET responses of public catalog views from the versioned cache.
+    Only successful responses are stored.
+    """
+
+    def get(self, request, *args, **kwargs):
+        key = response_key(request)
+        data = cache.get(key)
+        if data is not None:
+            _count(HITS_KEY)
+            return Response(data, headers={"X-Cache": "HIT"})
+
+        _count(MISSES_KEY)
+        response = super().get(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, timeout=get_timeout())
+        response["X-Cache"] = "MISS"
+        return response
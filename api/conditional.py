@@ -0,0 +1,84 @@
+import hashlib
+
+from django.db.models import Count, Max, Sum
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+# ---------------------------------------------------
+# ✅ Conditional GET (ETag / Last-Modified)
+# ---------------------------------------------------
+
+
+class ConditionalGetMixin:
+    """
+    Computes ETag/Last-Modified from the id set and change timestamps of
+    the rows behind a response, with one aggregate query and without
+    serializing them, and answers matching If-None-Match /
+    If-Modified-Since requests with a 304.
+
+    ``conditional_timestamp_fields`` lists the timestamps the rendered
+    body depends on, including those of nested objects (e.g.
+    ``items__product__updated_at``).
+
+    Last-Modified is only sent when ``conditional_last_modified`` is set,
+    i.e. on single-object views: for a list, the newest timestamp of the
+    rows that are left does not change when a row is deleted, so an
+    If-Modified-Since check would miss it. Lists rely on the ETag, which
+    covers the size and id total of the set.
+    """
+
+    conditional_timestamp_fields = ("updated_at",)
+    conditional_last_modified = False
+
+    def get_validator_queryset(self):
+        queryset = self.get_queryset()
+        lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+        if lookup_url_kwarg in self.kwargs:
+            return queryset.filter(**{self.lookup_field: self.kwargs[lookup_url_kwarg]})
+        return self.filter_queryset(queryset)
+
+    def get_validators(self):
+        # One aggregate row, however many rows match: the id set is summed
+        # up by its size and id total, changes by the newest timestamp.
+        fields = self.conditional_timestamp_fields
+        summary = (
+            self.get_validator_queryset()
+            .order_by()
+            .aggregate(
+                count=Count("pk", distinct=True),
+                id_sum=Sum("pk", distinct=True),
+                **{f"stamp_{i}": Max(field) for i, field in enumerate(fields)},
+            )
+        )
+        if not summary["count"]:
+            return None, None
+        last_modified = max(
+            stamp
+            for i in range(len(fields))
+            if (stamp := summary[f"stamp_{i}"]) is not None
+        )
+
+        digest = hashlib.md5(self.request.get_full_path().encode())
+        digest.update(f"{summary['count']}:{summary['id_sum']}".encode())
+        digest.update(last_modified.isoformat().encode())
+        return quote_etag(digest.hexdigest()), last_modified.timestamp()
+
+    def get(self, request, *args, **kwargs):
+        etag, last_modified = self.get_validators()
+        if not self.conditional_last_modified:
+            last_modified = None
+        if etag is not None:
+            not_modified = get_conditional_response(
+                request,
+                etag=etag,
+                last_modified=last_modified and int(last_modified),
+            )
+            if not_modified is not None:
+                return not_modified
+
+        response = super().get(request, *args, **kwargs)
+        if etag is not None and response.status_code == 200:
+            response["ETag"] = etag
+            if last_modified is not None:
+                response["Last-Modified"] = http_date(last_modified)
+        return response
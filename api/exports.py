@@ -0,0 +1,152 @@
+import csv
+import io
+import json
+from collections import namedtuple
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q, Value
+
+from .models import ArchivedOrder, Order, Product, User
+
+# ---------------------------------------------------
+# ✅ Admin Exports (streamed CSV / NDJSON)
+# ---------------------------------------------------
+#
+# Rows are read as flat values_list() tuples through
+# QuerySet.iterator(chunk_size=...) (a server-side cursor on PostgreSQL)
+# and written out in small batches as they arrive, so the first bytes go
+# out straight away and memory stays flat however many rows match.
+
+CHUNK_SIZE = 2_000
+# Rows per piece handed to the WSGI server
+FLUSH_EVERY = 500
+
+Dataset = namedtuple("Dataset", "columns querysets date_field statuses")
+
+ACTIVE_STATUSES = {"active": Q(is_active=True), "inactive": Q(is_active=False)}
+
+
+def _orders(filters):
+    # Live orders first, then the archived ones
+    for model in (Order, ArchivedOrder):
+        yield model.objects.filter(filters).annotate(
+            archived=Value(model is ArchivedOrder)
+        )
+
+
+DATASETS = {
+    "orders": Dataset(
+        columns={
+            "id": "id",
+            "created_at": "created_at",
+            "buyer": "buyer__username",
+            "buyer_email": "buyer__email",
+            "status": "status",
+            "delivery_status": "delivery_status",
+            "delivery_date": "delivery_date",
+            "payment_method": "payment_method",
+            "item_count": "item_count",
+            "subtotal": "subtotal",
+            "phone_number": "phone_number",
+            "shipping_address": "shipping_address",
+            "archived": "archived",
+        },
+        querysets=_orders,
+        date_field="created_at",
+        statuses={
+            choice: Q(status=choice)
+            for choice, _ in Order._meta.get_field("status").choices
+        },
+    ),
+    "products": Dataset(
+        columns={
+            "id": "id",
+            "created_at": "created_at",
+            "title": "title",
+            "artisan": "artisan__username",
+            "category": "category",
+            "price": "price",
+            "stock": "stock",
+            "is_active": "is_active",
+            "updated_at": "updated_at",
+        },
+        querysets=lambda filters: [Product.objects.filter(filters)],
+        date_field="created_at",
+        statuses=ACTIVE_STATUSES,
+    ),
+    "users": Dataset(
+        columns={
+            "id": "id",
+            "date_joined": "date_joined",
+            "username": "username",
+            "email": "email",
+            "full_name": "full_name",
+            "phone": "phone",
+            "is_buyer": "is_buyer",
+            "is_artisan": "is_artisan",
+            "is_admin": "is_admin",
+            "is_active": "is_active",
+        },
+        querysets=lambda filters: [User.objects.filter(filters)],
+        date_field="date_joined",
+        statuses=ACTIVE_STATUSES,
+    ),
+}
+
+
+def rows(dataset, filters):
+    lookups = list(dataset.columns.values())
+    for queryset in dataset.querysets(filters):
+        yield from (
+            queryset.order_by("pk")
+            .values_list(*lookups)
+            .iterator(chunk_size=CHUNK_SIZE)
+        )
+
+
+def _drain(buffer):
+    data = buffer.getvalue()
+    buffer.seek(0)
+    buffer.truncate()
+    return data
+
+
+def _flushed(buffer, write, rows):
+    """Write ``rows`` to ``buffer``, handing its contents out as they fill."""
+    if buffer.tell():
+        yield _drain(buffer)
+    for count, row in enumerate(rows, 1):
+        write(row)
+        if count % FLUSH_EVERY == 0:
+            yield _drain(buffer)
+    if buffer.tell():
+        yield _drain(buffer)
+
+
+def as_csv(header, rows):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    # The header goes out before the first query runs
+    writer.writerow(header)
+    yield from _flushed(buffer, writer.writerow, rows)
+
+
+def as_ndjson(header, rows):
+    buffer = io.StringIO()
+
+    def write(row):
+        buffer.write(json.dumps(dict(zip(header, row)), cls=DjangoJSONEncoder))
+        buffer.write("\n")
+
+    yield from _flushed(buffer, write, rows)
+
+
+FORMATS = {
+    "csv": (as_csv, "text/csv"),
+    "ndjson": (as_ndjson, "application/x-ndjson"),
+}
+
+
+def stream(dataset, file_format, filters):
+    write, _ = FORMATS[file_format]
+    return write(list(dataset.columns), rows(dataset, filters))
@@ -0,0 +1,178 @@
+import functools
+import hashlib
+import json
+import time
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework.response import Response
+
+from .models import IdempotencyKey
+
+# ---------------------------------------------------
+# ✅ Idempotency-Key Support
+# ---------------------------------------------------
+#
+# The first request carrying a given ``Idempotency-Key`` (per user) claims
+# a row and runs the view; its response is stored and replayed for every
+# retry, so retries never repeat order or gateway work. A duplicate that
+# arrives while the first is still running waits for it to finish.
+# Completed responses are also kept in the cache, so most replays do not
+# touch the database either.
+
+HEADER = "HTTP_IDEMPOTENCY_KEY"
+KEY_TTL = timedelta(hours=24)
+WAIT_TIMEOUT = 10  # seconds a duplicate waits for the in-flight request
+# A row still "processing" after this long belongs to a worker that died.
+ABANDONED_AFTER = timedelta(minutes=1)
+POLL_INTERVAL = 0.1
+
+
+def _digest(value):
+    return hashlib.blake2b(value.encode(), digest_size=16).digest()
+
+
+def _request_digest(request):
+    data = request.data
+    if hasattr(data, "dict"):
+        data = data.dict()
+    body = json.dumps(data, sort_keys=True, default=str)
+    return _digest(f"{request.method} {request.path}\n{body}")
+
+
+def _cache_key(user_id, key_digest):
+    return f"idempotency_{user_id}_{key_digest.hex()}"
+
+
+def _replay(status_code, body):
+    return Response(body, status=status_code, headers={"Idempotent-Replayed": "true"})
+
+
+def _mismatch():
+    return Response(
+        {"error": "Idempotency-Key was already used for a different request."},
+        status=422,
+    )
+
+
+def _claim(user, key_digest, request_digest):
+    """Insert the processing row; returns None if the key is already taken."""
+    try:
+        with transaction.atomic():
+            return IdempotencyKey.objects.create(
+                user=user,
+                key_digest=key_digest,
+                request_digest=request_digest,
+                expires_at=timezone.now() + KEY_TTL,
+            )
+    except IntegrityError:
+        return None
+
+
+def _wait_for(user, key_digest, request_digest):
+    """
+    Return the stored response of an earlier request with this key,
+    waiting while it is still in flight. Returns None if there is none
+    (never seen, failed, abandoned or expired), so the caller may claim
+    the key itself.
+    """
+    deadline = time.monotonic() + WAIT_TIMEOUT
+    while True:
+        row = (
+            IdempotencyKey.objects.filter(user=user, key_digest=key_digest)
+            .values_list(
+                "pk",
+                "request_digest",
+                "state",
+                "status_code",
+                "response_body",
+                "created_at",
+                "expires_at",
+            )
+            .first()
+        )
+        if row is None:
+            return None
+        pk, stored_digest, state, status_code, body, created_at, expires_at = row
+        now = timezone.now()
+        if expires_at < now or (
+            state == "processing" and created_at < now - ABANDONED_AFTER
+        ):
+            # Expired or abandoned keys are fair game again.
+            IdempotencyKey.objects.filter(pk=pk, state=state).delete()
+            return None
+        if bytes(stored_digest) != request_digest:
+            return _mismatch()
+        if state == "completed":
+            return _replay(status_code, body)
+        if time.monotonic() >= deadline:
+            return Response(
+                {"error": "A request with this Idempotency-Key is in progress."},
+                status=409,
+            )
+        time.sleep(POLL_INTERVAL)
+
+
+def idempotent(view_func):
+    """
+    Decorator for @api_view function views. Requests without an
+    Idempotency-Key header are handled as before.
+    """
+
+    @functools.wraps(view_func)
+    def wrapper(request, *args, **kwargs):
+        raw_key = request.META.get(HEADER)
+        if not raw_key or not request.user.is_authenticated:
+            return view_func(request, *args, **kwargs)
+
+        user = request.user
+        key_digest = _digest(raw_key)
+        request_digest = _request_digest(request)
+        cache_key = _cache_key(user.pk, key_digest)
+
+        cached = cache.get(cache_key)
+        if cached is not None:
+            if cached["request"] != request_digest:
+                return _mismatch()
+            return _replay(cached["status"], cached["body"])
+
+        while True:
+            earlier = _wait_for(user, key_digest, request_digest)
+            if earlier is not None:
+                return earlier
+            claimed = _claim(user, key_digest, request_digest)
+            if claimed is not None:
+                break
+
+        try:
+            response = view_func(request, *args, **kwargs)
+        except Exception:
+            claimed.delete()
+            raise
+
+        if response.status_code >= 500:
+            # Server errors are not final: let the client retry for real.
+            claimed.delete()
+            return response
+
+        body = response.data
+        IdempotencyKey.objects.filter(pk=claimed.pk).update(
+            state="completed", status_code=response.status_code, response_body=body
+        )
+        cache.set(
+            cache_key,
+            {"request": request_digest, "status": response.status_code, "body": body},
+            timeout=int(KEY_TTL.total_seconds()),
+        )
+        return response
+
+    return wrapper
+
+
+def purge_expired(now=None):
+    deleted, _ = IdempotencyKey.objects.filter(
+        expires_at__lt=now or timezone.now()
+    ).delete()
+    return deleted
@@ -0,0 +1,130 @@
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from . import tasks
+
+# ---------------------------------------------------
+# ✅ Image Derivatives (Product.image / User.profile_picture)
+# ---------------------------------------------------
+#
+# Saving a new upload queues a task; the task worker then writes resized
+# WebP and JPEG copies next to the original under ``variants/`` with all
+# metadata stripped. The resulting map is stored on the row together with
+# the name of the source file, so a stale map (from a previous image) is
+# never served.
+
+VARIANT_WIDTHS = (300, 600, 1200)
+VARIANT_FORMATS = (("webp", "WEBP"), ("jpeg", "JPEG"))
+
+
+def build_variants(field_file):
+    field_file.open("rb")
+    try:
+        source = Image.open(field_file)
+        source = ImageOps.exif_transpose(source)
+        source.load()
+    finally:
+        field_file.close()
+
+    if source.mode not in ("RGB", "RGBA"):
+        source = source.convert("RGBA" if "transparency" in source.info else "RGB")
+
+    base, _ = os.path.splitext(field_file.name)
+    folder, stem = os.path.split(base)
+    variants = {"source": field_file.name, "widths": {}}
+
+    for width in VARIANT_WIDTHS:
+        if width > source.width and width != VARIANT_WIDTHS[0]:
+            break
+        resized = source.copy()
+        resized.thumbnail((width, width * 4), Image.LANCZOS)
+        urls = {}
+        for ext, pil_format in VARIANT_FORMATS:
+            image = resized.convert("RGB") if pil_format == "JPEG" else resized
+            buffer = BytesIO()
+            # Pillow only writes EXIF/ICC data when asked to, so re-encoding
+            # without those arguments strips the metadata.
+            image.save(buffer, pil_format, quality=80, optimize=True)
+            name = f"{folder}/variants/{stem}_{width}w.{ext}"
+            if default_storage.exists(name):
+                default_storage.delete(name)
+            urls[ext] = default_storage.save(name, ContentFile(buffer.getvalue()))
+        variants["widths"][str(width)] = urls
+
+    return variants
+
+
+def variants_are_current(field_file, variants):
+    return bool(field_file) and (variants or {}).get("source") == field_file.name
+
+
+def srcset(request, field_file, variants):
+    """
+    ``{"300w": {"webp": url, "jpeg": url}, ...}`` once derivatives exist,
+    otherwise ``{"original": url}`` (or ``{}`` when there is no file).
+    """
+    if not field_file:
+        return {}
+
+    def absolute(url):
+        return request.build_absolute_uri(url) if request else url
+
+    if not variants_are_current(field_file, variants):
+        return {"original": absolute(field_file.url)}
+    return {
+        f"{width}w": {
+            ext: absolute(default_storage.url(name)) for ext, name in urls.items()
+        }
+        for width, urls in variants["widths"].items()
+    }
+
+
+def thumbnail_url(request, field_file, variants):
+    """Smallest JPEG derivative, or the original until derivatives exist."""
+    if not field_file:
+        return None
+    if variants_are_current(field_file, variants):
+        smallest = min(variants["widths"], key=int)
+        url = default_storage.url(variants["widths"][smallest]["jpeg"])
+    else:
+        url = field_file.url
+    return request.build_absolute_uri(url) if request else url
+
+
+@tasks.register("image.product_variants")
+def process_product_image(product_id):
+    from .catalog_cache import bump_version
+    from .models import Product
+
+    product = Product.objects.filter(pk=product_id).first()
+    if product is None or not product.image:
+        return
+    if variants_are_current(product.image, product.image_variants):
+        return
+    variants = build_variants(product.image)
+    # Only store the map if the image was not replaced in the meantime.
+    updated = Product.objects.filter(pk=product_id, image=variants["source"]).update(
+        image_variants=variants, updated_at=timezone.now()
+    )
+    if updated:
+        bump_version()
+
+
+@tasks.register("image.profile_picture_variants")
+def process_profile_picture(user_id):
+    from .models import User
+
+    user = User.objects.filter(pk=user_id).first()
+    if user is None or not user.profile_picture:
+        return
+    if variants_are_current(user.profile_picture, user.profile_picture_variants):
+        return
+    variants = build_variants(user.profile_picture)
+    User.objects.filter(pk=user_id, profile_picture=variants["source"]).update(
+        profile_picture_variants=variants
+    )
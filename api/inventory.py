@@ -0,0 +1,216 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, F, IntegerField, Value, When
+from django.utils import timezone
+
+from . import catalog_cache
+from .models import OrderItem, Product, StockReservation
+
+# ---------------------------------------------------
+# ✅ Inventory Reservations
+# ---------------------------------------------------
+#
+# Stock only ever moves through conditional, row-level UPDATEs
+# (``... SET stock = stock - n WHERE id = ? AND stock >= n``), never
+# read-modify-write, so concurrent buyers cannot oversell. Checkout
+# initiation takes short-lived holds (stock is decremented up front);
+# confirmation turns them into committed reservations; holds that expire
+# are handed back by ``release_expired``, which the task worker runs every
+# minute. Denying an order hands its stock back; taking it out of "denied"
+# again takes the stock anew.
+
+HOLD_TTL = timedelta(minutes=5)
+
+
+class InsufficientStock(Exception):
+    def __init__(self, product_ids):
+        super().__init__(f"Insufficient stock for products {product_ids}")
+        self.product_ids = product_ids
+
+
+class _PartialDecrement(Exception):
+    pass
+
+
+def decrement_stock(product_id, quantity):
+    updated = Product.objects.filter(pk=product_id, stock__gte=quantity).update(
+        stock=F("stock") - quantity, updated_at=timezone.now()
+    )
+    if updated:
+        transaction.on_commit(catalog_cache.bump_version)
+    return bool(updated)
+
+
+def increment_stock(product_id, quantity):
+    Product.objects.filter(pk=product_id).update(
+        stock=F("stock") + quantity, updated_at=timezone.now()
+    )
+    transaction.on_commit(catalog_cache.bump_version)
+
+
+def _per_product(amounts):
+    return Case(
+        *[When(pk=product_id, then=Value(amount)) for product_id, amount in amounts],
+        output_field=IntegerField(),
+    )
+
+
+def _apply_deltas(deltas):
+    """
+    Apply per-product stock changes (positive = take stock) with one
+    conditional UPDATE per direction, whatever the number of products.
+    Either every decrement applies or none does.
+    """
+    take = sorted((pk, delta) for pk, delta in deltas.items() if delta > 0)
+    give = sorted((pk, -delta) for pk, delta in deltas.items() if delta < 0)
+    now = timezone.now()
+
+    if take:
+        needed = _per_product(take)
+        try:
+            with transaction.atomic():
+                updated = Product.objects.filter(
+                    pk__in=[pk for pk, _ in take], stock__gte=needed
+                ).update(stock=F("stock") - needed, updated_at=now)
+                if updated != len(take):
+                    raise _PartialDecrement
+        except _PartialDecrement:
+            # Rolled back to the savepoint, so these are the stock levels
+            # the UPDATE saw.
+            stock = dict(
+                Product.objects.filter(pk__in=[pk for pk, _ in take]).values_list(
+                    "pk", "stock"
+                )
+            )
+            raise InsufficientStock([pk for pk, n in take if stock.get(pk, 0) < n])
+    if give:
+        returned = _per_product(give)
+        Product.objects.filter(pk__in=[pk for pk, _ in give]).update(
+            stock=F("stock") + returned, updated_at=now
+        )
+    if take or give:
+        transaction.on_commit(catalog_cache.bump_version)
+
+
+@transaction.atomic
+def reserve_cart(buyer, cart_items, ttl=HOLD_TTL):
+    """
+    Replace the buyer's current holds with holds for ``cart_items``.
+    Raises InsufficientStock (and changes nothing) if any line can't be
+    covered.
+    """
+    held = list(
+        StockReservation.objects.select_for_update().filter(buyer=buyer, status="held")
+    )
+    deltas = defaultdict(int)
+    for reservation in held:
+        deltas[reservation.product_id] -= reservation.quantity
+    for item in cart_items:
+        deltas[item.product_id] += item.quantity
+    _apply_deltas(deltas)
+
+    StockReservation.objects.filter(pk__in=[r.pk for r in held]).update(
+        status="released"
+    )
+    expires_at = timezone.now() + ttl
+    return StockReservation.objects.bulk_create(
+        StockReservation(
+            buyer=buyer,
+            product_id=item.product_id,
+            quantity=item.quantity,
+            expires_at=expires_at,
+        )
+        for item in cart_items
+    )
+
+
+@transaction.atomic
+def commit_cart(buyer, cart_items, order):
+    """
+    Turn the buyer's holds into committed reservations for ``order``,
+    topping up or handing back stock where the cart changed since the
+    holds were taken. Raises InsufficientStock if a top-up fails.
+    """
+    held = list(
+        StockReservation.objects.select_for_update().filter(buyer=buyer, status="held")
+    )
+    held_by_product = {reservation.product_id: reservation for reservation in held}
+    wanted = defaultdict(int)
+    for item in cart_items:
+        wanted[item.product_id] += item.quantity
+
+    deltas = defaultdict(int)
+    for reservation in held:
+        deltas[reservation.product_id] -= reservation.quantity
+    for product_id, quantity in wanted.items():
+        deltas[product_id] += quantity
+    _apply_deltas(deltas)
+
+    StockReservation.objects.filter(
+        pk__in=[r.pk for r in held if r.product_id not in wanted]
+    ).update(status="released")
+    StockReservation.objects.filter(
+        pk__in=[r.pk for r in held if r.product_id in wanted]
+    ).update(status="committed", order=order)
+
+    changed = [
+        held_by_product[product_id]
+        for product_id, quantity in wanted.items()
+        if product_id in held_by_product
+        and held_by_product[product_id].quantity != quantity
+    ]
+    for reservation in changed:
+        reservation.quantity = wanted[reservation.product_id]
+    StockReservation.objects.bulk_update(changed, ["quantity"])
+
+    now = timezone.now()
+    StockReservation.objects.bulk_create(
+        StockReservation(
+            buyer=buyer,
+            product_id=product_id,
+            order=order,
+            quantity=quantity,
+            status="committed",
+            expires_at=now,
+        )
+        for product_id, quantity in wanted.items()
+        if product_id not in held_by_product
+    )
+
+
+def record_status_change(order, old_status, new_status):
+    """
+    Return the order's stock when it is denied, and take it again when it
+    leaves "denied". Call inside the transaction that saves the status;
+    raises InsufficientStock (and changes nothing) if the stock is gone.
+    """
+    sign = int(old_status == "denied") - int(new_status == "denied")
+    if not sign:
+        return
+    deltas = defaultdict(int)
+    for product_id, quantity in OrderItem.objects.filter(order=order).values_list(
+        "product_id", "quantity"
+    ):
+        deltas[product_id] += sign * quantity
+    _apply_deltas(deltas)
+
+
+def release_expired(now=None):
+    """Hand back the stock of expired holds. Returns how many were released."""
+    now = now or timezone.now()
+    expired = StockReservation.objects.filter(status="held", expires_at__lt=now)
+    released = 0
+    for pk, product_id, quantity in expired.values_list(
+        "pk", "product_id", "quantity"
+    ).iterator():
+        with transaction.atomic():
+            # The status check makes this safe against a concurrent checkout
+            # committing the same hold, and against a second releaser.
+            if StockReservation.objects.filter(pk=pk, status="held").update(
+                status="released"
+            ):
+                increment_stock(product_id, quantity)
+                released += 1
+    return released
@@ -0,0 +1,222 @@
+from collections import defaultdict
+from datetime import timedelta
+
+from django.db import transaction
+from django.db.models import Case, F, FilteredRelation, Q, Sum, Value, When
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from django.utils.functional import cached_property
+from rest_framework import filters
+
+from .models import BestSeller, DailySales
+
+# ---------------------------------------------------
+# ✅ Best-seller Leaderboards
+# ---------------------------------------------------
+#
+# BestSeller holds approved units per (window, product), with the
+# product's artisan and category copied in, so every board is read in
+# score order straight off an index. Approving or un-approving an order
+# adds to the rows of the windows its creation day falls in. The 7 and 30
+# day windows slide once a day: ``manage.py rebuild_leaderboards`` (cron,
+# just after midnight) recomputes them from the DailySales rollup.
+
+WINDOWS = (7, 30, BestSeller.ALL_TIME)
+
+# ?ordering= values for the product feed
+ORDERINGS = {
+    "best_selling": BestSeller.ALL_TIME,
+    "best_selling_30d": 30,
+    "best_selling_7d": 7,
+}
+
+
+def windows_for(day, today=None):
+    """The windows an order created on ``day`` counts towards."""
+    today = today or timezone.localdate()
+    return [
+        window
+        for window in WINDOWS
+        if window == BestSeller.ALL_TIME or day > today - timedelta(days=window)
+    ]
+
+
+def apply(order, lines, approved):
+    """
+    Add (``approved`` = 1) or take back (-1) the units of ``lines``, the
+    ``(product_id, artisan_id, category, quantity, price)`` of ``order``,
+    flooring the counts at zero. Two queries.
+    """
+    if not approved or not lines:
+        return
+    windows = windows_for(timezone.localdate(order.created_at))
+    units, products = defaultdict(int), {}
+    for product_id, artisan_id, category, quantity, _ in lines:
+        units[product_id] += approved * quantity
+        products[product_id] = (artisan_id, category)
+
+    BestSeller.objects.bulk_create(
+        [
+            BestSeller(
+                window=window,
+                product_id=product_id,
+                artisan_id=artisan_id,
+                category=category,
+            )
+            for window in windows
+            for product_id, (artisan_id, category) in products.items()
+        ],
+        ignore_conflicts=True,
+    )
+    # Never below zero, whatever was (or was not) counted before
+    BestSeller.objects.filter(window__in=windows, product_id__in=units).update(
+        units=Greatest(
+            F("units")
+            + Case(
+                *[
+                    When(product_id=pk, then=Value(delta))
+                    for pk, delta in units.items()
+                ],
+                default=Value(0),
+            ),
+            Value(0),
+        )
+    )
+
+
+def rebuild(windows=WINDOWS):
+    """Recompute the boards from the DailySales rollup."""
+    today = timezone.localdate()
+    with transaction.atomic():
+        for window in windows:
+            sales = DailySales.objects.all()
+            if window != BestSeller.ALL_TIME:
+                sales = sales.filter(date__gt=today - timedelta(days=window))
+            # Current artisan / category, should a product have moved
+            rows = (
+                sales.values_list(
+                    "product_id", "product__artisan_id", "product__category"
+                )
+                .annotate(sold=Sum("approved_quantity"))
+                .filter(sold__gt=0)
+                .order_by()
+            )
+            BestSeller.objects.filter(window=window).delete()
+            BestSeller.objects.bulk_create(
+                (
+                    BestSeller(
+                        window=window,
+                        product_id=product_id,
+                        artisan_id=artisan_id,
+                        category=category,
+                        units=sold,
+                    )
+                    for product_id, artisan_id, category, sold in rows.iterator()
+                ),
+                batch_size=1_000,
+            )
+
+
+def top(window, category=None, artisan_id=None, limit=20):
+    """The board's entries, best first, with their (active) products."""
+    entries = BestSeller.objects.filter(
+        window=window, units__gt=0, product__is_active=True
+    )
+    if category:
+        entries = entries.filter(category=category)
+    if artisan_id:
+        entries = entries.filter(artisan_id=artisan_id)
+    return entries.select_related("product").order_by("-units", "product_id")[:limit]
+
+
+def board(window, products, category=None):
+    """
+    The sold entries of ``window`` for the products in ``products``, best
+    first: a walk down the (window[, category], -units) index.
+    """
+    entries = BestSeller.objects.filter(
+        window=window, units__gt=0, product__in=products.values("pk")
+    )
+    if category:
+        entries = entries.filter(category=category)
+    return entries.order_by("-units", "-product_id")
+
+
+class RankedProducts:
+    """
+    ``products`` in board order: the sold ones by units, then the unsold
+    ones newest first. Sliced by the paginator, a page reads just its own
+    board entries and products (plus the unsold tail once it gets there),
+    so the catalog is never sorted by sales as a whole. Each product gets
+    a ``units_sold`` attribute.
+    """
+
+    def __init__(self, products, window, category=None):
+        self.products = products
+        self.board = board(window, products, category)
+        self.unsold = products.exclude(
+            pk__in=BestSeller.objects.filter(window=window, units__gt=0).values(
+                "product_id"
+            )
+        ).order_by("-created_at", "-id")
+
+    @cached_property
+    def ranked(self):
+        return self.board.count()
+
+    def count(self):
+        return self.products.count()
+
+    def __len__(self):
+        return self.count()
+
+    def __getitem__(self, index):
+        if not isinstance(index, slice):
+            return self[index : index + 1][0]
+        start, stop = index.start or 0, index.stop
+        entries = list(self.board.values_list("product_id", "units")[start:stop])
+        found = self.products.in_bulk([pk for pk, _ in entries])
+        page = []
+        for pk, units in entries:
+            if pk in found:
+                found[pk].units_sold = units
+                page.append(found[pk])
+        if stop is None or len(entries) < stop - start:
+            # Past the end of the board: carry on into the unsold products
+            skip = max(start - self.ranked, 0)
+            end = None if stop is None else skip + stop - start - len(entries)
+            for product in self.unsold[skip:end]:
+                product.units_sold = 0
+                page.append(product)
+        return page
+
+
+class BestSellerOrderingFilter(filters.OrderingFilter):
+    """
+    OrderingFilter that also takes ?ordering=best_selling (all time),
+    best_selling_30d and best_selling_7d: products ranked by approved
+    units sold, unsold ones last (newest first). Served page by page from
+    the BestSeller board (see RankedProducts); cursor pages keep to the
+    plain ordering fields.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        ordering = request.query_params.get(self.ordering_param, "")
+        window = ORDERINGS.get(ordering.split(",")[0].strip())
+        params = request.query_params
+        cursor = params.get("pagination") == "cursor" or "cursor" in params
+        if window is None or cursor:
+            return super().filter_queryset(request, queryset, view)
+        if "search_rank" in queryset.query.annotations:
+            # Search results rank with raw SQL naming api_product, which
+            # cannot go in a subquery; rank just the matches instead.
+            return (
+                queryset.alias(
+                    board=FilteredRelation(
+                        "best_sellers", condition=Q(best_sellers__window=window)
+                    )
+                )
+                .annotate(units_sold=Coalesce("board__units", 0))
+                .order_by("-units_sold", "-created_at", "-id")
+            )
+        return RankedProducts(queryset, window, params.get("category"))
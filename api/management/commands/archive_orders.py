@@ -0,0 +1,68 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from api import archive
+
+
+class Command(BaseCommand):
+    help = (
+        "Move closed orders (denied or delivered) older than "
+        "ORDER_ARCHIVE_AFTER_DAYS into the archive tables, in small "
+        "batches. Safe to stop and re-run at any time; run it nightly."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=500)
+        parser.add_argument(
+            "--older-than-days",
+            type=int,
+            help="Archive only orders older than this (at least the setting).",
+        )
+        parser.add_argument(
+            "--max-batches", type=int, help="Stop after this many batches."
+        )
+        parser.add_argument(
+            "--pause",
+            type=float,
+            default=0.0,
+            help="Seconds to sleep between batches, to go easy on the database.",
+        )
+        parser.add_argument("--dry-run", action="store_true")
+
+    def handle(self, *args, **options):
+        before = archive.horizon()
+        if options["older_than_days"] is not None:
+            if timedelta(days=options["older_than_days"]) < archive.archive_after():
+                # Listings assume nothing newer than the horizon is archived.
+                raise CommandError(
+                    "--older-than-days cannot be below ORDER_ARCHIVE_AFTER_DAYS."
+                )
+            before = timezone.now() - timedelta(days=options["older_than_days"])
+
+        candidates = archive.archivable(before).order_by("pk")
+        if options["dry_run"]:
+            self.stdout.write(f"{candidates.count()} orders would be archived.")
+            return
+
+        moved = batches = 0
+        last_pk = 0
+        while options["max_batches"] is None or batches < options["max_batches"]:
+            ids = list(
+                candidates.filter(pk__gt=last_pk).values_list("pk", flat=True)[
+                    : options["batch_size"]
+                ]
+            )
+            if not ids:
+                break
+            moved += archive.archive_batch(ids, before)
+            batches += 1
+            last_pk = ids[-1]
+            if options["pause"]:
+                time.sleep(options["pause"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Archived {moved} orders in {batches} batches.")
+        )
@@ -0,0 +1,85 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import (
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    PositiveIntegerField,
+    Subquery,
+    Sum,
+)
+from django.db.models.functions import Coalesce
+
+from api.models import ArchivedOrder, ArchivedOrderItem, Order, OrderItem
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill in subtotal / item_count from the order items for live and "
+        "archived orders without them (migration 0009 did this once for the "
+        "orders it found), or recompute them all with --all. Works in id "
+        "batches, one UPDATE per batch; safe to re-run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument(
+            "--all",
+            action="store_true",
+            help="Recompute every order, not just those without totals.",
+        )
+
+    def handle(self, *args, **options):
+        updated = 0
+        for order_model, item_model in (
+            (Order, OrderItem),
+            (ArchivedOrder, ArchivedOrderItem),
+        ):
+            updated += self.backfill(order_model, item_model, options)
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Backfilled totals for {updated} orders.")
+        )
+
+    def backfill(self, order_model, item_model, options):
+        items = item_model.objects.filter(order=OuterRef("pk")).order_by()
+        subtotal = Subquery(
+            items.values("order")
+            .annotate(
+                total=Sum(
+                    ExpressionWrapper(
+                        F("price") * F("quantity"),
+                        output_field=DecimalField(max_digits=12, decimal_places=2),
+                    )
+                )
+            )
+            .values("total")
+        )
+        item_count = Subquery(
+            items.values("order").annotate(total=Sum("quantity")).values("total")
+        )
+
+        orders = order_model.objects.order_by("pk")
+        if not options["all"]:
+            # Every order has at least one item, so 0 means "never stored".
+            orders = orders.filter(item_count=0)
+
+        updated, last_pk = 0, 0
+        while True:
+            batch = list(
+                orders.filter(pk__gt=last_pk).values_list("pk", flat=True)[
+                    : options["batch_size"]
+                ]
+            )
+            if not batch:
+                break
+            with transaction.atomic():
+                updated += order_model.objects.filter(pk__in=batch).update(
+                    subtotal=Coalesce(subtotal, 0, output_field=DecimalField()),
+                    item_count=Coalesce(
+                        item_count, 0, output_field=PositiveIntegerField()
+                    ),
+                )
+            last_pk = batch[-1]
+        return updated
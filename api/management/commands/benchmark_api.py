@@ -0,0 +1,555 @@
+import json
+import math
+import platform
+import re
+import statistics
+import time
+import tracemalloc
+from collections import namedtuple
+from datetime import timedelta
+from urllib.parse import urlencode
+
+import django
+from django.conf import settings
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from api import inventory, urls
+from api.management.commands.seed_synthetic_data import SYNTHETIC_PASSWORD
+from api.models import (
+    Address,
+    ArtisanOrder,
+    CartItem,
+    Order,
+    OrderItem,
+    Product,
+    User,
+    Wishlist,
+)
+
+API_PREFIX = "/api/"
+CART_SIZE = 3
+SECURITY_ANSWER = "benchmark"
+# Transaction control statements the per-request savepoints add
+SAVEPOINT_SQL = re.compile(r"^\s*(SAVEPOINT|RELEASE SAVEPOINT|ROLLBACK TO SAVEPOINT)")
+
+# One request to time: ``role`` is "buyer", "artisan", "admin" or None
+# (anonymous); ``kwargs`` fill the route's path converters.
+Call = namedtuple(
+    "Call", "method role data query kwargs", defaults=(None, None, {}, {})
+)
+
+# Routes deliberately left out, with the reason recorded in the report.
+SKIPPED = {
+    "buyer/cart/create-razorpay-order/": (
+        "Calls the external payment gateway; run payment_gateway_stub, point "
+        "RAZORPAY_BASE_URL at it and pass --with-gateway."
+    ),
+}
+
+
+class Fixtures:
+    """
+    The users and rows the scenarios act on, picked from the (seeded)
+    database, plus the few a buyer needs to have: a cart, a wishlist entry,
+    an address and a security question. Created inside the benchmark's
+    transaction, so they are rolled back with everything else.
+    """
+
+    def __init__(self):
+        sub_order = (
+            ArtisanOrder.objects.select_related("order__buyer", "artisan")
+            .order_by("-created_at")
+            .first()
+        )
+        if sub_order is None:
+            raise CommandError(
+                "No orders to benchmark against: run seed_synthetic_data first."
+            )
+        self.order = sub_order.order
+        self.artisan = sub_order.artisan
+        self.buyer = self.order.buyer
+        self.admin = User.objects.filter(is_admin=True).first()
+        if self.admin is None:
+            self.admin = User.objects.create(
+                username="bench_api_admin",
+                email="bench_api_admin@example.com",
+                is_admin=True,
+            )
+        self.product = Product.objects.filter(artisan=self.artisan).latest("created_at")
+
+        # Products the buyer shops with: the cart, then one more to add
+        self.shop = list(
+            Product.objects.filter(is_active=True)
+            .exclude(artisan=self.artisan)
+            .order_by("-created_at")[: CART_SIZE + 1]
+        )
+        Product.objects.filter(pk__in=[p.pk for p in self.shop]).update(stock=1_000_000)
+        self.buyer.is_active = True
+        self.buyer.security_question = "Benchmark?"
+        self.buyer.security_answer = SECURITY_ANSWER
+        self.buyer.set_password(SYNTHETIC_PASSWORD)
+        self.buyer.save()
+        CartItem.objects.filter(buyer=self.buyer).delete()
+        Wishlist.objects.filter(buyer=self.buyer).delete()
+        self.cart = CartItem.objects.bulk_create(
+            CartItem(buyer=self.buyer, product=product, price_snapshot=product.price)
+            for product in self.shop[:CART_SIZE]
+        )
+        self.wishlisted = Wishlist.objects.create(
+            buyer=self.buyer, product=self.shop[0]
+        ).product_id
+        self.address = Address.objects.create(
+            buyer=self.buyer,
+            address_line="1 Benchmark Road",
+            city="Jaipur",
+            postal_code="302001",
+        )
+        self.users = {
+            "buyer": self.buyer,
+            "artisan": self.artisan,
+            "admin": self.admin,
+            None: None,
+        }
+
+
+def get(who=None, **query):
+    """A plain GET as ``who`` (a role, or None for anonymous)."""
+    return lambda fx: Call("GET", who, query=query)
+
+
+def _login(fx):
+    return Call(
+        "POST", data={"username": fx.buyer.username, "password": SYNTHETIC_PASSWORD}
+    )
+
+
+def _refresh_token(fx):
+    return Call("POST", data={"refresh": str(RefreshToken.for_user(fx.buyer))})
+
+
+def _checkout_confirm(fx):
+    # What checkout-initiate leaves behind: stock holds and the OTP
+    inventory.reserve_cart(fx.buyer, fx.cart)
+    cache.set(f"cart_checkout_otp_{fx.buyer.id}", 123456, timeout=60)
+    return Call("POST", "buyer", data={"otp": "123456"})
+
+
+def _order_status(fx):
+    status = "denied" if fx.order.status == "approved" else "approved"
+    return Call("PATCH", "artisan", {"status": status}, kwargs={"pk": fx.order.pk})
+
+
+def _register(fx):
+    # A new username every time, as the savepoint is gone by the next run
+    name = f"bench_api_{time.perf_counter_ns()}"
+    return Call(
+        "POST",
+        data={
+            "username": name,
+            "full_name": "Benchmark User",
+            "email": f"{name}@example.com",
+            "phone": "9000000000",
+            "password": "Bench-pass-4821",
+            "is_buyer": True,
+        },
+    )
+
+
+def _razorpay_order(fx):
+    return Call("POST", "buyer", {"amount": "499.00"})
+
+
+# route -> scenarios run against it
+SCENARIOS = {
+    # 🔐 AUTH & JWT
+    "auth/register/": [_register],
+    "auth/login/": [_login],
+    "auth/refresh/": [_refresh_token],
+    "auth/logout/": [_refresh_token],
+    "auth/check-username/": [
+        lambda fx: Call("GET", query={"username": fx.buyer.username})
+    ],
+    "auth/check-email/": [lambda fx: Call("GET", query={"email": fx.buyer.email})],
+    # 🔁 FORGOT PASSWORD
+    "verify-user-phone/": [
+        lambda fx: Call(
+            "POST", data={"username": fx.buyer.username, "phone": fx.buyer.phone}
+        )
+    ],
+    "set-password/": [
+        lambda fx: Call(
+            "POST",
+            data={
+                "username": fx.buyer.username,
+                "new_password": SYNTHETIC_PASSWORD,
+                "security_question": "Benchmark?",
+                "security_answer": SECURITY_ANSWER,
+            },
+        )
+    ],
+    "get-security-question/": [
+        lambda fx: Call("POST", data={"username": fx.buyer.username})
+    ],
+    "reset-password-security/": [
+        lambda fx: Call(
+            "POST",
+            data={
+                "username": fx.buyer.username,
+                "security_answer": SECURITY_ANSWER,
+                "new_password": SYNTHETIC_PASSWORD,
+            },
+        )
+    ],
+    # 👤 PROFILE
+    "profile/": [get("buyer")],
+    "profile/update/": [
+        lambda fx: Call(
+            "PUT", "buyer", {"full_name": "Benchmark Buyer", "phone": "9000000001"}
+        )
+    ],
+    "profile/update-password/": [
+        lambda fx: Call("PUT", "buyer", {"new_password": SYNTHETIC_PASSWORD})
+    ],
+    # 🏠 DASHBOARDS
+    "buyer/dashboard/": [get("buyer")],
+    "artisan/dashboard/": [get("artisan")],
+    "admin/dashboard/": [get("admin")],
+    # 🛍️ PRODUCTS
+    "products/": [
+        get(),
+        get(category="Pottery"),
+        get(search="clay vase"),
+        get(ordering="best_selling_30d"),
+    ],
+    "products/best-sellers/": [get(), get(window="7", category="Textiles")],
+    "products/<int:pk>/": [lambda fx: Call("GET", kwargs={"pk": fx.product.pk})],
+    "artisan/products/add/": [
+        lambda fx: Call(
+            "POST",
+            "artisan",
+            {
+                "title": "Benchmark bowl",
+                "description": "Added by benchmark_api.",
+                "category": "Pottery",
+                "price": "250.00",
+                "stock": 5,
+            },
+        )
+    ],
+    "artisan/products/": [get("artisan")],
+    "artisan/products/<int:pk>/": [
+        lambda fx: Call("GET", "artisan", kwargs={"pk": fx.product.pk}),
+        lambda fx: Call(
+            "PATCH", "artisan", {"stock": 42}, kwargs={"pk": fx.product.pk}
+        ),
+    ],
+    "artisan/products/<int:pk>/toggle-status/": [
+        lambda fx: Call("PATCH", "artisan", kwargs={"pk": fx.product.pk})
+    ],
+    # 📦 ORDERS
+    "buyer/orders/": [get("buyer")],
+    "buyer/buy-now/": [
+        lambda fx: Call("POST", "buyer", {"product_id": fx.shop[0].pk, "quantity": 1})
+    ],
+    "artisan/orders/": [get("artisan")],
+    "artisan/orders/<int:pk>/update-status/": [_order_status],
+    "orders/<int:pk>/update-delivery/": [
+        lambda fx: Call(
+            "PATCH",
+            "artisan",
+            {"delivery_status": "shipped"},
+            kwargs={"pk": fx.order.pk},
+        )
+    ],
+    # 🧾 ADMIN
+    "admin/users/": [get("admin"), get("admin", role="artisan", search="synth_1")],
+    "admin/users/<int:pk>/": [
+        lambda fx: Call("GET", "admin", kwargs={"pk": fx.buyer.pk})
+    ],
+    "admin/products/": [get("admin"), get("admin", category="Jewelry")],
+    "admin/products/<int:pk>/": [
+        lambda fx: Call("GET", "admin", kwargs={"pk": fx.product.pk})
+    ],
+    "admin/orders/": [get("admin"), get("admin", status="pending")],
+    "admin/orders/<int:pk>/": [
+        lambda fx: Call("GET", "admin", kwargs={"pk": fx.order.pk}),
+        lambda fx: Call(
+            "PATCH", "admin", {"status": "approved"}, kwargs={"pk": fx.order.pk}
+        ),
+    ],
+    "admin/export/<str:dataset>.<str:file_format>": [
+        lambda fx: Call(
+            "GET",
+            "admin",
+            query={"start": str(timezone.localdate() - timedelta(days=7))},
+            kwargs={"dataset": "orders", "file_format": "csv"},
+        )
+    ],
+    # 📊 ANALYTICS
+    "artisan/dashboard/analytics/": [get("artisan")],
+    "admin/analytics/": [get("admin")],
+    "admin/catalog-cache/": [get("admin")],
+    # ❤️ WISHLIST
+    "buyer/wishlist/": [
+        get("buyer"),
+        lambda fx: Call("POST", "buyer", {"product_id": fx.shop[-1].pk}),
+    ],
+    "buyer/wishlist/<int:product_id>/": [
+        lambda fx: Call("DELETE", "buyer", kwargs={"product_id": fx.wishlisted})
+    ],
+    # 🛒 CART
+    "buyer/cart/": [
+        get("buyer"),
+        lambda fx: Call("POST", "buyer", {"product_id": fx.shop[-1].pk, "quantity": 1}),
+    ],
+    "buyer/cart/<int:pk>/": [
+        lambda fx: Call("PATCH", "buyer", {"quantity": 2}, kwargs={"pk": fx.cart[0].pk})
+    ],
+    "buyer/cart/batch/": [
+        lambda fx: Call(
+            "POST",
+            "buyer",
+            [{"product_id": product.pk, "quantity": 2} for product in fx.shop],
+        )
+    ],
+    "buyer/cart/summary/": [get("buyer")],
+    # 🏡 ADDRESS (Buyer)
+    "buyer/addresses/": [get("buyer")],
+    "buyer/addresses/add/": [
+        lambda fx: Call(
+            "POST",
+            "buyer",
+            {
+                "address_line": "2 Benchmark Road",
+                "city": "Pune",
+                "postal_code": "411001",
+            },
+        )
+    ],
+    "buyer/addresses/<int:address_id>/delete/": [
+        lambda fx: Call("DELETE", "buyer", kwargs={"address_id": fx.address.pk})
+    ],
+    # 💳 CHECKOUT
+    "buyer/cart/checkout-initiate/": [lambda fx: Call("POST", "buyer")],
+    "buyer/cart/checkout-confirm/": [_checkout_confirm],
+    "buyer/cart/create-razorpay-order/": [_razorpay_order],
+}
+
+
+def build_path(route, kwargs):
+    return API_PREFIX + re.sub(
+        r"<(?:\w+:)?(\w+)>", lambda match: str(kwargs[match.group(1)]), route
+    )
+
+
+def label(route, call):
+    query = f" ?{urlencode(call.query)}" if call.query else ""
+    return f"{call.method} {route}{query}"
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile."""
+    ordered = sorted(samples)
+    return ordered[max(0, math.ceil(pct / 100 * len(ordered)) - 1)]
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive every route in api/urls.py through the test client against "
+        "the current (e.g. seed_synthetic_data) database and record p50/p95 "
+        "latency, query count and peak Python memory per endpoint in a JSON "
+        "report. Every request is rolled back. --compare prints the change "
+        "against an earlier report."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=20)
+        parser.add_argument(
+            "--warmup", type=int, default=2, help="Untimed runs per endpoint."
+        )
+        parser.add_argument("--output", default="benchmark_api.json")
+        parser.add_argument("--compare", help="An earlier report to diff against.")
+        parser.add_argument(
+            "--only",
+            action="append",
+            default=[],
+            help="Run only the routes containing this (repeatable).",
+        )
+        parser.add_argument(
+            "--cold",
+            action="store_true",
+            help="Clear the cache before every request (no cached responses).",
+        )
+        parser.add_argument(
+            "--with-gateway",
+            action="store_true",
+            help="Also call the payment gateway (see payment_gateway_stub).",
+        )
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1:
+            raise CommandError("--repeat must be at least 1.")
+        self.options = options
+        self.client = APIClient()
+        skipped = dict(SKIPPED)
+        if options["with_gateway"]:
+            skipped.pop("buyer/cart/create-razorpay-order/")
+
+        report = {"meta": self.meta(), "endpoints": {}, "skipped": {}}
+        with override_settings(
+            ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, "testserver"],
+            EMAIL_BACKEND="django.core.mail.backends.locmem.EmailBackend",
+        ):
+            try:
+                with transaction.atomic():
+                    fixtures = Fixtures()
+                    for route in self.routes():
+                        if options["only"] and not any(
+                            part in route for part in options["only"]
+                        ):
+                            continue
+                        if route in skipped:
+                            report["skipped"][route] = skipped[route]
+                        elif route not in SCENARIOS:
+                            report["skipped"][route] = "No scenario in benchmark_api."
+                        else:
+                            for scenario in SCENARIOS[route]:
+                                self.run(route, scenario, fixtures, report)
+                    raise _Rollback
+            except _Rollback:
+                pass
+
+        for route, reason in report["skipped"].items():
+            self.stdout.write(self.style.WARNING(f"skipped {route}: {reason}"))
+        with open(options["output"], "w") as fh:
+            json.dump(report, fh, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Report written to {options['output']}"))
+        if options["compare"]:
+            self.compare(options["compare"], report)
+
+    def meta(self):
+        return {
+            "created_at": timezone.now().isoformat(),
+            "vendor": connection.vendor,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "repeat": self.options["repeat"],
+            "warmup": self.options["warmup"],
+            "cold_cache": self.options["cold"],
+            "rows": {
+                model.__name__: model.objects.count()
+                for model in (User, Product, Order, OrderItem)
+            },
+        }
+
+    def routes(self):
+        return [str(pattern.pattern) for pattern in urls.urlpatterns]
+
+    def attempt(self, route, scenario, fixtures, trace=False):
+        """
+        One request, rolled back: ``(call, response, size, seconds, queries,
+        peak)``. Only the request itself is timed (and traced for memory
+        when ``trace`` is set), not the scenario's setup.
+        """
+        peak = None
+        with transaction.atomic():
+            if self.options["cold"]:
+                cache.clear()
+            call = scenario(fixtures)
+            self.client.force_authenticate(fixtures.users[call.role])
+            path = build_path(route, call.kwargs)
+            if call.method != "GET" and call.query:
+                path += "?" + urlencode(call.query)
+            request = getattr(self.client, call.method.lower())
+            if trace:
+                tracemalloc.start()
+            began = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                if call.method == "GET":
+                    response = request(path, call.query)
+                else:
+                    response = request(path, call.data, format="json")
+                if response.streaming:
+                    size = sum(len(chunk) for chunk in response.streaming_content)
+                else:
+                    size = len(response.content)
+            elapsed = time.perf_counter() - began
+            if trace:
+                _, peak = tracemalloc.get_traced_memory()
+                tracemalloc.stop()
+            transaction.set_rollback(True)
+        count = sum(
+            not SAVEPOINT_SQL.match(query["sql"]) for query in queries.captured_queries
+        )
+        return call, response, size, elapsed, count, peak
+
+    def run(self, route, scenario, fixtures, report):
+        options = self.options
+        for _ in range(options["warmup"]):
+            self.attempt(route, scenario, fixtures)
+        timings = []
+        for _ in range(options["repeat"]):
+            call, response, size, elapsed, queries, _ = self.attempt(
+                route, scenario, fixtures
+            )
+            timings.append(elapsed * 1000)
+        name = label(route, call)
+        # A separate run, as tracemalloc slows Python code down a lot
+        *_, peak = self.attempt(route, scenario, fixtures, trace=True)
+
+        result = {
+            "route": route,
+            "method": call.method,
+            "role": call.role,
+            "status": response.status_code,
+            "p50_ms": round(statistics.median(timings), 3),
+            "p95_ms": round(percentile(timings, 95), 3),
+            "mean_ms": round(statistics.fmean(timings), 3),
+            "min_ms": round(min(timings), 3),
+            "max_ms": round(max(timings), 3),
+            "queries": queries,
+            "peak_kib": round(peak / 1024, 1),
+            "response_bytes": size,
+        }
+        report["endpoints"][name] = result
+        line = (
+            f"{name:<60} {response.status_code}  p50 {result['p50_ms']:8.2f} ms  "
+            f"p95 {result['p95_ms']:8.2f} ms  {queries:3} queries  "
+            f"peak {result['peak_kib']:9.1f} KiB"
+        )
+        if response.status_code >= 400:
+            line = self.style.ERROR(line)
+        self.stdout.write(line)
+
+    def compare(self, path, report):
+        with open(path) as fh:
+            before = json.load(fh)["endpoints"]
+        self.stdout.write(f"\nChange against {path}:")
+        for name, now in report["endpoints"].items():
+            old = before.get(name)
+            if old is None:
+                self.stdout.write(f"{name:<60} new")
+                continue
+            change = (now["p50_ms"] - old["p50_ms"]) / max(old["p50_ms"], 1e-6)
+            line = (
+                f"{name:<60} p50 {old['p50_ms']:8.2f} -> {now['p50_ms']:8.2f} ms "
+                f"({change:+6.0%})  queries {old['queries']:3} -> "
+                f"{now['queries']:3}  peak {old['peak_kib']:9.1f} -> "
+                f"{now['peak_kib']:9.1f} KiB"
+            )
+            if change > 0.1 or now["queries"] > old["queries"]:
+                line = self.style.WARNING(line)
+            self.stdout.write(line)
+        if not self.options["only"]:
+            for name in sorted(before.keys() - report["endpoints"].keys()):
+                self.stdout.write(f"{name:<60} missing")
+
+
+class _Rollback(Exception):
+    pass
@@ -0,0 +1,187 @@
+import time
+import tracemalloc
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.db.models import Count, F, Sum
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api import rollups
+from api.management.synthetic import explicit_created_at
+from api.models import ArtisanOrder, Order, OrderItem, Product, User
+from api.views import artisan_dashboard_analytics
+
+ITEMS_PER_ORDER = 4
+SPAN = timedelta(days=3 * 365)
+
+
+def legacy_analytics(artisan):
+    # The Python-side version this endpoint used to run, for comparison.
+    orders = OrderItem.objects.filter(product__artisan=artisan).select_related(
+        "product", "order"
+    )
+    monthly_earnings = defaultdict(float)
+    for item in orders:
+        monthly_earnings[item.order.created_at.strftime("%b")] += (
+            float(item.price) * item.quantity
+        )
+    return {
+        "total_sales": sum(float(item.price) * item.quantity for item in orders),
+        "total_orders": orders.values("order_id").distinct().count(),
+        "avg_order_value": sum(float(item.price) * item.quantity for item in orders)
+        / max(orders.values("order_id").distinct().count(), 1),
+        "monthly_earnings": dict(monthly_earnings),
+        "top_selling_products": list(
+            orders.values(title=F("product__title"))
+            .annotate(total_quantity=Sum("quantity"))
+            .order_by("-total_quantity")[:5]
+        ),
+        "category_distribution": dict(
+            Product.objects.filter(artisan=artisan)
+            .values_list("category")
+            .annotate(count=Count("id"))
+        ),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Time artisan_dashboard_analytics and measure its peak Python memory "
+        "as the artisan's order items grow (default up to 1M). All data is "
+        "rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000]
+        )
+        parser.add_argument("--products", type=int, default=50)
+        parser.add_argument(
+            "--legacy-max",
+            type=int,
+            default=100_000,
+            help="Also run the old Python-side version up to this many items.",
+        )
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def run(self, options):
+        artisan = User.objects.create(
+            username="bench_analytics_artisan",
+            email="bench_analytics_artisan@example.com",
+            is_artisan=True,
+        )
+        buyer = User.objects.create(
+            username="bench_analytics_buyer",
+            email="bench_analytics_buyer@example.com",
+            is_buyer=True,
+        )
+        categories = [choice for choice, _ in Product.CATEGORY_CHOICES]
+        products = Product.objects.bulk_create(
+            Product(
+                artisan=artisan,
+                title=f"Bench product {i}",
+                description="Benchmark product",
+                category=categories[i % len(categories)],
+                price=100 + i,
+                stock=1_000,
+            )
+            for i in range(options["products"])
+        )
+        self.factory = APIRequestFactory()
+        self.start = timezone.now() - SPAN
+
+        seeded = 0
+        for size in sorted(options["sizes"]):
+            self.stdout.write(f"Seeding up to {size:,} order items...")
+            seeded = self.seed(buyer, products, seeded, size)
+            # Seeding writes the orders directly; roll them up in one go.
+            rollups.rebuild()
+            line = self.measure(artisan, seeded)
+            if seeded <= options["legacy_max"]:
+                line += "   | old: " + self.measure_legacy(artisan)
+            self.stdout.write(line)
+
+    def seed(self, buyer, products, start, end, chunk=10_000):
+        order_count = end // ITEMS_PER_ORDER
+        for first in range(start // ITEMS_PER_ORDER, order_count, chunk):
+            numbers = range(first, min(first + chunk, order_count))
+            stamps = [self.start + SPAN * n / order_count for n in numbers]
+            with explicit_created_at(Order):
+                orders = Order.objects.bulk_create(
+                    [
+                        Order(buyer=buyer, created_at=stamp, updated_at=stamp)
+                        for stamp in stamps
+                    ],
+                    batch_size=2_000,
+                )
+            items, sub_orders = [], []
+            for number, order in zip(numbers, orders):
+                chosen = [
+                    products[(number * 7 + k) % len(products)]
+                    for k in range(ITEMS_PER_ORDER)
+                ]
+                items += [
+                    OrderItem(
+                        order=order,
+                        product=product,
+                        quantity=1,
+                        price=product.price,
+                        category=product.category,
+                    )
+                    for product in chosen
+                ]
+                sub_orders.append(
+                    ArtisanOrder(
+                        order=order,
+                        artisan_id=chosen[0].artisan_id,
+                        item_count=ITEMS_PER_ORDER,
+                        subtotal=sum(product.price for product in chosen),
+                        created_at=order.created_at,
+                    )
+                )
+            OrderItem.objects.bulk_create(items, batch_size=2_000)
+            ArtisanOrder.objects.bulk_create(sub_orders, batch_size=2_000)
+        return order_count * ITEMS_PER_ORDER
+
+    def measure(self, artisan, size):
+        request = self.factory.get("/api/artisan/dashboard/analytics/")
+        force_authenticate(request, user=artisan)
+        # Timed without tracemalloc, which slows Python code down a lot.
+        began = time.perf_counter()
+        with CaptureQueriesContext(connection) as queries:
+            response = artisan_dashboard_analytics(request)
+        elapsed = time.perf_counter() - began
+        tracemalloc.start()
+        artisan_dashboard_analytics(request)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return (
+            f"{size:>10,} items: HTTP {response.status_code}, "
+            f"{elapsed * 1000:8.0f} ms, {len(queries.captured_queries)} queries, "
+            f"peak {peak / 1024:8.0f} KiB"
+        )
+
+    def measure_legacy(self, artisan):
+        began = time.perf_counter()
+        legacy_analytics(artisan)
+        elapsed = time.perf_counter() - began
+        tracemalloc.start()
+        legacy_analytics(artisan)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return f"{elapsed * 1000:8.0f} ms, peak {peak / 1024:8.0f} KiB"
+
+
+class _Rollback(Exception):
+    pass
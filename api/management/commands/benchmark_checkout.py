@@ -0,0 +1,74 @@
+from django.core.cache import cache
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIRequestFactory, force_authenticate
+
+from api.models import CartItem, Order, Product, User
+from api.views import checkout_confirm
+
+
+class Command(BaseCommand):
+    help = (
+        "Count the queries checkout_confirm runs for carts of increasing "
+        "size. All data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", type=int, nargs="+", default=[1, 10, 50])
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.run(options["sizes"])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def run(self, sizes):
+        artisan = User.objects.create(
+            username="bench_checkout_artisan",
+            email="bench_checkout_artisan@example.com",
+            is_artisan=True,
+        )
+        products = Product.objects.bulk_create(
+            Product(
+                artisan=artisan,
+                title=f"Bench product {i}",
+                description="Benchmark product",
+                category="Pottery",
+                price=100 + i,
+                stock=1_000,
+            )
+            for i in range(max(sizes))
+        )
+        factory = APIRequestFactory()
+
+        for size in sizes:
+            buyer = User.objects.create(
+                username=f"bench_checkout_buyer_{size}",
+                email=f"bench_checkout_buyer_{size}@example.com",
+                is_buyer=True,
+            )
+            CartItem.objects.bulk_create(
+                CartItem(buyer=buyer, product=product, quantity=1)
+                for product in products[:size]
+            )
+            cache.set(f"cart_checkout_otp_{buyer.id}", 123456, timeout=60)
+
+            request = factory.post(
+                "/api/buyer/cart/checkout-confirm/", {"otp": "123456"}, format="json"
+            )
+            force_authenticate(request, user=buyer)
+            with CaptureQueriesContext(connection) as queries:
+                response = checkout_confirm(request)
+
+            items = Order.objects.filter(buyer=buyer).values("items").count()
+            self.stdout.write(
+                f"{size:4} cart items: HTTP {response.status_code}, "
+                f"{len(queries.captured_queries)} queries, {items} order items"
+            )
+
+
+class _Rollback(Exception):
+    pass
@@ -0,0 +1,103 @@
+import random
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Q
+
+from api import search
+from api.models import Product, User
+
+WORDS = (
+    "handmade clay vase bowl teak carved walnut silk cotton scarf silver ring "
+    "brass pendant leather wallet belt marble statue terracotta lamp indigo "
+    "block print woven basket bamboo mirror beaded earring glazed mug"
+).split()
+
+SYLLABLES = "ka lo mi ra ten su vo ri da pe ne ul".split()
+
+TERMS = ["vase", "silk scarf", "carved walnut", "terracotta lamp", "zzzz"]
+
+
+def vocabulary(rng, size=5_000):
+    # Real craft words plus filler, so search terms are selective the way
+    # they are in a real catalog.
+    filler = {"".join(rng.choices(SYLLABLES, k=3)) for _ in range(size)}
+    return WORDS, sorted(filler)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare full-text product search against the old SearchFilter "
+        "icontains scan on a synthetic catalog. All data is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--products", type=int, default=100_000)
+        parser.add_argument("--runs", type=int, default=20)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self.seed(options["products"])
+                self.run(options["runs"])
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def seed(self, count):
+        rng = random.Random(42)
+        words, filler = vocabulary(rng)
+        artisan = User.objects.create(
+            username="bench_search_artisan",
+            email="bench_search@example.com",
+            is_artisan=True,
+        )
+        categories = [choice for choice, _ in Product.CATEGORY_CHOICES]
+        batch = []
+        for i in range(count):
+            batch.append(
+                Product(
+                    artisan=artisan,
+                    title=" ".join(rng.choices(words, k=1) + rng.choices(filler, k=2)),
+                    description=" ".join(
+                        rng.choices(words, k=2) + rng.choices(filler, k=38)
+                    ),
+                    category=rng.choice(categories),
+                    price=rng.randint(100, 10_000),
+                )
+            )
+            if len(batch) == 5_000:
+                Product.objects.bulk_create(batch)
+                batch = []
+        Product.objects.bulk_create(batch)
+        search.rebuild_index()
+        self.stdout.write(f"Seeded {count} products.")
+
+    def run(self, runs):
+        base = Product.objects.all()
+        for term in TERMS:
+            legacy = base.filter(
+                Q(title__icontains=term)
+                | Q(description__icontains=term)
+                | Q(category__icontains=term)
+            ).order_by("-created_at")
+            indexed = search.search_products(base, term).order_by("-search_rank")
+            self.stdout.write(
+                f"{term!r:20} icontains {self.time(legacy, runs):8.2f} ms   "
+                f"full-text {self.time(indexed, runs):8.2f} ms"
+            )
+
+    def time(self, queryset, runs):
+        samples = []
+        for _ in range(runs):
+            started = time.perf_counter()
+            queryset.count()
+            list(queryset[:10])
+            samples.append((time.perf_counter() - started) * 1000)
+        return statistics.median(samples)
+
+
+class _Rollback(Exception):
+    pass
@@ -0,0 +1,151 @@
+import re
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.urls import resolve
+from rest_framework.test import APIRequestFactory
+
+from api import leaderboards
+from api.models import User
+
+# SQLite: the first top-level SCAN/SEARCH line of EXPLAIN QUERY PLAN is
+# the driving table. It must seek (SEARCH) or walk an index (SCAN .. USING
+# INDEX); a bare SCAN reads the whole table. "USE TEMP B-TREE FOR ORDER BY"
+# means every row is sorted because no index gives the order; "FOR RIGHT
+# PART OF ORDER BY" only sorts ties of the index order, which is fine.
+SQLITE_LINE = re.compile(r"^\d+ (?P<parent>\d+) \d+ (?P<detail>.*)$")
+SQLITE_FULL_SORT = "USE TEMP B-TREE FOR ORDER BY"
+
+# PostgreSQL (seq scans disabled): a Sort above a Seq Scan means there is
+# no index to find or order the rows.
+PG_NODE = re.compile(r"^(?P<indent> *(?:->  )?)(?P<node>.+?)  \(cost=")
+
+
+def sqlite_problems(plan, allow_sort=False):
+    lines = [m.groupdict() for m in map(SQLITE_LINE.match, plan.splitlines()) if m]
+    problems = []
+    driving = next(
+        (
+            line["detail"]
+            for line in lines
+            if line["parent"] == "0"
+            and line["detail"].startswith(("SCAN ", "SEARCH ", "MULTI-INDEX OR"))
+        ),
+        None,
+    )
+    if driving is None:
+        problems.append("no driving table in the plan")
+    elif driving.startswith("SCAN ") and " USING " not in driving:
+        problems.append(f"full table scan: {driving}")
+    if not allow_sort and any(line["detail"] == SQLITE_FULL_SORT for line in lines):
+        problems.append("sorts every row: " + SQLITE_FULL_SORT)
+    return problems
+
+
+def postgresql_problems(plan, allow_sort=False):
+    nodes = [
+        (len(m["indent"]), m["node"])
+        for m in map(PG_NODE.match, plan.splitlines())
+        if m
+    ]
+    problems = []
+    if not any("Index" in node for _, node in nodes):
+        problems.append("no index scan in the plan")
+    for i, (depth, node) in enumerate(nodes):
+        if node != "Sort" or allow_sort:
+            continue
+        for child_depth, child in nodes[i + 1 :]:
+            if child_depth <= depth:
+                break
+            if child.startswith("Seq Scan"):
+                problems.append(f"Sort above {child}")
+    return problems
+
+
+PLAN_CHECKS = {"postgresql": postgresql_problems, "sqlite": sqlite_problems}
+
+LIST_ENDPOINTS = [
+    "/api/products/",
+    "/api/products/?category=Pottery",
+    "/api/products/?ordering=price",
+    "/api/products/?ordering=best_selling",
+    "/api/products/?ordering=best_selling&category=Pottery",
+    "/api/artisan/products/",
+    "/api/artisan/orders/",
+    "/api/buyer/orders/",
+    "/api/buyer/wishlist/",
+    "/api/buyer/cart/",
+    "/api/admin/orders/",
+    "/api/admin/orders/?status=pending",
+    "/api/admin/users/",
+    "/api/admin/users/?role=artisan",
+    "/api/admin/users/?search=ab",
+    "/api/admin/products/",
+    "/api/admin/products/?category=Pottery",
+]
+
+# Prefix searches sort just the rows the prefix indexes found.
+SORTED_MATCHES = {"/api/admin/users/?search=ab"}
+
+
+def view_queryset(url, user):
+    """The filtered queryset the list view behind ``url`` would page through."""
+    request = APIRequestFactory().get(url)
+    match = resolve(urlsplit(url).path)
+    view = match.func.view_class(**match.func.view_initkwargs)
+    view.setup(request, *match.args, **match.kwargs)
+    view.request = view.initialize_request(request)
+    view.request.user = user
+    view.format_kwarg = None
+    queryset = view.filter_queryset(view.get_queryset())
+    if isinstance(queryset, leaderboards.RankedProducts):
+        # Best-seller pages walk the board entries
+        return queryset.board
+    return queryset
+
+
+def list_queries():
+    # Taken from the views themselves, so the check follows their code. A
+    # placeholder user with every role: the plan shape does not depend on
+    # who is asking.
+    user = User(pk=1, is_buyer=True, is_artisan=True, is_admin=True)
+    return {url: view_queryset(url, user) for url in LIST_ENDPOINTS}
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN the main query of each list endpoint and fail if any of "
+        "them scans its table or sorts every row instead of using an index."
+    )
+
+    def handle(self, *args, **options):
+        check = PLAN_CHECKS.get(connection.vendor)
+        if check is None:
+            raise CommandError(f"No plan check for the {connection.vendor} backend.")
+
+        failures = []
+        for name, queryset in list_queries().items():
+            plan = self.explain(queryset[:10])
+            problems = check(plan, allow_sort=name in SORTED_MATCHES)
+            if not problems:
+                self.stdout.write(f"ok    {name}")
+            else:
+                failures.append(name)
+                self.stdout.write(
+                    self.style.ERROR(f"FAIL  {name}: {'; '.join(problems)}\n{plan}")
+                )
+
+        if failures:
+            raise CommandError(f"No usable index for: {', '.join(failures)}")
+        self.stdout.write(self.style.SUCCESS("Every list query uses an index."))
+
+    def explain(self, queryset):
+        if connection.vendor != "postgresql":
+            return queryset.explain()
+        # On small tables the planner prefers a sequential scan regardless,
+        # so disable it to check that a usable index exists at all.
+        with transaction.atomic():
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+            return queryset.explain()
@@ -0,0 +1,121 @@
+import json
+import random
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from django.core.management.base import BaseCommand
+
+
+class Command(BaseCommand):
+    help = (
+        "Run a local stand-in for the Razorpay orders API so checkout can be "
+        "load-tested without the real gateway. Point the app at it with "
+        "RAZORPAY_BASE_URL=http://127.0.0.1:<port>."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=8765)
+        parser.add_argument(
+            "--latency-ms", type=int, default=50, help="Delay before every answer."
+        )
+        parser.add_argument(
+            "--failure-rate",
+            type=float,
+            default=0.0,
+            help="Fraction of requests answered with a 500 SERVER_ERROR.",
+        )
+        parser.add_argument(
+            "--timeout-rate",
+            type=float,
+            default=0.0,
+            help="Fraction of requests that hang for --hang-seconds.",
+        )
+        parser.add_argument("--hang-seconds", type=float, default=30)
+
+    def handle(self, *args, **options):
+        handler = self.make_handler(options)
+        server = ThreadingHTTPServer((options["host"], options["port"]), handler)
+        server.daemon_threads = True
+        self.stdout.write(
+            f"Payment gateway stub on http://{options['host']}:{options['port']}"
+        )
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+
+    @staticmethod
+    def make_handler(options):
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real API
+            disable_nagle_algorithm = True
+
+            def log_message(self, format, *args):
+                pass
+
+            def send_json(self, status, payload):
+                body = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def send_error_json(self, status, code, description):
+                self.send_json(
+                    status, {"error": {"code": code, "description": description}}
+                )
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length)
+
+                time.sleep(options["latency_ms"] / 1000)
+                roll = random.random()
+                if roll < options["timeout_rate"]:
+                    time.sleep(options["hang_seconds"])
+                elif roll < options["timeout_rate"] + options["failure_rate"]:
+                    return self.send_error_json(
+                        500, "SERVER_ERROR", "Simulated gateway failure"
+                    )
+
+                if self.path.rstrip("/") != "/v1/orders":
+                    return self.send_error_json(
+                        404, "BAD_REQUEST_ERROR", "The requested URL was not found"
+                    )
+                try:
+                    data = json.loads(raw or b"{}")
+                    amount = int(data["amount"])
+                except (ValueError, KeyError, TypeError):
+                    return self.send_error_json(
+                        400, "BAD_REQUEST_ERROR", "The amount field is required."
+                    )
+                if amount < 100:
+                    return self.send_error_json(
+                        400,
+                        "BAD_REQUEST_ERROR",
+                        "Order amount less than minimum amount allowed",
+                    )
+
+                self.send_json(
+                    200,
+                    {
+                        "id": f"order_{uuid.uuid4().hex[:14]}",
+                        "entity": "order",
+                        "amount": amount,
+                        "amount_paid": 0,
+                        "amount_due": amount,
+                        "currency": data.get("currency", "INR"),
+                        "receipt": data.get("receipt"),
+                        "status": "created",
+                        "attempts": 0,
+                        "notes": data.get("notes", []),
+                        "created_at": int(time.time()),
+                    },
+                )
+
+        return Handler
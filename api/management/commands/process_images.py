@@ -0,0 +1,33 @@
+from django.core.management.base import BaseCommand
+
+from api import images
+from api.models import Product, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate missing or stale image derivatives for product images and "
+        "profile pictures (backfill, or retry after a failed background run)."
+    )
+
+    def handle(self, *args, **options):
+        processed = 0
+        products = Product.objects.exclude(image="").exclude(image__isnull=True)
+        for pk, name, variants in products.values_list(
+            "pk", "image", "image_variants"
+        ).iterator():
+            if (variants or {}).get("source") != name:
+                images.process_product_image(pk)
+                processed += 1
+
+        users = User.objects.exclude(profile_picture="").exclude(
+            profile_picture__isnull=True
+        )
+        for pk, name, variants in users.values_list(
+            "pk", "profile_picture", "profile_picture_variants"
+        ).iterator():
+            if (variants or {}).get("source") != name:
+                images.process_profile_picture(pk)
+                processed += 1
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {processed} images."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api import idempotency
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired Idempotency-Key records now; run_task_worker also "
+        "does this once a minute."
+    )
+
+    def handle(self, *args, **options):
+        deleted = idempotency.purge_expired()
+        self.stdout.write(self.style.SUCCESS(f"Deleted {deleted} expired keys."))
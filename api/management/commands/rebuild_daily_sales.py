@@ -0,0 +1,35 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from api import rollups
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the DailySales rollup behind the dashboards from the live "
+        "and archived orders. Run it once after migrating; later runs repair "
+        "drift (e.g. --days 2 from cron)."
+    )
+
+    def add_arguments(self, parser):
+        window = parser.add_mutually_exclusive_group()
+        window.add_argument("--since", help="First day to rebuild (YYYY-MM-DD).")
+        window.add_argument(
+            "--days", type=int, help="Rebuild only the last N days, today included."
+        )
+
+    def handle(self, *args, **options):
+        since = None
+        if options["since"]:
+            since = parse_date(options["since"])
+            if since is None:
+                raise CommandError("--since must be a YYYY-MM-DD date.")
+        elif options["days"]:
+            since = timezone.localdate() - timedelta(days=options["days"] - 1)
+
+        rows = rollups.rebuild(since)
+        scope = f"since {since}" if since else "for all orders"
+        self.stdout.write(self.style.SUCCESS(f"Wrote {rows} daily sales rows {scope}."))
@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from api import leaderboards
+from api.models import BestSeller
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the best-seller leaderboards from the DailySales rollup. "
+        "Run it daily, just after midnight, so the 7 and 30 day windows "
+        "slide; approvals in between update the boards as they happen."
+    )
+
+    def handle(self, *args, **options):
+        leaderboards.rebuild()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Rebuilt the leaderboards: {BestSeller.objects.count()} entries."
+            )
+        )
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from api import search
+from api.models import Product
+
+
+class Command(BaseCommand):
+    help = "Rebuild the product full-text search index from the Product table."
+
+    def handle(self, *args, **options):
+        search.rebuild_index()
+        self.stdout.write(
+            self.style.SUCCESS(f"Indexed {Product.objects.count()} products.")
+        )
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from api import inventory
+
+
+class Command(BaseCommand):
+    help = (
+        "Hand back the stock of checkout holds that expired without being "
+        "confirmed. run_task_worker already does this every minute; use this "
+        "where no worker runs."
+    )
+
+    def handle(self, *args, **options):
+        released = inventory.release_expired()
+        self.stdout.write(self.style.SUCCESS(f"Released {released} expired holds."))
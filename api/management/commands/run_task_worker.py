@@ -0,0 +1,72 @@
+import os
+import signal
+import socket
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from api import idempotency, inventory, tasks
+
+
+class Command(BaseCommand):
+    help = (
+        "Run queued background tasks (order emails, image derivatives) and, "
+        "once a minute, hand back the stock of expired checkout holds and "
+        "delete expired Idempotency-Key records. Keep "
+        "one or more of these running next to the web workers; --once "
+        "drains the queue and exits (cron / tests)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--once", action="store_true")
+        parser.add_argument("--batch-size", type=int, default=10)
+        parser.add_argument(
+            "--idle-sleep",
+            type=float,
+            default=1.0,
+            help="Seconds to wait when the queue is empty.",
+        )
+        parser.add_argument(
+            "--keep-done-hours",
+            type=int,
+            default=24,
+            help="Delete finished tasks older than this while idle.",
+        )
+
+    def handle(self, *args, **options):
+        worker = f"{socket.gethostname()}:{os.getpid()}"
+        self.stopping = False
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+
+        done = failed = 0
+        last_housekeeping = 0.0
+        while not self.stopping:
+            close_old_connections()
+            if time.monotonic() - last_housekeeping > 60:
+                tasks.requeue_stale()
+                tasks.purge_done(timedelta(hours=options["keep_done_hours"]))
+                inventory.release_expired()
+                idempotency.purge_expired()
+                last_housekeeping = time.monotonic()
+
+            claimed = tasks.claim(worker, limit=options["batch_size"])
+            for task in claimed:
+                if tasks.run(task):
+                    done += 1
+                else:
+                    failed += 1
+            if not claimed:
+                if options["once"]:
+                    break
+                time.sleep(options["idle_sleep"])
+
+        self.stdout.write(
+            self.style.SUCCESS(f"Worker {worker}: {done} done, {failed} failed.")
+        )
+
+    def stop(self, signum, frame):
+        # Finish the current batch, then exit.
+        self.stopping = True
@@ -0,0 +1,273 @@
+import random
+import time
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+from itertools import accumulate
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from api import leaderboards, rollups, search
+from api.management.synthetic import explicit_created_at
+from api.models import ArtisanOrder, Order, OrderItem, Product, User
+
+# Every synthetic user is called synth_<n> and logs in with this password
+# (benchmark_api signs in with it).
+USERNAME_PREFIX = "synth_"
+SYNTHETIC_PASSWORD = "synthetic-pass-123"
+
+ARTISAN_SHARE = 0.05
+ADMIN_SHARE = 0.0001
+INACTIVE_USER_SHARE = 0.01
+INACTIVE_PRODUCT_SHARE = 0.05
+# Exponent of the Zipf-like popularity curves: a few products, buyers and
+# artisans account for most of the sales.
+SKEW = 1.1
+MAX_LINES_PER_ORDER = 5
+
+STATUSES = (("approved", 70), ("pending", 20), ("denied", 10))
+DELIVERY_STATUSES = (
+    ("delivered", 60),
+    ("out_for_delivery", 10),
+    ("shipped", 15),
+    ("pending", 15),
+)
+PAYMENT_METHODS = (("cod", 50), ("upi", 35), ("cc", 15))
+
+WORDS = (
+    "handmade clay vase teak bowl silk scarf silver ring leather wallet "
+    "brass lamp jute bag marble statue cotton quilt bamboo basket"
+).split()
+
+
+def zipf_weights(count, rng):
+    """Cumulative Zipf weights over ``count`` items in a shuffled rank order."""
+    ranks = list(range(1, count + 1))
+    rng.shuffle(ranks)
+    return list(accumulate(1 / rank**SKEW for rank in ranks))
+
+
+def pick(choices, rng, k):
+    values, weights = zip(*choices)
+    return rng.choices(values, weights=weights, k=k)
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed realistic volumes of synthetic users, products and orders with "
+        "bulk_create (popularity is Zipf-skewed), then rebuild the sales "
+        "rollup, leaderboards and search index. Meant for a scratch database: "
+        "e.g. --users 100000 --products 500000 --order-items 5000000."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10_000)
+        parser.add_argument("--products", type=int, default=50_000)
+        parser.add_argument("--order-items", type=int, default=500_000)
+        parser.add_argument(
+            "--days", type=int, default=365, help="Spread the data over N days."
+        )
+        parser.add_argument("--seed", type=int, default=0, help="Random seed.")
+        parser.add_argument("--batch-size", type=int, default=5_000)
+
+    def handle(self, *args, **options):
+        if options["users"] < 3 or options["products"] < 1:
+            raise CommandError("Need at least 3 users and 1 product.")
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        self.span = timedelta(days=options["days"])
+        self.start = timezone.now() - self.span
+
+        began = time.perf_counter()
+        buyers, artisans = self.seed_users(options["users"])
+        products = self.seed_products(options["products"], artisans)
+        orders, items = self.seed_orders(options["order_items"], buyers, products)
+        self.stdout.write(f"Seeded in {time.perf_counter() - began:.0f} s.")
+
+        began = time.perf_counter()
+        rollups.rebuild()
+        leaderboards.rebuild()
+        search.rebuild_index()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{options['users']:,} users, {len(products):,} "
+                f"products, {orders:,} orders, {items:,} order items; rollups "
+                f"and indexes rebuilt in {time.perf_counter() - began:.0f} s."
+            )
+        )
+
+    def stamps(self, numbers, total):
+        """Ascending creation times for rows ``numbers`` of ``total``."""
+        return [
+            self.start + self.span * (n + self.rng.random()) / total for n in numbers
+        ]
+
+    def chunks(self, total):
+        for first in range(0, total, self.batch_size):
+            yield range(first, min(first + self.batch_size, total))
+
+    def seed_users(self, count):
+        # Carry on numbering after an earlier run into the same database.
+        offset = User.objects.filter(username__startswith=USERNAME_PREFIX).count()
+        password = make_password(SYNTHETIC_PASSWORD)
+        # Every step-th user is an artisan, the first few after them admins
+        step = count // max(1, int(count * ARTISAN_SHARE))
+        admins = max(1, int(count * ADMIN_SHARE)) * step
+
+        buyers, artisans = [], []
+        for numbers in self.chunks(count):
+            users = []
+            for n, joined in zip(numbers, self.stamps(numbers, count)):
+                role = n % step
+                is_admin = role == 1 and n < admins
+                username = f"{USERNAME_PREFIX}{offset + n}"
+                users.append(
+                    User(
+                        username=username,
+                        email=f"{username}@example.com",
+                        full_name=f"Synthetic User {offset + n}",
+                        phone=f"9{offset + n:09d}"[-10:],
+                        password=password,
+                        is_buyer=role != 0 and not is_admin,
+                        is_artisan=role == 0,
+                        is_admin=is_admin,
+                        is_active=self.rng.random() > INACTIVE_USER_SHARE,
+                        date_joined=joined,
+                    )
+                )
+            with transaction.atomic():
+                created = User.objects.bulk_create(users)
+            buyers += [user.pk for user in created if user.is_buyer]
+            artisans += [user.pk for user in created if user.is_artisan]
+        self.stdout.write(f"{len(buyers):,} buyers, {len(artisans):,} artisans")
+        return buyers, artisans
+
+    def seed_products(self, count, artisans):
+        categories = [choice for choice, _ in Product.CATEGORY_CHOICES]
+        artisan_weights = zipf_weights(len(artisans), self.rng)
+
+        # (pk, artisan_id, price, category) of every product
+        products = []
+        for numbers in self.chunks(count):
+            owners = self.rng.choices(
+                artisans, cum_weights=artisan_weights, k=len(numbers)
+            )
+            rows = []
+            for n, artisan_id, created in zip(
+                numbers, owners, self.stamps(numbers, count)
+            ):
+                words = self.rng.sample(WORDS, 3)
+                rows.append(
+                    Product(
+                        artisan_id=artisan_id,
+                        title=" ".join(words).title() + f" #{n}",
+                        description=f"Synthetic {' '.join(words)}.",
+                        category=self.rng.choice(categories),
+                        price=Decimal(self.rng.randrange(10_000, 500_000)) / 100,
+                        stock=self.rng.randrange(0, 500),
+                        is_active=self.rng.random() > INACTIVE_PRODUCT_SHARE,
+                        created_at=created,
+                    )
+                )
+            with transaction.atomic(), explicit_created_at(Product):
+                created = Product.objects.bulk_create(rows)
+            products += [
+                (product.pk, product.artisan_id, product.price, product.category)
+                for product in created
+            ]
+        self.stdout.write(f"{len(products):,} products")
+        return products
+
+    def seed_orders(self, item_count, buyers, products):
+        buyer_weights = zipf_weights(len(buyers), self.rng)
+        product_weights = zipf_weights(len(products), self.rng)
+        mean_lines = (1 + MAX_LINES_PER_ORDER) / 2
+        order_total = max(1, round(item_count / mean_lines))
+        recent = timezone.now() - timedelta(days=3)
+
+        written = 0
+        for numbers in self.chunks(order_total):
+            size = len(numbers)
+            line_counts = [
+                self.rng.randint(1, MAX_LINES_PER_ORDER) for _ in range(size)
+            ]
+            chosen = iter(
+                self.rng.choices(
+                    products, cum_weights=product_weights, k=sum(line_counts)
+                )
+            )
+            order_buyers = self.rng.choices(buyers, cum_weights=buyer_weights, k=size)
+            statuses = pick(STATUSES, self.rng, size)
+            deliveries = pick(DELIVERY_STATUSES, self.rng, size)
+            payments = pick(PAYMENT_METHODS, self.rng, size)
+
+            orders, baskets = [], []
+            for index, created in enumerate(self.stamps(numbers, order_total)):
+                basket = defaultdict(int)
+                for _ in range(line_counts[index]):
+                    basket[next(chosen)] += self.rng.choice((1, 1, 1, 2, 3))
+                status = statuses[index]
+                # Only approved orders that are not brand new have moved on
+                delivery = (
+                    deliveries[index]
+                    if status == "approved" and created < recent
+                    else "pending"
+                )
+                orders.append(
+                    Order(
+                        buyer_id=order_buyers[index],
+                        shipping_address="Synthetic address",
+                        phone_number="9000000000",
+                        payment_method=payments[index],
+                        status=status,
+                        delivery_status=delivery,
+                        delivery_date=(created + timedelta(days=5)).date(),
+                        subtotal=sum(
+                            price * qty for (_, _, price, _), qty in basket.items()
+                        ),
+                        item_count=sum(basket.values()),
+                        created_at=created,
+                    )
+                )
+                baskets.append(basket)
+
+            with transaction.atomic():
+                with explicit_created_at(Order):
+                    orders = Order.objects.bulk_create(orders)
+                items, sub_orders = [], []
+                for order, basket in zip(orders, baskets):
+                    counts, subtotals = defaultdict(int), defaultdict(Decimal)
+                    for key, quantity in basket.items():
+                        product_id, artisan_id, price, category = key
+                        items.append(
+                            OrderItem(
+                                order_id=order.pk,
+                                product_id=product_id,
+                                quantity=quantity,
+                                price=price,
+                                category=category,
+                            )
+                        )
+                        counts[artisan_id] += quantity
+                        subtotals[artisan_id] += price * quantity
+                    sub_orders += [
+                        ArtisanOrder(
+                            order_id=order.pk,
+                            artisan_id=artisan_id,
+                            item_count=counts[artisan_id],
+                            subtotal=subtotals[artisan_id],
+                            created_at=order.created_at,
+                        )
+                        for artisan_id in counts
+                    ]
+                OrderItem.objects.bulk_create(items, batch_size=self.batch_size)
+                ArtisanOrder.objects.bulk_create(sub_orders, batch_size=self.batch_size)
+            written += len(items)
+            self.stdout.write(
+                f"{numbers.stop:,} orders, {written:,} items", ending="\r"
+            )
+        self.stdout.write("")
+        return order_total, written
@@ -0,0 +1,86 @@
+import threading
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, close_old_connections
+
+from api import inventory
+from api.models import Product, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Hammer one product's stock from many threads with conditional "
+        "decrements and check that it is never oversold. Uses (and then "
+        "deletes) its own artisan and product. Demand must exceed --stock; "
+        "the run fails if lock errors kept it from selling out. The same "
+        "checks run as tests in api/tests.py (PostgreSQL)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=16)
+        parser.add_argument("--attempts", type=int, default=25)
+        parser.add_argument("--stock", type=int, default=100)
+
+    def handle(self, *args, **options):
+        artisan = User.objects.create(
+            username="stress_inventory_artisan",
+            email="stress_inventory@example.com",
+            is_artisan=True,
+        )
+        try:
+            product = Product.objects.create(
+                artisan=artisan,
+                title="Stress product",
+                description="Inventory stress test",
+                category="Pottery",
+                price=1,
+                stock=options["stock"],
+            )
+            sold, locked = self.run(product.pk, options["threads"], options["attempts"])
+            product.refresh_from_db()
+        finally:
+            artisan.delete()
+
+        self.stdout.write(
+            f"{options['threads']} threads x {options['attempts']} attempts: "
+            f"sold {sold}, stock left {product.stock}, {locked} attempts failed "
+            "on lock errors"
+        )
+        if sold + product.stock != options["stock"] or product.stock < 0:
+            raise CommandError("Oversold!")
+        if product.stock:
+            raise CommandError(
+                "Stock was never exhausted, so the race was not exercised "
+                "(raise --threads/--attempts, or see the lock errors above)."
+            )
+        self.stdout.write(self.style.SUCCESS("No oversells."))
+
+    def run(self, product_id, threads, attempts):
+        sold, locked = [], []
+        lock = threading.Lock()
+        start = threading.Barrier(threads)
+
+        def buyer():
+            start.wait()
+            mine = failed = 0
+            try:
+                for _ in range(attempts):
+                    try:
+                        if inventory.decrement_stock(product_id, 1):
+                            mine += 1
+                    except OperationalError:
+                        # SQLite reports write contention as "database is
+                        # locked"; the decrement simply did not happen.
+                        failed += 1
+            finally:
+                close_old_connections()
+                with lock:
+                    sold.append(mine)
+                    locked.append(failed)
+
+        workers = [threading.Thread(target=buyer) for _ in range(threads)]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        return sum(sold), sum(locked)
@@ -0,0 +1,22 @@
+from contextlib import contextmanager
+
+# ---------------------------------------------------
+# ✅ Synthetic data helpers (seed / benchmark commands)
+# ---------------------------------------------------
+#
+# created_at is auto_now_add, so bulk_create stamps every row with the
+# current time. Back-dated synthetic rows switch that off for the length
+# of the insert. This changes the model field for the whole process, so
+# it is only for management commands, never for code serving requests.
+
+
+@contextmanager
+def explicit_created_at(model):
+    """Let bulk_create keep the created_at values set on ``model`` rows."""
+    field = model._meta.get_field("created_at")
+    previous = field.auto_now_add
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = previous
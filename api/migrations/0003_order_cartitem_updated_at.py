@@ -0,0 +1,23 @@
+# Generated by Django 5.2.11 on 2026-10-17 15:09
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0002_product_search_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cartitem",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+        migrations.AddField(
+            model_name="order",
+            name="updated_at",
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
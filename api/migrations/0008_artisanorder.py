@@ -0,0 +1,99 @@
+# Generated by Django 5.2.11 on 2026-10-17 15:22
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import DecimalField, ExpressionWrapper, F, Sum
+
+
+def backfill(apps, schema_editor):
+    OrderItem = apps.get_model("api", "OrderItem")
+    ArtisanOrder = apps.get_model("api", "ArtisanOrder")
+    rows = (
+        OrderItem.objects.values("order_id", "product__artisan_id", "order__created_at")
+        .annotate(
+            item_count=Sum("quantity"),
+            subtotal=Sum(
+                ExpressionWrapper(
+                    F("price") * F("quantity"),
+                    output_field=DecimalField(max_digits=12, decimal_places=2),
+                )
+            ),
+        )
+        .order_by()
+    )
+    batch = []
+    for row in rows.iterator(chunk_size=2000):
+        batch.append(
+            ArtisanOrder(
+                order_id=row["order_id"],
+                artisan_id=row["product__artisan_id"],
+                item_count=row["item_count"],
+                subtotal=row["subtotal"],
+                created_at=row["order__created_at"],
+            )
+        )
+        if len(batch) >= 2000:
+            ArtisanOrder.objects.bulk_create(batch)
+            batch = []
+    ArtisanOrder.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0007_idempotencykey"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArtisanOrder",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("item_count", models.PositiveIntegerField(default=0)),
+                (
+                    "subtotal",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                ("created_at", models.DateTimeField()),
+                (
+                    "artisan",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="artisan_orders",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "order",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="artisan_orders",
+                        to="api.order",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["artisan", "-created_at"],
+                        name="artisanorder_created_idx",
+                    )
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("artisan", "order"), name="unique_artisan_order"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
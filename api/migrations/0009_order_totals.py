@@ -0,0 +1,62 @@
+# Generated by Django 5.2.11 on 2026-10-17 15:24
+
+from django.db import migrations, models
+from django.db.models import (
+    DecimalField,
+    ExpressionWrapper,
+    F,
+    OuterRef,
+    PositiveIntegerField,
+    Subquery,
+    Sum,
+)
+from django.db.models.functions import Coalesce
+
+
+def backfill(apps, schema_editor):
+    # Existing orders get the totals of their items; every order has at
+    # least one item, so an item_count of 0 means "never stored". Same as
+    # ``manage.py backfill_order_totals``.
+    Order = apps.get_model("api", "Order")
+    items = (
+        apps.get_model("api", "OrderItem")
+        .objects.filter(order=OuterRef("pk"))
+        .order_by()
+        .values("order")
+    )
+    subtotal = Subquery(
+        items.annotate(
+            total=Sum(
+                ExpressionWrapper(
+                    F("price") * F("quantity"),
+                    output_field=DecimalField(max_digits=12, decimal_places=2),
+                )
+            )
+        ).values("total")
+    )
+    item_count = Subquery(items.annotate(total=Sum("quantity")).values("total"))
+    Order.objects.filter(item_count=0).update(
+        subtotal=Coalesce(subtotal, 0, output_field=DecimalField()),
+        item_count=Coalesce(item_count, 0, output_field=PositiveIntegerField()),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0008_artisanorder"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="order",
+            name="item_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="order",
+            name="subtotal",
+            field=models.DecimalField(decimal_places=2, default=0, max_digits=12),
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
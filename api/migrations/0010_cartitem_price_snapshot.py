@@ -0,0 +1,33 @@
+# Generated by Django 5.2.11 on 2026-10-17 15:25
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def snapshot_current_prices(apps, schema_editor):
+    # Nothing better is known for lines added before snapshots existed.
+    CartItem = apps.get_model("api", "CartItem")
+    Product = apps.get_model("api", "Product")
+    CartItem.objects.update(
+        price_snapshot=Subquery(
+            Product.objects.filter(pk=OuterRef("product_id")).values("price")[:1]
+        )
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0009_order_totals"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="cartitem",
+            name="price_snapshot",
+            field=models.DecimalField(
+                blank=True, decimal_places=2, max_digits=10, null=True
+            ),
+        ),
+        migrations.RunPython(snapshot_current_prices, migrations.RunPython.noop),
+    ]
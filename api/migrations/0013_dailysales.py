@@ -0,0 +1,89 @@
+# Generated by Django 5.2.11 on 2026-10-17 15:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def backfill_category(apps, schema_editor):
+    # Past items get their product's current category: the best guess for
+    # the category they were sold under.
+    Product = apps.get_model("api", "Product")
+    category = Subquery(
+        Product.objects.filter(pk=OuterRef("product_id")).values("category")[:1]
+    )
+    for name in ("OrderItem", "ArchivedOrderItem"):
+        apps.get_model("api", name).objects.update(category=category)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0012_order_archive"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="archivedorderitem",
+            name="category",
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.AddField(
+            model_name="orderitem",
+            name="category",
+            field=models.CharField(blank=True, max_length=100),
+        ),
+        migrations.RunPython(backfill_category, migrations.RunPython.noop),
+        migrations.CreateModel(
+            name="DailySales",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("date", models.DateField()),
+                ("category", models.CharField(max_length=100)),
+                ("quantity", models.PositiveIntegerField(default=0)),
+                (
+                    "revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                ("order_count", models.PositiveIntegerField(default=0)),
+                (
+                    "approved_revenue",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=14),
+                ),
+                (
+                    "artisan",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_sales",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="daily_sales",
+                        to="api.product",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [models.Index(fields=["date"], name="dailysales_date_idx")],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("artisan", "date", "product", "category"),
+                        name="unique_daily_sales",
+                    )
+                ],
+            },
+        ),
+    ]
@@ -0,0 +1,78 @@
+# Generated by Django 5.2.11 on 2026-10-17 15:50
+
+from django.db import migrations, models
+
+# Prefix search on the admin user list (?search=) uses istartswith:
+# UPPER(col) LIKE UPPER('term%') on PostgreSQL, and a case-insensitive
+# LIKE on SQLite, which can only use an index built with NOCASE.
+SEARCH_INDEXES = {
+    "postgresql": "CREATE INDEX {name} ON api_user (UPPER({column}::text) text_pattern_ops)",
+    "sqlite": "CREATE INDEX {name} ON api_user ({column} COLLATE NOCASE)",
+}
+
+
+def create_search_indexes(apps, schema_editor):
+    sql = SEARCH_INDEXES.get(schema_editor.connection.vendor)
+    if sql:
+        for column in ("username", "email"):
+            schema_editor.execute(
+                sql.format(name=f"user_{column}_prefix_idx", column=column)
+            )
+
+
+def drop_search_indexes(apps, schema_editor):
+    if schema_editor.connection.vendor in SEARCH_INDEXES:
+        for column in ("username", "email"):
+            schema_editor.execute(f"DROP INDEX IF EXISTS user_{column}_prefix_idx")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0013_dailysales"),
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="order",
+            name="order_status_idx",
+        ),
+        migrations.AddIndex(
+            model_name="order",
+            index=models.Index(
+                fields=["status", "-created_at"], name="order_status_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="product",
+            index=models.Index(
+                fields=["category", "-created_at"], name="product_category_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                condition=models.Q(("is_buyer", True)),
+                fields=["-date_joined"],
+                name="user_buyer_joined_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                condition=models.Q(("is_artisan", True)),
+                fields=["-date_joined"],
+                name="user_artisan_joined_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                condition=models.Q(("is_admin", True)),
+                fields=["-date_joined"],
+                name="user_admin_joined_idx",
+            ),
+        ),
+        migrations.RunPython(create_search_indexes, drop_search_indexes),
+    ]
@@ -0,0 +1,160 @@
+# Generated by Django 5.2.11 on 2026-10-17 15:53
+
+from collections import defaultdict
+from datetime import timedelta
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, F, Q, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def backfill(apps, schema_editor):
+    # Recompute the rollup so approved_quantity is right for past orders
+    # (denying one later subtracts from it), then build the boards.
+    DailySales = apps.get_model("api", "DailySales")
+    BestSeller = apps.get_model("api", "BestSeller")
+    amount = F("price") * F("quantity")
+    money = DecimalField(max_digits=14, decimal_places=2)
+    approved = Q(order__status="approved")
+
+    totals = defaultdict(lambda: defaultdict(int))
+    for name in ("OrderItem", "ArchivedOrderItem"):
+        rows = (
+            apps.get_model("api", name)
+            .objects.annotate(day=TruncDate("order__created_at"))
+            .values_list("day", "product__artisan_id", "product_id", "category")
+            .annotate(
+                sold=Sum("quantity"),
+                sales=Sum(amount, output_field=money),
+                orders=Count("order_id", distinct=True),
+                approved_sold=Sum("quantity", filter=approved),
+                approved_sales=Sum(amount, filter=approved, output_field=money),
+            )
+            .order_by()
+        )
+        for *key, sold, sales, orders, approved_sold, approved_sales in rows.iterator():
+            row = totals[tuple(key)]
+            row["quantity"] += sold
+            row["revenue"] += sales
+            row["order_count"] += orders
+            row["approved_quantity"] += approved_sold or 0
+            row["approved_revenue"] += approved_sales or 0
+    DailySales.objects.all().delete()
+    DailySales.objects.bulk_create(
+        (
+            DailySales(
+                date=day,
+                artisan_id=artisan_id,
+                product_id=product_id,
+                category=category,
+                **row,
+            )
+            for (day, artisan_id, product_id, category), row in totals.items()
+        ),
+        batch_size=1000,
+    )
+
+    today = timezone.localdate()
+    for window in (7, 30, 0):
+        sales = DailySales.objects.all()
+        if window:
+            sales = sales.filter(date__gt=today - timedelta(days=window))
+        BestSeller.objects.bulk_create(
+            (
+                BestSeller(
+                    window=window,
+                    product_id=product_id,
+                    artisan_id=artisan_id,
+                    category=category,
+                    units=sold,
+                )
+                for product_id, artisan_id, category, sold in sales.values_list(
+                    "product_id", "product__artisan_id", "product__category"
+                )
+                .annotate(sold=Sum("approved_quantity"))
+                .filter(sold__gt=0)
+                .order_by()
+            ),
+            batch_size=1000,
+        )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("api", "0014_admin_list_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="dailysales",
+            name="approved_quantity",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.CreateModel(
+            name="BestSeller",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "window",
+                    models.PositiveSmallIntegerField(
+                        choices=[
+                            (7, "Last 7 days"),
+                            (30, "Last 30 days"),
+                            (0, "All time"),
+                        ]
+                    ),
+                ),
+                ("category", models.CharField(max_length=100)),
+                ("units", models.PositiveIntegerField(default=0)),
+                (
+                    "artisan",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="best_sellers",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "product",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="best_sellers",
+                        to="api.product",
+                    ),
+                ),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        fields=["window", "-units"], name="bestseller_global_idx"
+                    ),
+                    models.Index(
+                        fields=["window", "category", "-units"],
+                        name="bestseller_category_idx",
+                    ),
+                    models.Index(
+                        fields=["window", "artisan", "-units"],
+                        name="bestseller_artisan_idx",
+                    ),
+                ],
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("window", "product"), name="unique_best_seller"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill, migrations.RunPython.noop),
+    ]
@@ -22,6 +22,29 @@ class User(AbstractUser):
     security_answer = models.CharField(max_length=255, blank=True, null=True)
 
     profile_picture = models.ImageField(upload_to="profiles/", blank=True, null=True)
+    profile_picture_variants = models.JSONField(default=dict, blank=True)
+
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            models.Index(fields=["-date_joined"], name="user_date_joined_idx"),
+            # Admin user list filtered by role. Username / email prefix
+            # search indexes are backend-specific (migration 0014).
+            models.Index(
+                fields=["-date_joined"],
+                condition=models.Q(is_buyer=True),
+                name="user_buyer_joined_idx",
+            ),
+            models.Index(
+                fields=["-date_joined"],
+                condition=models.Q(is_artisan=True),
+                name="user_artisan_joined_idx",
+            ),
+            models.Index(
+                fields=["-date_joined"],
+                condition=models.Q(is_admin=True),
+                name="user_admin_joined_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.username
@@ -53,10 +76,37 @@ class Product(models.Model):
     price = models.DecimalField(max_digits=10, decimal_places=2)
     stock = models.PositiveIntegerField(default=1)
     image = models.ImageField(upload_to="products/", blank=True, null=True)
+    image_variants = models.JSONField(default=dict, blank=True)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Buyer feed: active products only, so partial indexes stay small.
+            models.Index(
+                fields=["-created_at"],
+                condition=models.Q(is_active=True),
+                name="product_active_created_idx",
+            ),
+            models.Index(
+                fields=["category", "-created_at"],
+                condition=models.Q(is_active=True),
+                name="product_active_category_idx",
+            ),
+            models.Index(
+                fields=["price"],
+                condition=models.Q(is_active=True),
+                name="product_active_price_idx",
+            ),
+            # Artisan and admin lists include inactive products.
+            models.Index(fields=["artisan", "-created_at"], name="product_artisan_idx"),
+            models.Index(fields=["-created_at"], name="product_created_idx"),
+            models.Index(
+                fields=["category", "-created_at"], name="product_category_created_idx"
+            ),
+        ]
+
     def __str__(self):
         return self.title
 
@@ -97,7 +147,22 @@ class Order(models.Model):
         default="pending",
     )
     delivery_date = models.DateField(null=True, blank=True)
+    # Written once at checkout from the item price snapshots.
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    item_count = models.PositiveIntegerField(default=0)
     created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["buyer", "-created_at"], name="order_buyer_created_idx"
+            ),
+            models.Index(
+                fields=["status", "-created_at"], name="order_status_created_idx"
+            ),
+            models.Index(fields=["-created_at"], name="order_created_idx"),
+        ]
 
     def __str__(self):
         return f"Order #{self.id} by {self.buyer.username}"
@@ -114,11 +179,259 @@ class OrderItem(models.Model):
     price = models.DecimalField(
         max_digits=10, decimal_places=2
     )  # Snapshot of price at purchase time
+    # Product category at purchase time: the key of the item's DailySales row
+    category = models.CharField(max_length=100, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["product", "order"], name="orderitem_product_order_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.product.title} × {self.quantity}"
 
 
+# ---------------------------------------------------
+# ✅ Artisan Sub-Orders (order fan-out per artisan)
+# ---------------------------------------------------
+
+
+class ArtisanOrder(models.Model):
+    """
+    One row per (order, artisan) whose products are in the order, written
+    at checkout. Lets artisan listings and permission checks hit a single
+    index instead of joining orders → items → products.
+
+    Rows are the artisan's sales ledger and stay put when their order is
+    moved to the archive tables, hence no cascade and no DB constraint;
+    code that really deletes orders removes them explicitly
+    (``archive.delete_order``, and ``archive.forget_buyer`` when the
+    buyer is deleted).
+    """
+
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name="artisan_orders",
+    )
+    artisan = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="artisan_orders"
+    )
+    item_count = models.PositiveIntegerField(default=0)
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    # Copy of order.created_at, so per-artisan reports range over this index.
+    created_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["artisan", "order"], name="unique_artisan_order"
+            ),
+        ]
+        indexes = [
+            models.Index(
+                fields=["artisan", "-created_at"], name="artisanorder_created_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"Order #{self.order_id} for {self.artisan_id}"
+
+
+# ---------------------------------------------------
+# ✅ Order Archive (closed orders past the retention window)
+# ---------------------------------------------------
+
+
+class ArchivedOrder(models.Model):
+    """
+    Cold copy of an Order, moved here by ``manage.py archive_orders``. Keeps
+    the original id, so ids stay unique across both tables.
+    """
+
+    id = models.BigIntegerField(primary_key=True)
+    buyer = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="archived_orders"
+    )
+    shipping_address = models.TextField()
+    phone_number = models.CharField(max_length=15)
+    payment_method = models.CharField(max_length=20)
+    status = models.CharField(max_length=20)
+    delivery_status = models.CharField(max_length=30)
+    delivery_date = models.DateField(null=True, blank=True)
+    subtotal = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    item_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["buyer", "-created_at"], name="archorder_buyer_created_idx"
+            ),
+            models.Index(fields=["-created_at"], name="archorder_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"Archived order #{self.id}"
+
+
+class ArchivedOrderItem(models.Model):
+    id = models.BigIntegerField(primary_key=True)
+    order = models.ForeignKey(
+        ArchivedOrder, on_delete=models.CASCADE, related_name="items"
+    )
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="archived_order_items"
+    )
+    quantity = models.PositiveIntegerField()
+    price = models.DecimalField(max_digits=10, decimal_places=2)
+    category = models.CharField(max_length=100, blank=True)
+
+    def __str__(self):
+        return f"{self.product.title} × {self.quantity}"
+
+
+# ---------------------------------------------------
+# ✅ Sales Rollup (daily totals for the dashboards)
+# ---------------------------------------------------
+
+
+class DailySales(models.Model):
+    """
+    Sales of one product on one day (the order's creation date) under the
+    category it was sold in, kept up to date as orders are placed and
+    change status; ``manage.py
+    rebuild_daily_sales`` recomputes it from the live and archived orders.
+    """
+
+    date = models.DateField()
+    artisan = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="daily_sales"
+    )
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="daily_sales"
+    )
+    category = models.CharField(max_length=100)
+    # Every placed order, whatever its status
+    quantity = models.PositiveIntegerField(default=0)
+    revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    order_count = models.PositiveIntegerField(default=0)
+    # The part of ``quantity`` / ``revenue`` from approved orders
+    approved_quantity = models.PositiveIntegerField(default=0)
+    approved_revenue = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["artisan", "date", "product", "category"],
+                name="unique_daily_sales",
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["date"], name="dailysales_date_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.product_id}: {self.quantity} sold"
+
+
+# ---------------------------------------------------
+# ✅ Best-seller Leaderboards
+# ---------------------------------------------------
+
+
+class BestSeller(models.Model):
+    """
+    Approved units sold per product over a rolling window (or all time),
+    kept current as orders are approved. The global, per-category and
+    per-artisan boards are each an index range scan over this table.
+    """
+
+    ALL_TIME = 0
+    WINDOW_CHOICES = [(7, "Last 7 days"), (30, "Last 30 days"), (ALL_TIME, "All time")]
+
+    window = models.PositiveSmallIntegerField(choices=WINDOW_CHOICES)
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="best_sellers"
+    )
+    artisan = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="best_sellers"
+    )
+    category = models.CharField(max_length=100)
+    # Floored at zero on update: a denial whose approval the board never
+    # counted (say, before its first build) must not rank a product last.
+    units = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["window", "product"], name="unique_best_seller"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["window", "-units"], name="bestseller_global_idx"),
+            models.Index(
+                fields=["window", "category", "-units"],
+                name="bestseller_category_idx",
+            ),
+            models.Index(
+                fields=["window", "artisan", "-units"], name="bestseller_artisan_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.product_id}: {self.units} sold ({self.get_window_display()})"
+
+
+# ---------------------------------------------------
+# ✅ Stock Reservation (Checkout holds)
+# ---------------------------------------------------
+
+
+class StockReservation(models.Model):
+    buyer = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="stock_reservations"
+    )
+    product = models.ForeignKey(
+        Product, on_delete=models.CASCADE, related_name="reservations"
+    )
+    order = models.ForeignKey(
+        Order,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name="reservations",
+    )
+    quantity = models.PositiveIntegerField()
+    status = models.CharField(
+        max_length=20,
+        choices=[
+            ("held", "Held"),
+            ("committed", "Committed"),
+            ("released", "Released"),
+        ],
+        default="held",
+    )
+    expires_at = models.DateTimeField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["status", "expires_at"], name="reservation_expiry_idx"
+            ),
+            models.Index(fields=["buyer", "status"], name="reservation_buyer_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.buyer.username} holds {self.product.title} x {self.quantity}"
+
+
 # ---------------------------------------------------
 # ✅ Wishlist Model (Buyer)
 # ---------------------------------------------------
@@ -133,6 +446,11 @@ class Wishlist(models.Model):
 
     class Meta:
         unique_together = ("buyer", "product")
+        indexes = [
+            models.Index(
+                fields=["buyer", "-added_at"], name="wishlist_buyer_added_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.buyer.username} ♥ {self.product.title}"
@@ -147,10 +465,20 @@ class CartItem(models.Model):
     buyer = models.ForeignKey(User, on_delete=models.CASCADE, related_name="cart_items")
     product = models.ForeignKey(Product, on_delete=models.CASCADE)
     quantity = models.PositiveIntegerField(default=1)
+    # Product price when the line was last added/changed, to detect drift
+    price_snapshot = models.DecimalField(
+        max_digits=10, decimal_places=2, null=True, blank=True
+    )
     added_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     class Meta:
         unique_together = ("buyer", "product")
+        indexes = [
+            models.Index(
+                fields=["buyer", "-added_at"], name="cartitem_buyer_added_idx"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.buyer.username} → {self.product.title} x {self.quantity}"
@@ -168,3 +496,76 @@ class Address(models.Model):
 
     def __str__(self):
         return f"{self.buyer.username} - {self.label}"
+
+
+# ---------------------------------------------------
+# ✅ Idempotency Keys (order / payment endpoints)
+# ---------------------------------------------------
+
+
+class IdempotencyKey(models.Model):
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE, related_name="idempotency_keys"
+    )
+    # 16-byte BLAKE2b digests of the client key and of the request, rather
+    # than the raw (arbitrary length) values.
+    key_digest = models.BinaryField(max_length=16)
+    request_digest = models.BinaryField(max_length=16)
+    state = models.CharField(
+        max_length=20,
+        choices=[("processing", "Processing"), ("completed", "Completed")],
+        default="processing",
+    )
+    status_code = models.PositiveSmallIntegerField(null=True, blank=True)
+    response_body = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    expires_at = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "key_digest"], name="unique_idempotency_key"
+            ),
+        ]
+        indexes = [
+            models.Index(fields=["expires_at"], name="idempotency_expiry_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.user.username} {self.key_digest.hex()} ({self.state})"
+
+
+# ---------------------------------------------------
+# ✅ Background Tasks (DB-backed queue)
+# ---------------------------------------------------
+
+
+class Task(models.Model):
+    name = models.CharField(max_length=100)
+    payload = models.JSONField(default=dict, blank=True)
+    status = models.CharField(
+        max_length=20,
+        choices=[
+            ("queued", "Queued"),
+            ("running", "Running"),
+            ("done", "Done"),
+            ("failed", "Failed"),
+        ],
+        default="queued",
+    )
+    attempts = models.PositiveSmallIntegerField(default=0)
+    max_attempts = models.PositiveSmallIntegerField(default=5)
+    run_at = models.DateTimeField(default=timezone.now)
+    locked_at = models.DateTimeField(null=True, blank=True)
+    locked_by = models.CharField(max_length=100, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "run_at"], name="task_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} #{self.pk} ({self.status})"
@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.core.mail import send_mail
+
+from . import tasks
+from .models import ArtisanOrder, Order
+
+# ---------------------------------------------------
+# ✅ Order Notifications (run by the task worker)
+# ---------------------------------------------------
+#
+# Order events only enqueue tasks; the mail itself goes out from
+# ``manage.py run_task_worker``, never from a request. Each email is its
+# own task, so a retry never re-sends mail that already went out.
+
+
+def _name(user):
+    return user.full_name or user.username
+
+
+@tasks.register("email.send")
+def send_email(to, subject, body):
+    send_mail(subject, body, settings.DEFAULT_FROM_EMAIL, [to], fail_silently=False)
+
+
+@tasks.register("order.placed")
+def order_placed(order_id):
+    order = Order.objects.select_related("buyer").filter(pk=order_id).first()
+    if order is None:
+        return
+    emails = [
+        {
+            "to": order.buyer.email,
+            "subject": f"Your Craftique order #{order.pk} is placed",
+            "body": (
+                f"Hi {_name(order.buyer)},\n\n"
+                f"We received your order #{order.pk}: {order.item_count} item(s), "
+                f"₹{order.subtotal}. Estimated delivery: {order.delivery_date}.\n"
+            ),
+        }
+    ]
+    for sub_order in ArtisanOrder.objects.filter(order=order).select_related("artisan"):
+        emails.append(
+            {
+                "to": sub_order.artisan.email,
+                "subject": f"New order #{order.pk}",
+                "body": (
+                    f"Hi {_name(sub_order.artisan)},\n\n"
+                    f"Order #{order.pk} includes {sub_order.item_count} of your "
+                    f"item(s) worth ₹{sub_order.subtotal}. Please review it.\n"
+                ),
+            }
+        )
+    tasks.enqueue_many("email.send", [email for email in emails if email["to"]])
+
+
+@tasks.register("order.status_changed")
+def order_status_changed(order_id, status):
+    order = Order.objects.select_related("buyer").filter(pk=order_id).first()
+    if order is None or not order.buyer.email:
+        return
+    send_email(
+        order.buyer.email,
+        f"Your Craftique order #{order.pk} was {status}",
+        f"Hi {_name(order.buyer)},\n\nYour order #{order.pk} was {status}.\n",
+    )
+
+
+@tasks.register("order.delivery_changed")
+def delivery_status_changed(order_id, delivery_status):
+    order = Order.objects.select_related("buyer").filter(pk=order_id).first()
+    if order is None or not order.buyer.email:
+        return
+    label = dict(Order._meta.get_field("delivery_status").choices)[delivery_status]
+    send_email(
+        order.buyer.email,
+        f"Craftique order #{order.pk}: {label}",
+        f"Hi {_name(order.buyer)},\n\nYour order #{order.pk} is now: {label}.\n",
+    )
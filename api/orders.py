@@ -0,0 +1,51 @@
+from collections import defaultdict
+from decimal import Decimal
+
+from .models import ArtisanOrder
+
+# ---------------------------------------------------
+# ✅ Order Fan-out (per-artisan sub-orders)
+# ---------------------------------------------------
+#
+# Every order is split into one ArtisanOrder row per artisan whose products
+# it contains, written in the same transaction as the order items. Artisan
+# views then look orders up by (artisan, order) instead of joining through
+# items and products.
+
+
+def totals(lines):
+    """``(subtotal, item_count)`` for an iterable of ``(price, quantity)``."""
+    subtotal, item_count = Decimal(0), 0
+    for price, quantity in lines:
+        subtotal += price * quantity
+        item_count += quantity
+    return subtotal, item_count
+
+
+def fan_out(order, items):
+    """
+    Write the ArtisanOrder rows for ``order`` from its OrderItems (whose
+    ``product`` must already be loaded). One INSERT for any number of items.
+    """
+    counts = defaultdict(int)
+    subtotals = defaultdict(Decimal)
+    for item in items:
+        artisan_id = item.product.artisan_id
+        counts[artisan_id] += item.quantity
+        subtotals[artisan_id] += item.price * item.quantity
+
+    return ArtisanOrder.objects.bulk_create(
+        ArtisanOrder(
+            order=order,
+            artisan_id=artisan_id,
+            item_count=counts[artisan_id],
+            subtotal=subtotals[artisan_id],
+            created_at=order.created_at,
+        )
+        for artisan_id in counts
+    )
+
+
+def is_artisan_of(artisan, order_id):
+    """Whether any of the products in the order belong to ``artisan``."""
+    return ArtisanOrder.objects.filter(artisan=artisan, order_id=order_id).exists()
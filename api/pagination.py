@@ -0,0 +1,233 @@
+import base64
+import hashlib
+import json
+
+from django.core.cache import cache
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+# ---------------------------------------------------
+# ✅ Keyset (Cursor) Pagination
+# ---------------------------------------------------
+
+
+class ColdQuerySet:
+    """
+    The archive half of a listing split over hot and archive tables. All
+    of its rows sort before ``before`` on ``field``, so KeysetPagination
+    only queries it once a (descending) page reaches back that far.
+    """
+
+    def __init__(self, queryset, field, before):
+        self.queryset = queryset
+        self.field = field
+        self.before = before
+
+
+class KeysetPagination(BasePagination):
+    """
+    Seeks on (ordering field, id) instead of OFFSET, so page N costs the
+    same as page 1. The total count is only computed on request
+    (?include_count=true) and is cached for a short while.
+
+    ``paginate_queryset`` also accepts a list of querysets (or
+    ColdQuerySets) over models that share the ordering field and id space,
+    and merges their pages.
+    """
+
+    page_size = 10
+    page_size_query_param = "page_size"
+    max_page_size = 50
+    cursor_query_param = "cursor"
+    ordering_query_param = "ordering"
+    count_query_param = "include_count"
+    default_ordering = "-created_at"
+    count_cache_timeout = 60
+    invalid_cursor_message = "Invalid cursor"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        self.field, self.descending = self.get_ordering(request, view)
+        parts = queryset if isinstance(queryset, (list, tuple)) else [queryset]
+        plain = [getattr(part, "queryset", part) for part in parts]
+        self.model = plain[0].model
+
+        self.count = None
+        if request.query_params.get(self.count_query_param) in ("1", "true"):
+            self.count = sum(self.get_count(part) for part in plain)
+
+        cursor = self.decode_cursor(request)
+        if cursor is None:
+            value, pk, forward = None, None, True
+        else:
+            value, pk, forward = cursor
+
+        # Going backwards walks the index in the opposite direction and
+        # flips the rows back afterwards.
+        descending = self.descending if forward else not self.descending
+        prefix = "-" if descending else ""
+        rows = []
+        for part in parts:
+            if isinstance(part, ColdQuerySet):
+                if self.filled_before(rows, part, descending):
+                    continue
+                part = part.queryset
+            if cursor is not None:
+                part = part.filter(self.seek_filter(value, pk, descending))
+            part = part.order_by(prefix + self.field, prefix + "id")
+            rows.extend(part[: self.page_size + 1])
+            if len(parts) > 1:
+                rows.sort(
+                    key=lambda obj: (getattr(obj, self.field), obj.pk),
+                    reverse=descending,
+                )
+                del rows[self.page_size + 1 :]
+        has_more = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+
+        if forward:
+            self.has_next = has_more
+            self.has_previous = cursor is not None
+        else:
+            rows.reverse()
+            self.has_next = True
+            self.has_previous = has_more
+
+        self.page = rows
+        return rows
+
+    def get_paginated_response(self, data):
+        payload = {
+            "next": self.get_next_link(),
+            "previous": self.get_previous_link(),
+            "results": data,
+        }
+        if self.count is not None:
+            payload = {"count": self.count, **payload}
+        return Response(payload)
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "required": ["results"],
+            "properties": {
+                "count": {"type": "integer", "nullable": True},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_ordering(self, request, view):
+        default = getattr(view, "cursor_ordering", self.default_ordering)
+        allowed = getattr(view, "ordering_fields", None) or [default.lstrip("-")]
+        ordering = request.query_params.get(self.ordering_query_param, "")
+        ordering = ordering.split(",")[0].strip()
+        if ordering.lstrip("-") in allowed:
+            return ordering.lstrip("-"), ordering.startswith("-")
+        return default.lstrip("-"), default.startswith("-")
+
+    def filled_before(self, rows, cold, descending):
+        # The page (plus the look-ahead row) is already full of rows newer
+        # than anything the cold queryset holds.
+        return (
+            descending
+            and cold.field == self.field
+            and len(rows) > self.page_size
+            and getattr(rows[self.page_size], self.field) >= cold.before
+        )
+
+    def get_count(self, queryset):
+        sql = str(queryset.order_by().query)
+        key = "keyset_count_" + hashlib.md5(sql.encode()).hexdigest()
+        count = cache.get(key)
+        if count is None:
+            count = queryset.order_by().count()
+            cache.set(key, count, timeout=self.count_cache_timeout)
+        return count
+
+    def seek_filter(self, value, pk, descending):
+        op = "lt" if descending else "gt"
+        return Q(**{f"{self.field}__{op}": value}) | Q(
+            **{self.field: value, f"id__{op}": pk}
+        )
+
+    # ---- cursor encoding ----
+
+    def encode_cursor(self, obj, forward):
+        value = getattr(obj, self.field)
+        value = value.isoformat() if hasattr(value, "isoformat") else str(value)
+        raw = json.dumps(
+            {"o": self.field, "v": value, "id": obj.pk, "f": int(forward)},
+            separators=(",", ":"),
+        )
+        token = base64.urlsafe_b64encode(raw.encode()).decode()
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, token)
+
+    def decode_cursor(self, request):
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(token.encode()).decode())
+            if data["o"] != self.field:
+                raise ValueError
+            value = self.model._meta.get_field(self.field).to_python(data["v"])
+            return value, int(data["id"]), bool(data["f"])
+        except Exception:
+            raise NotFound(self.invalid_cursor_message)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], forward=True)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            url = self.request.build_absolute_uri()
+            return remove_query_param(url, self.cursor_query_param)
+        return self.encode_cursor(self.page[0], forward=False)
+
+
+class OptInCursorPagination(BasePagination):
+    """
+    Uses KeysetPagination when the client asks for it (?pagination=cursor
+    or a cursor param); otherwise falls back to ``fallback_class``, or to
+    no pagination at all when that is None.
+    """
+
+    fallback_class = None
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        params = request.query_params
+        if params.get("pagination") == "cursor" or "cursor" in params:
+            self.delegate = self.keyset_class()
+        elif self.fallback_class is not None:
+            self.delegate = self.fallback_class()
+        else:
+            self.delegate = None
+            return None
+        return self.delegate.paginate_queryset(queryset, request, view=view)
+
+    def get_paginated_response(self, data):
+        return self.delegate.get_paginated_response(data)
+
+    def get_paginated_response_schema(self, schema):
+        if self.fallback_class is not None:
+            return self.fallback_class().get_paginated_response_schema(schema)
+        return schema
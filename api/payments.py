@@ -0,0 +1,175 @@
+import random
+import threading
+import time
+
+import razorpay
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+
+# ---------------------------------------------------
+# ✅ Payment Gateway Client (Razorpay)
+# ---------------------------------------------------
+#
+# One client per process, on a pooled keep-alive session, so requests
+# reuse TLS connections instead of handshaking every time. Every call has
+# hard connect/read timeouts, connection failures are retried with
+# jittered exponential backoff, and a circuit breaker fails fast while the
+# gateway is down instead of tying up workers.
+
+
+class GatewayUnavailable(Exception):
+    """The gateway is failing and the circuit breaker is open."""
+
+
+class GatewayTimeout(Exception):
+    """The gateway accepted the connection but did not answer in time."""
+
+
+def _setting(name, default):
+    return getattr(settings, name, default)
+
+
+class _TimeoutSession(requests.Session):
+    def __init__(self, timeout, pool_size):
+        super().__init__()
+        self.timeout = timeout
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.mount("https://", adapter)
+        self.mount("http://", adapter)
+
+    def request(self, *args, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(*args, **kwargs)
+
+
+class CircuitBreaker:
+    """
+    Opens after ``threshold`` consecutive failures; while open, calls fail
+    immediately. After ``cooldown`` seconds one trial call is let through
+    (half-open): success closes the breaker, failure re-opens it.
+    """
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self):
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown:
+            return "half-open"
+        return "open"
+
+    def before_call(self):
+        with self._lock:
+            state = self.state
+            if state == "open" or (state == "half-open" and self.trial_in_flight):
+                raise GatewayUnavailable("Payment gateway is temporarily unavailable.")
+            if state == "half-open":
+                self.trial_in_flight = True
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            self.trial_in_flight = False
+            if self.opened_at is not None or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+_client = None
+_breaker = None
+_init_lock = threading.Lock()
+
+
+def get_client():
+    global _client
+    if _client is None:
+        with _init_lock:
+            if _client is None:
+                session = _TimeoutSession(
+                    timeout=(
+                        _setting("PAYMENT_GATEWAY_CONNECT_TIMEOUT", 3.05),
+                        _setting("PAYMENT_GATEWAY_READ_TIMEOUT", 10),
+                    ),
+                    pool_size=_setting("PAYMENT_GATEWAY_POOL_SIZE", 10),
+                )
+                options = {}
+                base_url = _setting("RAZORPAY_BASE_URL", None)
+                if base_url:
+                    options["base_url"] = base_url
+                _client = razorpay.Client(
+                    session=session,
+                    auth=(settings.RAZORPAY_KEY_ID, settings.RAZORPAY_KEY_SECRET),
+                    **options,
+                )
+    return _client
+
+
+def get_breaker():
+    global _breaker
+    if _breaker is None:
+        with _init_lock:
+            if _breaker is None:
+                _breaker = CircuitBreaker(
+                    threshold=_setting("PAYMENT_GATEWAY_BREAKER_THRESHOLD", 5),
+                    cooldown=_setting("PAYMENT_GATEWAY_BREAKER_COOLDOWN", 30),
+                )
+    return _breaker
+
+
+def reset():
+    """Drop the process-wide client and breaker (settings changes, tests)."""
+    global _client, _breaker
+    with _init_lock:
+        _client = None
+        _breaker = None
+
+
+def _call(func, *args, **kwargs):
+    breaker = get_breaker()
+    breaker.before_call()
+
+    attempts = 1 + _setting("PAYMENT_GATEWAY_MAX_RETRIES", 2)
+    delay = _setting("PAYMENT_GATEWAY_BACKOFF", 0.2)
+    for attempt in range(attempts):
+        try:
+            result = func(*args, **kwargs)
+        except (requests.ConnectionError, requests.ConnectTimeout):
+            # The request never reached the gateway, so retrying is safe.
+            if attempt == attempts - 1:
+                breaker.record_failure()
+                raise GatewayUnavailable("Could not reach the payment gateway.")
+            time.sleep(delay * (2**attempt) * random.uniform(0.5, 1.5))
+        except requests.ReadTimeout:
+            # The gateway may have acted on it: do not retry blindly.
+            breaker.record_failure()
+            raise GatewayTimeout("Payment gateway did not respond in time.")
+        except razorpay.errors.BadRequestError:
+            # The gateway is up; the request itself was rejected.
+            breaker.record_success()
+            raise
+        except Exception:
+            breaker.record_failure()
+            raise
+        else:
+            breaker.record_success()
+            return result
+
+
+def create_order(amount_paise, currency="INR"):
+    return _call(
+        get_client().order.create,
+        {"amount": amount_paise, "currency": currency, "payment_capture": 1},
+    )
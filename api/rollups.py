@@ -0,0 +1,206 @@
+from collections import defaultdict
+from datetime import datetime
+from functools import reduce
+from operator import or_
+
+from django.db import transaction
+from django.db.models import Case, Count, DecimalField, F, Q, Sum, Value, When
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from . import leaderboards
+from .models import ArchivedOrder, ArchivedOrderItem, DailySales, OrderItem
+
+# ---------------------------------------------------
+# ✅ Daily Sales Rollup
+# ---------------------------------------------------
+#
+# DailySales keeps one row per (day, artisan, product, category), the
+# category being the one recorded on the order item at checkout. Placing
+# an order, changing its status or deleting it adds the difference to the
+# rows of the day the order was created, so dashboards sum a bounded
+# number of rows per day instead of every order item ever sold. Archiving
+# orders leaves the rollup alone. Approvals also feed the best-seller
+# leaderboards.
+
+COLUMNS = (
+    "quantity",
+    "revenue",
+    "order_count",
+    "approved_quantity",
+    "approved_revenue",
+)
+
+
+def _deltas(order, lines, *, placed, approved):
+    """
+    Column changes per rollup row for ``lines`` of ``(product_id,
+    artisan_id, category, quantity, price)``. ``placed`` and ``approved``
+    are -1, 0 or 1: whether the order is added to / taken from all sales
+    and from approved sales.
+    """
+    day = timezone.localdate(order.created_at)
+    deltas = defaultdict(lambda: dict.fromkeys(COLUMNS, 0))
+    for product_id, artisan_id, category, quantity, price in lines:
+        row = deltas[(day, artisan_id, product_id, category)]
+        row["quantity"] += placed * quantity
+        row["revenue"] += placed * price * quantity
+        row["order_count"] = placed
+        row["approved_quantity"] += approved * quantity
+        row["approved_revenue"] += approved * price * quantity
+    return deltas
+
+
+def _apply(deltas):
+    """Add ``deltas`` to their rows, creating missing ones. Three queries."""
+    deltas = {key: row for key, row in deltas.items() if any(row.values())}
+    if not deltas:
+        return
+    DailySales.objects.bulk_create(
+        [
+            DailySales(
+                date=day,
+                artisan_id=artisan_id,
+                product_id=product_id,
+                category=category,
+            )
+            for day, artisan_id, product_id, category in deltas
+        ],
+        ignore_conflicts=True,
+    )
+    rows = DailySales.objects.filter(
+        reduce(
+            or_,
+            (
+                Q(
+                    date=day,
+                    artisan_id=artisan_id,
+                    product_id=product_id,
+                    category=category,
+                )
+                for day, artisan_id, product_id, category in deltas
+            ),
+        )
+    ).values_list("pk", "date", "artisan_id", "product_id", "category")
+    pks = {tuple(key): pk for pk, *key in rows}
+
+    # One UPDATE, adding to the stored values so concurrent orders add up
+    changes = {}
+    for column in COLUMNS:
+        whens = [
+            When(pk=pks[key], then=Value(row[column]))
+            for key, row in deltas.items()
+            if row[column]
+        ]
+        if whens:
+            changes[column] = F(column) + Case(
+                *whens,
+                default=Value(0),
+                output_field=DailySales._meta.get_field(column),
+            )
+    DailySales.objects.filter(pk__in=pks.values()).update(**changes)
+
+
+def _order_lines(order):
+    items = ArchivedOrderItem if isinstance(order, ArchivedOrder) else OrderItem
+    return items.objects.filter(order=order).values_list(
+        "product_id", "product__artisan_id", "category", "quantity", "price"
+    )
+
+
+def _record(order, lines, placed, approved):
+    _apply(_deltas(order, lines, placed=placed, approved=approved))
+    leaderboards.apply(order, lines, approved)
+
+
+def record_order(order, items):
+    """Add a new order; ``items`` are its OrderItems with ``product`` loaded."""
+    lines = [
+        (
+            item.product_id,
+            item.product.artisan_id,
+            item.category,
+            item.quantity,
+            item.price,
+        )
+        for item in items
+    ]
+    _record(order, lines, placed=1, approved=int(order.status == "approved"))
+
+
+def record_status_change(order, old_status, new_status):
+    approved = int(new_status == "approved") - int(old_status == "approved")
+    if approved:
+        _record(order, list(_order_lines(order)), placed=0, approved=approved)
+
+
+def remove_order(order):
+    """Take an order (live or archived) back out, before it is deleted."""
+    _record(
+        order,
+        list(_order_lines(order)),
+        placed=-1,
+        approved=-int(order.status == "approved"),
+    )
+
+
+def rebuild(since=None):
+    """
+    Recompute the rollup from the live and archived order items, for the
+    days from ``since`` (a date) on, or for everything. Returns the number
+    of rows written. Orders placed while it runs can be missed: run it
+    when the shop is quiet, or again for the last day.
+    """
+    amount = F("price") * F("quantity")
+    money = DecimalField(max_digits=14, decimal_places=2)
+    totals = defaultdict(lambda: dict.fromkeys(COLUMNS, 0))
+    for model in (OrderItem, ArchivedOrderItem):
+        items = model.objects.all()
+        if since is not None:
+            items = items.filter(
+                order__created_at__gte=timezone.make_aware(
+                    datetime.combine(since, datetime.min.time())
+                )
+            )
+        rows = (
+            items.annotate(day=TruncDate("order__created_at"))
+            .values_list("day", "product__artisan_id", "product_id", "category")
+            .annotate(
+                sold=Sum("quantity"),
+                sales=Sum(amount, output_field=money),
+                orders=Count("order_id", distinct=True),
+                approved_sold=Sum("quantity", filter=Q(order__status="approved")),
+                approved_sales=Sum(
+                    amount, filter=Q(order__status="approved"), output_field=money
+                ),
+            )
+            .order_by()
+        )
+        # An order is either live or archived, so the counts add up too
+        for *key, sold, sales, orders, approved_sold, approved_sales in rows.iterator():
+            row = totals[tuple(key)]
+            row["quantity"] += sold
+            row["revenue"] += sales
+            row["order_count"] += orders
+            row["approved_quantity"] += approved_sold or 0
+            row["approved_revenue"] += approved_sales or 0
+
+    with transaction.atomic():
+        stale = DailySales.objects.all()
+        if since is not None:
+            stale = stale.filter(date__gte=since)
+        stale.delete()
+        DailySales.objects.bulk_create(
+            (
+                DailySales(
+                    date=day,
+                    artisan_id=artisan_id,
+                    product_id=product_id,
+                    category=category,
+                    **row,
+                )
+                for (day, artisan_id, product_id, category), row in totals.items()
+            ),
+            batch_size=1_000,
+        )
+    return len(totals)
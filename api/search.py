@@ -0,0 +1,139 @@
+import re
+
+from django.db import connection
+from django.db.models import BooleanField, FloatField, Q
+from django.db.models.expressions import RawSQL
+from rest_framework import filters
+
+# ---------------------------------------------------
+# ✅ Product Full-Text Search
+# ---------------------------------------------------
+#
+# PostgreSQL: a weighted ``search_vector`` tsvector column on api_product
+# with a GIN index. SQLite: an FTS5 shadow table ``api_product_fts`` keyed
+# by product id. Both are created in migration 0002 and kept in sync from
+# the Product post_save/post_delete signals. Other backends fall back to
+# icontains matching.
+
+FTS_TABLE = "api_product_fts"
+
+PG_VECTOR_SQL = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(category, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description, '')), 'C')"
+)
+
+
+def _vendor():
+    return connection.vendor
+
+
+def _tokens(term):
+    return re.findall(r"\w+", term or "")
+
+
+def fts5_query(term):
+    # Every token must match, as a prefix, so "pot" finds "pottery".
+    return " ".join('"%s"*' % token.replace('"', '""') for token in _tokens(term))
+
+
+def index_product(product):
+    with connection.cursor() as cursor:
+        if _vendor() == "postgresql":
+            cursor.execute(
+                f"UPDATE api_product SET search_vector = {PG_VECTOR_SQL} WHERE id = %s",
+                [product.pk],
+            )
+        elif _vendor() == "sqlite":
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product.pk])
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, category, description) "
+                "VALUES (%s, %s, %s, %s)",
+                [product.pk, product.title, product.category, product.description],
+            )
+
+
+def remove_product(product_id):
+    if _vendor() == "sqlite":
+        with connection.cursor() as cursor:
+            cursor.execute(f"DELETE FROM {FTS_TABLE} WHERE rowid = %s", [product_id])
+
+
+def rebuild_index():
+    with connection.cursor() as cursor:
+        if _vendor() == "postgresql":
+            cursor.execute(f"UPDATE api_product SET search_vector = {PG_VECTOR_SQL}")
+        elif _vendor() == "sqlite":
+            cursor.execute(f"DELETE FROM {FTS_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {FTS_TABLE} (rowid, title, category, description) "
+                "SELECT id, title, category, description FROM api_product"
+            )
+
+
+def search_products(queryset, term):
+    """
+    Filters ``queryset`` to products matching ``term`` and adds a
+    ``search_rank`` column (higher is better) on backends with an index.
+    """
+    if not _tokens(term):
+        return queryset
+
+    if _vendor() == "postgresql":
+        tsquery = "websearch_to_tsquery('english', %s)"
+        return queryset.filter(
+            RawSQL(
+                f"api_product.search_vector @@ {tsquery}",
+                [term],
+                output_field=BooleanField(),
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f"ts_rank(api_product.search_vector, {tsquery})",
+                [term],
+                output_field=FloatField(),
+            )
+        )
+
+    if _vendor() == "sqlite":
+        # bm25() only works inside a MATCH query, so the rank is one more
+        # MATCH limited to the row's id (a seek in the FTS index), run for
+        # matching rows only. Lower bm25 is better, so negate it; columns
+        # are weighted title > category > description.
+        match = fts5_query(term)
+        return queryset.filter(
+            id__in=RawSQL(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [match]
+            )
+        ).annotate(
+            search_rank=RawSQL(
+                f"SELECT -bm25({FTS_TABLE}, 10.0, 4.0, 1.0) FROM {FTS_TABLE} "
+                f"WHERE {FTS_TABLE} MATCH %s AND {FTS_TABLE}.rowid = api_product.id",
+                [match],
+                output_field=FloatField(),
+            )
+        )
+
+    condition = Q()
+    for token in _tokens(term):
+        condition &= (
+            Q(title__icontains=token)
+            | Q(description__icontains=token)
+            | Q(category__icontains=token)
+        )
+    return queryset.filter(condition)
+
+
+class ProductSearchFilter(filters.SearchFilter):
+    """
+    Drop-in replacement for SearchFilter on the product feed: same
+    ``?search=`` param, but backed by the full-text index and ordered by
+    relevance unless the client passes an explicit ``?ordering=``.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        term = request.query_params.get(self.search_param, "")
+        queryset = search_products(queryset, term)
+        if "search_rank" in queryset.query.annotations:
+            queryset = queryset.order_by("-search_rank", "-created_at")
+        return queryset
@@ -2,6 +2,120 @@ from rest_framework import serializers
 from .models import User, Product, Order, Wishlist, CartItem, OrderItem
 from django.contrib.auth.password_validation import validate_password
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from .images import srcset, thumbnail_url
+
+# ---------------------------------------------------
+# ✅ Eager Loading (select_related / prefetch_related)
+# ---------------------------------------------------
+
+
+class EagerLoadingMixin:
+    """
+    Serializers declare the relations they read; nested serializers are
+    folded in under their source, so a view only has to call
+    ``setup_eager_loading`` on the outermost serializer class.
+    """
+
+    select_related_fields = ()
+    prefetch_related_fields = ()
+
+    @classmethod
+    def get_eager_loading_lookups(cls, prefix="", in_prefetch=False):
+        select, prefetch = [], []
+
+        def add(path, many):
+            if in_prefetch or many:
+                prefetch.append(path)
+            else:
+                select.append(path)
+
+        for name in cls.select_related_fields:
+            add(prefix + name, False)
+        for name in cls.prefetch_related_fields:
+            add(prefix + name, True)
+
+        for name, field in cls._declared_fields.items():
+            many = isinstance(field, serializers.ListSerializer)
+            nested = field.child if many else field
+            if not isinstance(nested, EagerLoadingMixin):
+                continue
+            source = (field.source or name).replace(".", "__")
+            path = prefix + source
+            add(path, many)
+            child_select, child_prefetch = type(nested).get_eager_loading_lookups(
+                prefix=path + "__", in_prefetch=in_prefetch or many
+            )
+            select += child_select
+            prefetch += child_prefetch
+
+        return select, prefetch
+
+    @classmethod
+    def setup_eager_loading(cls, queryset):
+        select, prefetch = cls.get_eager_loading_lookups()
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        return queryset
+
+
+# ---------------------------------------------------
+# ✅ Sparse Fieldsets (?fields=) & Expansion (?expand=)
+# ---------------------------------------------------
+
+
+class DynamicFieldsMixin:
+    """
+    ``?fields=id,product.title`` keeps only the named fields, and
+    ``?expand=items.product`` swaps a compact nested representation for
+    the full one listed in ``expandable_fields``. Names are dotted paths
+    from the top-level object. Only applies to safe (read) requests, so
+    writable fields are never dropped from input validation.
+    """
+
+    expandable_fields = {}
+
+    def _field_path(self):
+        parts = []
+        node = self
+        while node.parent is not None:
+            if node.field_name:
+                parts.append(node.field_name)
+            node = node.parent
+        return ".".join(reversed(parts))
+
+    def _requested(self, param):
+        request = self.context.get("request")
+        if request is None or request.method not in ("GET", "HEAD", "OPTIONS"):
+            return None
+        raw = request.query_params.get(param)
+        if not raw:
+            return None
+        path = self._field_path()
+        prefix = f"{path}." if path else ""
+        names = set()
+        for item in raw.split(","):
+            item = item.strip()
+            if item.startswith(prefix) and len(item) > len(prefix):
+                names.add(item[len(prefix) :].split(".")[0])
+        return names or None
+
+    def get_fields(self):
+        fields = super().get_fields()
+
+        expand = self._requested("expand") or set()
+        for name, serializer_class in self.expandable_fields.items():
+            if name in expand:
+                fields[name] = serializer_class(read_only=True)
+
+        only = self._requested("fields")
+        if only:
+            for name in list(fields):
+                if name not in only:
+                    fields.pop(name)
+        return fields
+
 
 # ---------------------------------------------------
 # ✅ Register Serializer
@@ -72,12 +186,15 @@ class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
 # ---------------------------------------------------
 
 
-class ProductSerializer(serializers.ModelSerializer):
+class ProductSerializer(
+    DynamicFieldsMixin, EagerLoadingMixin, serializers.ModelSerializer
+):
     image = serializers.SerializerMethodField()
+    image_srcset = serializers.SerializerMethodField()
 
     class Meta:
         model = Product
-        fields = "__all__"
+        exclude = ("image_variants",)
         read_only_fields = ("artisan", "created_at", "updated_at")
 
     def get_image(self, obj):
@@ -88,20 +205,47 @@ class ProductSerializer(serializers.ModelSerializer):
             )
         return None
 
-#Order item Serializer
-class OrderItemSerializer(serializers.ModelSerializer):
-    product = ProductSerializer(read_only=True)
+    def get_image_srcset(self, obj):
+        return srcset(self.context.get("request"), obj.image, obj.image_variants)
+
+
+# Compact product for nested rows (cart, wishlist, order items);
+# ?expand=product (or items.product) returns the full ProductSerializer.
+class CompactProductSerializer(
+    DynamicFieldsMixin, EagerLoadingMixin, serializers.ModelSerializer
+):
+    thumbnail = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Product
+        fields = ["id", "title", "price", "thumbnail", "is_active"]
+
+    def get_thumbnail(self, obj):
+        return thumbnail_url(self.context.get("request"), obj.image, obj.image_variants)
+
+
+# Order item Serializer
+class OrderItemSerializer(
+    DynamicFieldsMixin, EagerLoadingMixin, serializers.ModelSerializer
+):
+    product = CompactProductSerializer(read_only=True)
+
+    expandable_fields = {"product": ProductSerializer}
 
     class Meta:
         model = OrderItem
         fields = ["id", "product", "quantity", "price"]
 
 
-class OrderSerializer(serializers.ModelSerializer):
+class OrderSerializer(
+    DynamicFieldsMixin, EagerLoadingMixin, serializers.ModelSerializer
+):
     items = OrderItemSerializer(many=True, read_only=True)
     buyer_name = serializers.CharField(source="buyer.full_name", read_only=True)
     total_amount = serializers.SerializerMethodField()
 
+    select_related_fields = ("buyer",)
+
     class Meta:
         model = Order
         fields = [
@@ -116,6 +260,7 @@ class OrderSerializer(serializers.ModelSerializer):
             "created_at",
             "items",
             "total_amount",
+            "item_count",
         ]
         read_only_fields = (
             "buyer",
@@ -126,7 +271,8 @@ class OrderSerializer(serializers.ModelSerializer):
         )
 
     def get_total_amount(self, obj):
-        return sum(item.price * item.quantity for item in obj.items.all())
+        # Stored at checkout; migration 0009 filled in older orders
+        return obj.subtotal
 
 
 # ---------------------------------------------------
@@ -134,12 +280,16 @@ class OrderSerializer(serializers.ModelSerializer):
 # ---------------------------------------------------
 
 
-class WishlistSerializer(serializers.ModelSerializer):
-    product = ProductSerializer(read_only=True)
+class WishlistSerializer(
+    DynamicFieldsMixin, EagerLoadingMixin, serializers.ModelSerializer
+):
+    product = CompactProductSerializer(read_only=True)
     product_id = serializers.PrimaryKeyRelatedField(
         queryset=Product.objects.all(), write_only=True, source="product"
     )
 
+    expandable_fields = {"product": ProductSerializer}
+
     class Meta:
         model = Wishlist
         fields = ["id", "product", "product_id", "added_at"]
@@ -150,7 +300,7 @@ class WishlistSerializer(serializers.ModelSerializer):
 # ---------------------------------------------------
 
 
-class UserAdminSerializer(serializers.ModelSerializer):
+class UserAdminSerializer(DynamicFieldsMixin, serializers.ModelSerializer):
     class Meta:
         model = User
         fields = [
@@ -172,9 +322,13 @@ class UserAdminSerializer(serializers.ModelSerializer):
 # ---------------------------------------------------
 
 
-class AdminProductSerializer(serializers.ModelSerializer):
+class AdminProductSerializer(
+    DynamicFieldsMixin, EagerLoadingMixin, serializers.ModelSerializer
+):
     artisan_name = serializers.CharField(source="artisan.full_name", read_only=True)
 
+    select_related_fields = ("artisan",)
+
     class Meta:
         model = Product
         fields = [
@@ -198,9 +352,14 @@ class AdminProductSerializer(serializers.ModelSerializer):
 # ---------------------------------------------------
 # ✅ Admin View - Orders (with nested items)
 # ---------------------------------------------------
-class AdminOrderSerializer(serializers.ModelSerializer):
+class AdminOrderSerializer(
+    DynamicFieldsMixin, EagerLoadingMixin, serializers.ModelSerializer
+):
     buyer_name = serializers.CharField(source="buyer.full_name", read_only=True)
     items = OrderItemSerializer(many=True, read_only=True)
+    total_amount = serializers.ReadOnlyField(source="subtotal")
+
+    select_related_fields = ("buyer",)
 
     class Meta:
         model = Order
@@ -215,6 +374,8 @@ class AdminOrderSerializer(serializers.ModelSerializer):
             "delivery_date",
             "created_at",
             "items",
+            "total_amount",
+            "item_count",
         ]
 
 
@@ -223,12 +384,43 @@ class AdminOrderSerializer(serializers.ModelSerializer):
 # ---------------------------------------------------
 
 
-class CartItemSerializer(serializers.ModelSerializer):
-    product = ProductSerializer(read_only=True)  # full nested product
+class CartItemSerializer(
+    DynamicFieldsMixin, EagerLoadingMixin, serializers.ModelSerializer
+):
+    product = CompactProductSerializer(read_only=True)
     product_id = serializers.PrimaryKeyRelatedField(
         queryset=Product.objects.all(), write_only=True, source="product"
     )
 
+    expandable_fields = {"product": ProductSerializer}
+
     class Meta:
         model = CartItem
-        fields = ["id", "product", "product_id", "quantity", "added_at"]
+        fields = [
+            "id",
+            "product",
+            "product_id",
+            "quantity",
+            "price_snapshot",
+            "added_at",
+        ]
+        read_only_fields = ("price_snapshot",)
+
+    # The snapshot is the price the buyer saw when adding the product; a
+    # quantity change keeps it, so cart_summary can still flag the change.
+    def create(self, validated_data):
+        validated_data["price_snapshot"] = validated_data["product"].price
+        return super().create(validated_data)
+
+    def update(self, instance, validated_data):
+        product = validated_data.get("product", instance.product)
+        if product.pk != instance.product_id:
+            validated_data["price_snapshot"] = product.price
+        return super().update(instance, validated_data)
+
+
+class CartBatchItemSerializer(serializers.Serializer):
+    """One line of a batch cart update; quantity 0 removes the product."""
+
+    product_id = serializers.IntegerField(min_value=1)
+    quantity = serializers.IntegerField(min_value=0, max_value=10000)
@@ -0,0 +1,61 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+
+from . import archive, catalog_cache, images, search, tasks
+from .models import Product, User
+
+# ---------------------------------------------------
+# ✅ Product search index sync
+# ---------------------------------------------------
+
+
+@receiver(post_save, sender=Product)
+def index_product_on_save(sender, instance, **kwargs):
+    search.index_product(instance)
+
+
+@receiver(post_delete, sender=Product)
+def remove_product_from_index(sender, instance, **kwargs):
+    search.remove_product(instance.pk)
+
+
+# ---------------------------------------------------
+# ✅ Catalog cache invalidation
+# ---------------------------------------------------
+
+
+@receiver(post_save, sender=Product)
+@receiver(post_delete, sender=Product)
+def bump_catalog_version(sender, instance, **kwargs):
+    catalog_cache.bump_version()
+
+
+# ---------------------------------------------------
+# ✅ Order ledger cleanup
+# ---------------------------------------------------
+
+
+@receiver(pre_delete, sender=User)
+def forget_deleted_buyer(sender, instance, **kwargs):
+    archive.forget_buyer(instance)
+
+
+# ---------------------------------------------------
+# ✅ Image derivatives
+# ---------------------------------------------------
+
+
+@receiver(post_save, sender=Product)
+def schedule_product_image_variants(sender, instance, **kwargs):
+    if instance.image and not images.variants_are_current(
+        instance.image, instance.image_variants
+    ):
+        tasks.enqueue("image.product_variants", product_id=instance.pk)
+
+
+@receiver(post_save, sender=User)
+def schedule_profile_picture_variants(sender, instance, **kwargs):
+    if instance.profile_picture and not images.variants_are_current(
+        instance.profile_picture, instance.profile_picture_variants
+    ):
+        tasks.enqueue("image.profile_picture_variants", user_id=instance.pk)
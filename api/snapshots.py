@@ -0,0 +1,65 @@
+import time
+
+from django.core.cache import cache
+
+# ---------------------------------------------------
+# ✅ Snapshot Cache (stale-while-revalidate)
+# ---------------------------------------------------
+#
+# An expensive result is cached together with the time it was computed.
+# While it is fresh it is served as is. Once stale, the first request to
+# take the refresh lock recomputes it and every other request is served
+# the previous snapshot straight away, so at most one worker recomputes
+# at a time. With no snapshot at all (cold start, or idle for longer than
+# it is kept), the requests that miss the lock wait for the one computing
+# it rather than computing it too.
+
+POLL_INTERVAL = 0.1
+
+
+class SnapshotUnavailable(Exception):
+    """No snapshot yet, and the request computing one did not finish in time."""
+
+
+def _wait_for(key, wait):
+    deadline = time.monotonic() + wait
+    while time.monotonic() < deadline:
+        time.sleep(POLL_INTERVAL)
+        entry = cache.get(key)
+        if entry is not None:
+            return entry
+    return None
+
+
+def get(key, compute, fresh_for, stale_for, lock_timeout=60, wait=10):
+    """
+    ``(data, state)`` for the snapshot under ``key``; ``state`` is "HIT",
+    "STALE" (served while another request refreshes it) or "MISS".
+    Raises SnapshotUnavailable if another request is computing the first
+    snapshot and it is not there within ``wait`` seconds.
+    """
+    entry = cache.get(key)
+    if entry is not None and time.time() - entry["computed_at"] < fresh_for:
+        return entry["data"], "HIT"
+
+    lock = f"{key}:refresh"
+    locked = cache.add(lock, 1, timeout=lock_timeout)
+    if not locked:
+        if entry is not None:
+            return entry["data"], "STALE"
+        entry = _wait_for(key, wait)
+        if entry is None:
+            raise SnapshotUnavailable(key)
+        return entry["data"], "HIT"
+
+    # Holding the lock: this request computes the snapshot.
+    try:
+        data = compute()
+        cache.set(
+            key,
+            {"data": data, "computed_at": time.time()},
+            timeout=fresh_for + stale_for,
+        )
+    finally:
+        cache.delete(lock)
+    return data, "MISS"
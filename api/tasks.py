@@ -0,0 +1,133 @@
+import logging
+import traceback
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import Task
+
+logger = logging.getLogger(__name__)
+
+# ---------------------------------------------------
+# ✅ Background Task Queue (database-backed)
+# ---------------------------------------------------
+#
+# Views enqueue side effects (emails, notifications, image derivatives) as
+# Task rows in their own transaction, so a task exists exactly when the
+# change that caused it was committed. ``manage.py run_task_worker``
+# claims due tasks, runs the registered handler and retries failures with
+# exponential backoff.
+# Delivery is at-least-once: handlers must tolerate running twice.
+
+DEFAULT_MAX_ATTEMPTS = 5
+RETRY_BASE = timedelta(seconds=30)
+RETRY_MAX = timedelta(hours=1)
+# A task still "running" after this long belongs to a worker that died.
+STALE_AFTER = timedelta(minutes=10)
+
+_handlers = {}
+
+
+def register(name):
+    """Register the decorated function as the handler for task ``name``."""
+
+    def decorator(func):
+        _handlers[name] = func
+        return func
+
+    return decorator
+
+
+def enqueue(name, *, delay=None, max_attempts=DEFAULT_MAX_ATTEMPTS, **payload):
+    """Queue ``name(**payload)``; the payload must be JSON serialisable."""
+    return Task.objects.create(
+        name=name,
+        payload=payload,
+        max_attempts=max_attempts,
+        run_at=timezone.now() + (delay or timedelta()),
+    )
+
+
+def enqueue_many(name, payloads, max_attempts=DEFAULT_MAX_ATTEMPTS):
+    now = timezone.now()
+    return Task.objects.bulk_create(
+        Task(name=name, payload=payload, max_attempts=max_attempts, run_at=now)
+        for payload in payloads
+    )
+
+
+def claim(worker, limit=10):
+    """Mark up to ``limit`` due tasks as running for ``worker`` and return them."""
+    now = timezone.now()
+    with transaction.atomic():
+        due = Task.objects.filter(status="queued", run_at__lte=now).order_by("run_at")
+        if connection.features.has_select_for_update_skip_locked:
+            due = due.select_for_update(skip_locked=True)
+        ids = list(due.values_list("pk", flat=True)[:limit])
+        if not ids:
+            return []
+        # The status check keeps two workers from claiming the same task
+        # where SKIP LOCKED is not available.
+        Task.objects.filter(pk__in=ids, status="queued").update(
+            status="running",
+            locked_at=now,
+            locked_by=worker,
+            attempts=F("attempts") + 1,
+            updated_at=now,
+        )
+    return list(
+        Task.objects.filter(
+            pk__in=ids, status="running", locked_by=worker, locked_at=now
+        ).order_by("run_at")
+    )
+
+
+def run(task):
+    """Run one claimed task and record the outcome. Returns True on success."""
+    handler = _handlers.get(task.name)
+    try:
+        if handler is None:
+            raise LookupError(f"No handler registered for task {task.name!r}")
+        handler(**task.payload)
+    except Exception:
+        error = traceback.format_exc()
+        now = timezone.now()
+        if task.attempts >= task.max_attempts:
+            logger.error("Task %s failed for good:\n%s", task, error)
+            Task.objects.filter(pk=task.pk).update(
+                status="failed", locked_at=None, last_error=error, updated_at=now
+            )
+        else:
+            delay = min(RETRY_BASE * 2 ** (task.attempts - 1), RETRY_MAX)
+            logger.warning("Task %s failed, retrying in %s", task, delay)
+            Task.objects.filter(pk=task.pk).update(
+                status="queued",
+                run_at=now + delay,
+                locked_at=None,
+                last_error=error,
+                updated_at=now,
+            )
+        return False
+
+    Task.objects.filter(pk=task.pk).update(
+        status="done", locked_at=None, updated_at=timezone.now()
+    )
+    return True
+
+
+def requeue_stale(now=None):
+    """Give tasks abandoned by a dead worker back to the queue."""
+    now = now or timezone.now()
+    return Task.objects.filter(
+        status="running", locked_at__lt=now - STALE_AFTER
+    ).update(status="queued", locked_at=None, run_at=now, updated_at=now)
+
+
+def purge_done(older_than, now=None):
+    now = now or timezone.now()
+    deleted, _ = Task.objects.filter(
+        status="done", updated_at__lt=now - older_than
+    ).delete()
+    return deleted
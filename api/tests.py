@@ -1 +1,1798 @@
-# Create your tests here.
+import base64
+import csv
+import importlib
+import json
+import tempfile
+import threading
+import time
+from datetime import timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from types import SimpleNamespace
+from unittest import mock
+
+from django.apps import apps
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.models import Sum
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+import razorpay
+import requests
+from rest_framework.test import APIClient
+
+from . import (
+    archive,
+    catalog_cache,
+    exports,
+    idempotency,
+    inventory,
+    payments,
+    search,
+    snapshots,
+    tasks,
+)
+from .management.commands import check_query_plans
+from .models import (
+    ArchivedOrder,
+    ArtisanOrder,
+    BestSeller,
+    CartItem,
+    DailySales,
+    IdempotencyKey,
+    Order,
+    OrderItem,
+    Product,
+    StockReservation,
+    Task,
+    User,
+)
+
+
+class InventoryConcurrencyTests(TransactionTestCase):
+    """
+    Many threads, released together, compete for one product's stock. The
+    demand is always larger than the stock, so the race is real; whatever
+    the interleaving, sold + left must equal the initial stock.
+
+    Needs a database that lets the threads' connections wait on each other:
+    PostgreSQL, or SQLite on a file (the settings give tests one). SQLite's
+    shared-cache memory database fails concurrent writers instead.
+    """
+
+    THREADS = 12
+    STOCK = 20
+
+    def setUp(self):
+        if connection.vendor == "sqlite" and connection.is_in_memory_db():
+            self.skipTest("In-memory SQLite fails concurrent writers.")
+        artisan = User.objects.create(
+            username="race_artisan", email="race_artisan@example.com", is_artisan=True
+        )
+        self.product = Product.objects.create(
+            artisan=artisan,
+            title="Race product",
+            description="Inventory concurrency test",
+            category="Pottery",
+            price=10,
+            stock=self.STOCK,
+        )
+        self.buyers = [
+            User.objects.create(
+                username=f"race_buyer_{i}",
+                email=f"race_buyer_{i}@example.com",
+                is_buyer=True,
+            )
+            for i in range(self.THREADS)
+        ]
+
+    def race(self, work):
+        """
+        Run ``work(buyer)`` in one thread per buyer; returns the results.
+        Fails unless several threads were inside ``work`` at the same time.
+        """
+        barrier = threading.Barrier(self.THREADS)
+        results, errors = [None] * self.THREADS, []
+        lock = threading.Lock()
+        running = {"now": 0, "peak": 0}
+
+        def run(index):
+            try:
+                barrier.wait()
+                with lock:
+                    running["now"] += 1
+                    running["peak"] = max(running["peak"], running["now"])
+                try:
+                    results[index] = work(self.buyers[index])
+                finally:
+                    with lock:
+                        running["now"] -= 1
+            except Exception as exc:  # surfaced by the assertion below
+                errors.append(exc)
+            finally:
+                connection.close()
+
+        threads = [
+            threading.Thread(target=run, args=(index,)) for index in range(self.THREADS)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+        self.assertGreater(running["peak"], 1, "The threads never overlapped.")
+        return results
+
+    def assertNotOversold(self, sold):
+        self.product.refresh_from_db()
+        self.assertGreaterEqual(self.product.stock, 0)
+        self.assertEqual(sold + self.product.stock, self.STOCK)
+
+    def test_decrement_stock_never_oversells(self):
+        def buy(buyer):
+            return sum(inventory.decrement_stock(self.product.pk, 1) for _ in range(5))
+
+        sold = sum(self.race(buy))
+
+        self.assertEqual(sold, self.STOCK)
+        self.assertNotOversold(sold)
+
+    def test_reserve_and_commit_never_oversell(self):
+        for buyer in self.buyers:
+            CartItem.objects.create(buyer=buyer, product=self.product, quantity=2)
+
+        def checkout(buyer):
+            cart_items = list(CartItem.objects.filter(buyer=buyer))
+            try:
+                inventory.reserve_cart(buyer, cart_items)
+            except inventory.InsufficientStock:
+                return 0
+            with transaction.atomic():
+                order = Order.objects.create(buyer=buyer)
+                inventory.commit_cart(buyer, cart_items, order)
+            return sum(item.quantity for item in cart_items)
+
+        sold = sum(self.race(checkout))
+
+        self.assertEqual(sold, self.STOCK)
+        self.assertNotOversold(sold)
+        committed = StockReservation.objects.filter(status="committed").aggregate(
+            total=Sum("quantity")
+        )["total"]
+        self.assertEqual(committed, sold)
+        self.assertFalse(StockReservation.objects.filter(status="held").exists())
+
+    def test_concurrent_release_returns_expired_holds_once(self):
+        holders = self.buyers[: self.STOCK // 2]
+        for buyer in holders:
+            item = CartItem.objects.create(
+                buyer=buyer, product=self.product, quantity=2
+            )
+            inventory.reserve_cart(buyer, [item], ttl=timedelta(seconds=-1))
+        self.product.refresh_from_db()
+        self.assertEqual(self.product.stock, self.STOCK - 2 * len(holders))
+
+        released = sum(self.race(lambda buyer: inventory.release_expired()))
+
+        self.assertEqual(released, len(holders))
+        self.assertNotOversold(0)
+
+
+class ReservationExpiryTests(TransactionTestCase):
+    def test_task_worker_hands_back_expired_holds(self):
+        artisan = User.objects.create(
+            username="hold_artisan", email="hold_artisan@example.com", is_artisan=True
+        )
+        buyer = User.objects.create(
+            username="hold_buyer", email="hold_buyer@example.com", is_buyer=True
+        )
+        product = Product.objects.create(
+            artisan=artisan,
+            title="Held product",
+            description="Reservation expiry test",
+            category="Pottery",
+            price=10,
+            stock=5,
+        )
+        item = CartItem.objects.create(buyer=buyer, product=product, quantity=3)
+        inventory.reserve_cart(buyer, [item], ttl=timedelta(seconds=-1))
+
+        call_command("run_task_worker", once=True, stdout=StringIO())
+
+        product.refresh_from_db()
+        self.assertEqual(product.stock, 5)
+        self.assertEqual(StockReservation.objects.get().status, "released")
+
+
+class DailySalesRollupTests(TestCase):
+    """The rollup rows of an order stay its own after its product moves."""
+
+    def setUp(self):
+        self.artisan = User.objects.create(
+            username="rollup_artisan",
+            email="rollup_artisan@example.com",
+            is_artisan=True,
+        )
+        self.buyer = User.objects.create(
+            username="rollup_buyer", email="rollup_buyer@example.com", is_buyer=True
+        )
+        self.admin = User.objects.create(
+            username="rollup_admin", email="rollup_admin@example.com", is_admin=True
+        )
+        self.product = Product.objects.create(
+            artisan=self.artisan,
+            title="Rollup vase",
+            description="Rollup test",
+            category="Pottery",
+            price=25,
+            stock=10,
+        )
+        self.client = APIClient()
+
+    def place_order(self, quantity=2):
+        self.client.force_authenticate(self.buyer)
+        response = self.client.post(
+            "/api/buyer/buy-now/",
+            {"product_id": self.product.pk, "quantity": quantity},
+            format="json",
+        )
+        self.assertEqual(response.status_code, 201)
+        return response.data["order_id"]
+
+    def set_status(self, order_id, status):
+        self.client.force_authenticate(self.artisan)
+        return self.client.patch(
+            f"/api/artisan/orders/{order_id}/update-status/",
+            {"status": status},
+            format="json",
+        )
+
+    def test_deny_after_category_change(self):
+        order_id = self.place_order()
+        self.assertEqual(self.set_status(order_id, "approved").status_code, 200)
+        Product.objects.filter(pk=self.product.pk).update(category="Sculptures")
+
+        self.assertEqual(self.set_status(order_id, "denied").status_code, 200)
+
+        row = DailySales.objects.get()
+        self.assertEqual(row.category, "Pottery")
+        self.assertEqual((row.quantity, row.approved_quantity), (2, 0))
+
+    def test_delete_after_category_change(self):
+        order_id = self.place_order()
+        self.set_status(order_id, "approved")
+        Product.objects.filter(pk=self.product.pk).update(category="Sculptures")
+
+        self.client.force_authenticate(self.admin)
+        response = self.client.delete(f"/api/admin/orders/{order_id}/")
+
+        self.assertEqual(response.status_code, 204)
+        row = DailySales.objects.get()
+        self.assertEqual(
+            (row.quantity, row.order_count, row.approved_quantity), (0, 0, 0)
+        )
+
+
+class BestSellerTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.artisan = User.objects.create(
+            username="board_artisan", email="board_artisan@example.com", is_artisan=True
+        )
+        self.buyer = User.objects.create(
+            username="board_buyer", email="board_buyer@example.com", is_buyer=True
+        )
+        # Newest last; the vases are the ones a search for "vase" finds
+        titles = ["Clay vase", "Teak bowl", "Glass vase", "Silk scarf", "Stone vase"]
+        self.products = [
+            Product.objects.create(
+                artisan=self.artisan,
+                title=title,
+                description="Leaderboard test",
+                category="Pottery",
+                price=10,
+                stock=10,
+            )
+            for title in titles
+        ]
+        self.client = APIClient()
+
+    def rank(self, units):
+        """Give the all-time board ``units`` sold for the products in order."""
+        for product, sold in zip(self.products, units):
+            if sold:
+                BestSeller.objects.create(
+                    window=BestSeller.ALL_TIME,
+                    product=product,
+                    artisan=self.artisan,
+                    category=product.category,
+                    units=sold,
+                )
+
+    def ids(self, *indexes):
+        return [self.products[index].pk for index in indexes]
+
+    def feed(self, **params):
+        response = self.client.get(
+            "/api/products/", {"ordering": "best_selling", **params}
+        )
+        self.assertEqual(response.status_code, 200)
+        return response.data
+
+    def test_pages_run_from_the_board_into_the_unsold_products(self):
+        self.rank([30, 0, 50, 40, 0])
+
+        first = self.feed(page_size=2)
+        second = self.feed(page_size=2, page=2)
+        third = self.feed(page_size=2, page=3)
+
+        self.assertEqual(first["count"], 5)
+        self.assertEqual([row["id"] for row in first["results"]], self.ids(2, 3))
+        # The last ranked product, then the newest unsold one
+        self.assertEqual([row["id"] for row in second["results"]], self.ids(0, 4))
+        self.assertEqual([row["id"] for row in third["results"]], self.ids(1))
+
+    def test_search_results_in_board_order(self):
+        self.rank([10, 90, 0, 0, 20])
+
+        data = self.feed(search="vase")
+
+        self.assertEqual([row["id"] for row in data["results"]], self.ids(4, 0, 2))
+
+    def test_search_orders_by_relevance(self):
+        Product.objects.filter(pk=self.products[1].pk).update(
+            description="Holds a vase"
+        )
+        search.rebuild_index()
+
+        response = self.client.get("/api/products/", {"search": "vas"})
+
+        # Title matches outrank the description one; ties go newest first
+        ids = [row["id"] for row in response.data["results"]]
+        self.assertEqual(ids, self.ids(4, 2, 0, 1))
+
+    def test_denial_never_counted_does_not_go_negative(self):
+        self.client.force_authenticate(self.buyer)
+        order_id = self.client.post(
+            "/api/buyer/buy-now/",
+            {"product_id": self.products[0].pk, "quantity": 2},
+            format="json",
+        ).data["order_id"]
+        self.client.force_authenticate(self.artisan)
+        url = f"/api/artisan/orders/{order_id}/update-status/"
+        self.client.patch(url, {"status": "approved"}, format="json")
+        # As if the approval predates the board
+        BestSeller.objects.all().delete()
+
+        response = self.client.patch(url, {"status": "denied"}, format="json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(set(BestSeller.objects.values_list("units", flat=True)), {0})
+
+
+class OrderHistoryTests(TestCase):
+    """Live and archived orders read as one history, paged or not."""
+
+    def setUp(self):
+        self.buyer = User.objects.create(
+            username="history_buyer", email="history_buyer@example.com", is_buyer=True
+        )
+        now = timezone.now()
+        # (days ago, status): the old closed ones get archived, the old
+        # pending one stays live between them.
+        self.orders = []
+        for days, status in [
+            (1, "pending"),
+            (20, "approved"),
+            (200, "denied"),
+            (250, "pending"),
+            (300, "denied"),
+        ]:
+            order = Order.objects.create(buyer=self.buyer, status=status)
+            Order.objects.filter(pk=order.pk).update(
+                created_at=now - timedelta(days=days)
+            )
+            self.orders.append(order.pk)
+        self.assertEqual(archive.archive_batch(self.orders), 2)
+        self.client = APIClient()
+        self.client.force_authenticate(self.buyer)
+
+    def test_unpaged_history_includes_archived_orders(self):
+        response = self.client.get("/api/buyer/orders/")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(ArchivedOrder.objects.count(), 2)
+        self.assertEqual([row["id"] for row in response.data], self.orders)
+
+    def test_cursor_pages_walk_the_same_history(self):
+        ids, url = [], "/api/buyer/orders/?pagination=cursor&page_size=2"
+        while url:
+            data = self.client.get(url).data
+            ids += [row["id"] for row in data["results"]]
+            url = data["next"]
+
+        self.assertEqual(ids, self.orders)
+
+
+class IdempotencyTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        artisan = User.objects.create(
+            username="idem_artisan", email="idem_artisan@example.com", is_artisan=True
+        )
+        self.buyer = User.objects.create(
+            username="idem_buyer", email="idem_buyer@example.com", is_buyer=True
+        )
+        self.product = Product.objects.create(
+            artisan=artisan,
+            title="Idempotent bowl",
+            description="Idempotency test",
+            category="Pottery",
+            price=10,
+            stock=10,
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.buyer)
+
+    def buy(self, quantity=1, key="key-1"):
+        return self.client.post(
+            "/api/buyer/buy-now/",
+            {"product_id": self.product.pk, "quantity": quantity},
+            format="json",
+            HTTP_IDEMPOTENCY_KEY=key,
+        )
+
+    def test_retry_replays_the_first_response(self):
+        first = self.buy()
+        cache.clear()  # replayed from the table, not just the cache
+        retry = self.buy()
+
+        self.assertEqual(first.status_code, 201)
+        self.assertEqual((retry.status_code, retry.data), (201, first.data))
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(Order.objects.count(), 1)
+
+    def test_key_reused_for_another_request_is_rejected(self):
+        self.buy(quantity=1)
+
+        response = self.buy(quantity=2)
+
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(Order.objects.count(), 1)
+
+    def in_flight(self, key="key-1"):
+        """The processing row a still running ``buy(key=key)`` would hold."""
+        request = SimpleNamespace(
+            method="POST",
+            path="/api/buyer/buy-now/",
+            data={"product_id": self.product.pk, "quantity": 1},
+        )
+        return IdempotencyKey.objects.create(
+            user=self.buyer,
+            key_digest=idempotency._digest(key),
+            request_digest=idempotency._request_digest(request),
+            expires_at=timezone.now() + idempotency.KEY_TTL,
+        )
+
+    def test_duplicate_waits_for_the_request_in_flight(self):
+        row = self.in_flight()
+
+        def finish(seconds):
+            IdempotencyKey.objects.filter(pk=row.pk).update(
+                state="completed", status_code=201, response_body={"order_id": 99}
+            )
+
+        with mock.patch.object(idempotency.time, "sleep", side_effect=finish) as wait:
+            response = self.buy()
+
+        self.assertTrue(wait.called)
+        self.assertEqual((response.status_code, response.data), (201, {"order_id": 99}))
+        self.assertFalse(Order.objects.exists())
+
+    def test_duplicate_gives_up_with_409(self):
+        self.in_flight()
+
+        with mock.patch.object(idempotency, "WAIT_TIMEOUT", 0):
+            response = self.buy()
+
+        self.assertEqual(response.status_code, 409)
+        self.assertFalse(Order.objects.exists())
+
+    def test_server_error_frees_the_key(self):
+        url = "/api/buyer/cart/create-razorpay-order/"
+        headers = {"HTTP_IDEMPOTENCY_KEY": "pay-1"}
+        with mock.patch(
+            "api.views.payments.create_order", side_effect=RuntimeError("boom")
+        ):
+            failed = self.client.post(url, {"amount": 10}, format="json", **headers)
+        self.assertEqual(failed.status_code, 500)
+        self.assertFalse(IdempotencyKey.objects.exists())
+
+        order = {"id": "order_1", "amount": 1000, "currency": "INR"}
+        with mock.patch("api.views.payments.create_order", return_value=order):
+            retried = self.client.post(url, {"amount": 10}, format="json", **headers)
+
+        self.assertEqual(retried.status_code, 200)
+        self.assertNotIn("Idempotent-Replayed", retried)
+        self.assertEqual(IdempotencyKey.objects.get().state, "completed")
+
+
+class IdempotencyPurgeTests(TransactionTestCase):
+    def test_task_worker_deletes_expired_keys(self):
+        buyer = User.objects.create(
+            username="purge_buyer", email="purge_buyer@example.com", is_buyer=True
+        )
+        now = timezone.now()
+        expired, live = [
+            IdempotencyKey.objects.create(
+                user=buyer,
+                key_digest=idempotency._digest(key),
+                request_digest=idempotency._digest("request"),
+                expires_at=expires_at,
+            )
+            for key, expires_at in (
+                ("old", now - timedelta(minutes=1)),
+                ("new", now + idempotency.KEY_TTL),
+            )
+        ]
+
+        call_command("run_task_worker", once=True, stdout=StringIO())
+
+        self.assertEqual(
+            list(IdempotencyKey.objects.values_list("pk", flat=True)), [live.pk]
+        )
+
+
+class CartBatchTests(TestCase):
+    url = "/api/buyer/cart/batch/"
+
+    def setUp(self):
+        artisan = User.objects.create(
+            username="batch_artisan", email="batch_artisan@example.com", is_artisan=True
+        )
+        self.buyer = User.objects.create(
+            username="batch_buyer", email="batch_buyer@example.com", is_buyer=True
+        )
+        self.products = [
+            Product.objects.create(
+                artisan=artisan,
+                title=f"Batch product {i}",
+                description="Cart batch test",
+                category="Textiles",
+                price=10 + i,
+                stock=10,
+            )
+            for i in range(3)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.buyer)
+
+    def cart(self):
+        return dict(
+            CartItem.objects.filter(buyer=self.buyer).values_list(
+                "product_id", "quantity"
+            )
+        )
+
+    def test_upserts_and_removes_in_one_request(self):
+        first, second, third = self.products
+        CartItem.objects.create(buyer=self.buyer, product=first, quantity=1)
+        CartItem.objects.create(buyer=self.buyer, product=second, quantity=1)
+
+        response = self.client.post(
+            self.url,
+            [
+                {"product_id": first.pk, "quantity": 4},
+                {"product_id": second.pk, "quantity": 0},
+                {"product_id": third.pk, "quantity": 1},
+                {"product_id": third.pk, "quantity": 2},  # last line wins
+            ],
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.cart(), {first.pk: 4, third.pk: 2})
+        self.assertEqual(len(response.data), 2)
+
+    def test_unavailable_product_changes_nothing(self):
+        first, second, _ = self.products
+        CartItem.objects.create(buyer=self.buyer, product=first, quantity=1)
+        Product.objects.filter(pk=second.pk).update(is_active=False)
+
+        response = self.client.post(
+            self.url,
+            [
+                {"product_id": first.pk, "quantity": 0},
+                {"product_id": second.pk, "quantity": 3},
+                {"product_id": 999999, "quantity": 1},
+            ],
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data["product_ids"], [second.pk, 999999])
+        self.assertEqual(self.cart(), {first.pk: 1})
+
+    def test_invalid_line_changes_nothing(self):
+        first, second, _ = self.products
+
+        response = self.client.post(
+            self.url,
+            [
+                {"product_id": first.pk, "quantity": 2},
+                {"product_id": second.pk, "quantity": -1},
+            ],
+            format="json",
+        )
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.cart(), {})
+
+    def test_quantity_changes_keep_the_price_snapshot(self):
+        first, second, _ = self.products
+        line = CartItem.objects.create(
+            buyer=self.buyer, product=first, quantity=1, price_snapshot=first.price
+        )
+        Product.objects.filter(pk=first.pk).update(price=99)
+
+        self.client.post(
+            self.url, [{"product_id": first.pk, "quantity": 2}], format="json"
+        )
+        self.client.patch(f"/api/buyer/cart/{line.pk}/", {"quantity": 3})
+        line.refresh_from_db()
+        self.assertEqual((line.quantity, line.price_snapshot), (3, first.price))
+
+        # Switching the product, or re-adding it, takes the current price
+        self.client.patch(f"/api/buyer/cart/{line.pk}/", {"product_id": second.pk})
+        line.refresh_from_db()
+        self.assertEqual(line.price_snapshot, second.price)
+        self.client.post(
+            self.url,
+            [
+                {"product_id": second.pk, "quantity": 0},
+                {"product_id": first.pk, "quantity": 1},
+            ],
+            format="json",
+        )
+        self.assertEqual(
+            CartItem.objects.get(buyer=self.buyer).price_snapshot, Decimal("99")
+        )
+
+
+class CheckoutTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.artisan = User.objects.create(
+            username="checkout_artisan",
+            email="checkout_artisan@example.com",
+            is_artisan=True,
+        )
+        self.buyer = User.objects.create(
+            username="checkout_buyer", email="checkout_buyer@example.com", is_buyer=True
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.buyer)
+
+    def fill_cart(self, lines):
+        products = []
+        for i in range(lines):
+            product = Product.objects.create(
+                artisan=self.artisan,
+                title=f"Checkout product {i}",
+                description="Checkout test",
+                category="Pottery",
+                price=10 + i,
+                stock=5,
+            )
+            CartItem.objects.create(buyer=self.buyer, product=product, quantity=1)
+            products.append(product)
+        return products
+
+    def test_queries_do_not_grow_with_the_cart(self):
+        self.fill_cart(1)
+        otp = self.client.post("/api/buyer/cart/checkout-initiate/").data["otp"]
+        with CaptureQueriesContext(connection) as small:
+            self.client.post(
+                "/api/buyer/cart/checkout-confirm/", {"otp": otp}, format="json"
+            )
+        # Counted now: the next request resets the connection's query log
+        queries = len(small)
+
+        self.fill_cart(6)
+        otp = self.client.post("/api/buyer/cart/checkout-initiate/").data["otp"]
+        with self.assertNumQueries(queries):
+            response = self.client.post(
+                "/api/buyer/cart/checkout-confirm/", {"otp": otp}, format="json"
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(OrderItem.objects.count(), 7)
+
+    def test_short_stock_on_a_later_line_rolls_everything_back(self):
+        first, second = self.fill_cart(2)
+        otp = self.client.post("/api/buyer/cart/checkout-initiate/").data["otp"]
+        # The second line grows past the stock after the holds were taken
+        CartItem.objects.filter(product=second).update(quantity=10)
+
+        response = self.client.post(
+            "/api/buyer/cart/checkout-confirm/", {"otp": otp}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(response.data["product_ids"], [second.pk])
+        self.assertFalse(Order.objects.exists())
+        self.assertFalse(OrderItem.objects.exists())
+        self.assertEqual(CartItem.objects.filter(buyer=self.buyer).count(), 2)
+        # Only the holds from checkout-initiate are taken
+        stock = dict(Product.objects.values_list("pk", "stock"))
+        self.assertEqual(stock, {first.pk: 4, second.pk: 4})
+        self.assertEqual(StockReservation.objects.filter(status="held").count(), 2)
+
+
+class PaymentGatewayTests(TestCase):
+    def setUp(self):
+        override = self.settings(
+            RAZORPAY_KEY_ID="rzp_test_key",
+            RAZORPAY_KEY_SECRET="rzp_test_secret",
+            RAZORPAY_BASE_URL="https://gateway.test/v1",
+            PAYMENT_GATEWAY_CONNECT_TIMEOUT=1.5,
+            PAYMENT_GATEWAY_READ_TIMEOUT=4,
+            PAYMENT_GATEWAY_MAX_RETRIES=2,
+            PAYMENT_GATEWAY_BACKOFF=0,
+            PAYMENT_GATEWAY_BREAKER_THRESHOLD=2,
+            PAYMENT_GATEWAY_BREAKER_COOLDOWN=30,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        payments.reset()
+        self.addCleanup(payments.reset)
+        # The razorpay client prints its own connection errors
+        quiet = mock.patch("razorpay.client.print", create=True)
+        quiet.start()
+        self.addCleanup(quiet.stop)
+
+    def gateway(self, *responses):
+        """Answer session requests with ``responses`` (or raise them)."""
+        patcher = mock.patch.object(
+            requests.Session, "request", side_effect=list(responses)
+        )
+        self.addCleanup(patcher.stop)
+        return patcher.start()
+
+    def response(self, status, body):
+        return mock.Mock(status_code=status, json=mock.Mock(return_value=body))
+
+    def test_calls_carry_the_timeouts(self):
+        order = {"id": "order_1", "amount": 1000, "currency": "INR"}
+        request = self.gateway(self.response(200, order))
+
+        self.assertEqual(payments.create_order(1000), order)
+
+        self.assertEqual(request.call_args.kwargs["timeout"], (1.5, 4))
+
+    def test_connection_errors_are_retried_then_counted_once(self):
+        request = self.gateway(*[requests.ConnectionError("refused")] * 3)
+
+        with self.assertRaises(payments.GatewayUnavailable):
+            payments.create_order(1000)
+
+        self.assertEqual(request.call_count, 3)
+        self.assertEqual(payments.get_breaker().failures, 1)
+
+    def test_rejected_and_timed_out_requests_are_not_retried(self):
+        rejected = self.response(
+            400, {"error": {"code": "BAD_REQUEST_ERROR", "description": "Bad amount"}}
+        )
+        request = self.gateway(rejected, requests.ReadTimeout("slow"))
+
+        with self.assertRaises(razorpay.errors.BadRequestError):
+            payments.create_order(-1)
+        # A 4xx means the gateway is up
+        self.assertEqual(payments.get_breaker().failures, 0)
+        with self.assertRaises(payments.GatewayTimeout):
+            payments.create_order(1000)
+
+        self.assertEqual(request.call_count, 2)
+        self.assertEqual(payments.get_breaker().failures, 1)
+
+    def test_breaker_opens_half_opens_and_closes(self):
+        breaker = payments.CircuitBreaker(threshold=2, cooldown=30)
+        now = [1000.0]
+        with mock.patch("api.payments.time.monotonic", side_effect=lambda: now[0]):
+            breaker.record_failure()
+            self.assertEqual(breaker.state, "closed")
+            breaker.record_failure()
+            self.assertEqual(breaker.state, "open")
+            with self.assertRaises(payments.GatewayUnavailable):
+                breaker.before_call()
+
+            now[0] += 30
+            self.assertEqual(breaker.state, "half-open")
+            breaker.before_call()
+            # One trial call at a time
+            with self.assertRaises(payments.GatewayUnavailable):
+                breaker.before_call()
+            breaker.record_failure()
+            self.assertEqual(breaker.state, "open")
+
+            now[0] += 30
+            breaker.before_call()
+            breaker.record_success()
+            self.assertEqual(breaker.state, "closed")
+            breaker.before_call()
+
+    def test_open_breaker_answers_503_without_calling_the_gateway(self):
+        request = self.gateway()
+        breaker = payments.get_breaker()
+        breaker.record_failure()
+        breaker.record_failure()
+        client = APIClient()
+        client.force_authenticate(
+            User.objects.create(username="pay_buyer", email="pay_buyer@example.com")
+        )
+
+        response = client.post(
+            "/api/buyer/cart/create-razorpay-order/", {"amount": 10}, format="json"
+        )
+
+        self.assertEqual(response.status_code, 503)
+        request.assert_not_called()
+
+
+class TaskQueueTests(TestCase):
+    def setUp(self):
+        self.calls = []
+
+        def flaky(fail):
+            self.calls.append(fail)
+            if fail:
+                raise RuntimeError("flaky handler")
+
+        patcher = mock.patch.dict(tasks._handlers, {"test.flaky": flaky})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_claim_takes_due_tasks_once(self):
+        due = tasks.enqueue("test.flaky", fail=False)
+        tasks.enqueue("test.flaky", delay=timedelta(hours=1), fail=False)
+
+        claimed = tasks.claim("worker-a")
+
+        self.assertEqual([task.pk for task in claimed], [due.pk])
+        self.assertEqual((claimed[0].status, claimed[0].attempts), ("running", 1))
+        self.assertEqual(tasks.claim("worker-b"), [])
+
+    def test_success_marks_the_task_done(self):
+        tasks.enqueue("test.flaky", fail=False)
+
+        self.assertTrue(tasks.run(tasks.claim("worker")[0]))
+
+        self.assertEqual(Task.objects.get().status, "done")
+        self.assertEqual(self.calls, [False])
+
+    def test_failure_is_retried_with_backoff_then_given_up(self):
+        task = tasks.enqueue("test.flaky", max_attempts=2, fail=True)
+
+        before = timezone.now()
+        with self.assertLogs("api.tasks", "WARNING"):
+            self.assertFalse(tasks.run(tasks.claim("worker")[0]))
+        task.refresh_from_db()
+        self.assertEqual(task.status, "queued")
+        self.assertGreaterEqual(task.run_at, before + tasks.RETRY_BASE)
+        self.assertIn("flaky handler", task.last_error)
+        # Not due yet
+        self.assertEqual(tasks.claim("worker"), [])
+
+        Task.objects.filter(pk=task.pk).update(run_at=timezone.now())
+        with self.assertLogs("api.tasks", "ERROR"):
+            self.assertFalse(tasks.run(tasks.claim("worker")[0]))
+        task.refresh_from_db()
+        self.assertEqual((task.status, task.attempts), ("failed", 2))
+        self.assertEqual(self.calls, [True, True])
+
+    def test_unknown_task_fails_instead_of_vanishing(self):
+        tasks.enqueue("test.missing", max_attempts=1)
+
+        with self.assertLogs("api.tasks", "ERROR"):
+            self.assertFalse(tasks.run(tasks.claim("worker")[0]))
+
+        self.assertEqual(Task.objects.get().status, "failed")
+
+    def test_tasks_of_a_dead_worker_are_requeued(self):
+        tasks.enqueue("test.flaky", fail=False)
+        task = tasks.claim("dead-worker")[0]
+        Task.objects.filter(pk=task.pk).update(
+            locked_at=timezone.now() - tasks.STALE_AFTER - timedelta(seconds=1)
+        )
+
+        self.assertEqual(tasks.requeue_stale(), 1)
+
+        self.assertEqual([t.pk for t in tasks.claim("worker")], [task.pk])
+
+    def test_image_upload_queues_its_variants(self):
+        buffer = BytesIO()
+        Image.new("RGB", (400, 300), "white").save(buffer, "PNG")
+        upload = SimpleUploadedFile("mug.png", buffer.getvalue())
+        artisan = User.objects.create(
+            username="image_artisan", email="image_artisan@example.com"
+        )
+
+        with tempfile.TemporaryDirectory() as media, self.settings(MEDIA_ROOT=media):
+            product = Product.objects.create(
+                artisan=artisan,
+                title="Mug",
+                description="Image task test",
+                category="Pottery",
+                price=10,
+                stock=1,
+                image=upload,
+            )
+            task = Task.objects.get()
+            self.assertEqual(task.name, "image.product_variants")
+            self.assertEqual(task.payload, {"product_id": product.pk})
+
+            self.assertTrue(tasks.run(tasks.claim("worker")[0]))
+
+            product.refresh_from_db()
+            self.assertEqual(product.image_variants["source"], product.image.name)
+            # Current variants do not queue the work again
+            product.save()
+            self.assertEqual(Task.objects.count(), 1)
+
+
+class CatalogCacheTests(TestCase):
+    url = "/api/products/"
+
+    def setUp(self):
+        cache.clear()
+        self.artisan = User.objects.create(
+            username="cache_artisan", email="cache_artisan@example.com", is_artisan=True
+        )
+        self.product = Product.objects.create(
+            artisan=self.artisan,
+            title="Cached jug",
+            description="Catalog cache test",
+            category="Pottery",
+            price=10,
+            stock=5,
+        )
+        self.client = APIClient()
+
+    def get(self, params=None):
+        response = self.client.get(self.url, params or {})
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_reordered_and_blank_params_share_an_entry(self):
+        first = self.get({"page": 1, "category": "Pottery"})
+        second = self.client.get(f"{self.url}?category=Pottery&search=&page=1")
+
+        self.assertEqual((first["X-Cache"], second["X-Cache"]), ("MISS", "HIT"))
+        stats = catalog_cache.get_stats()
+        self.assertEqual((stats["hits"], stats["misses"]), (1, 1))
+        self.assertEqual(stats["hit_ratio"], 0.5)
+
+    def test_writes_bump_the_version_and_stale_pages_are_not_served(self):
+        self.get()
+        self.assertEqual(self.get()["X-Cache"], "HIT")
+
+        Product.objects.filter(pk=self.product.pk).update(title="Renamed jug")
+        self.product.refresh_from_db()
+        self.product.save()
+        response = self.get()
+        self.assertEqual(response["X-Cache"], "MISS")
+        self.assertEqual(response.data["results"][0]["title"], "Renamed jug")
+
+        versions = [catalog_cache.get_version()]
+        self.client.force_authenticate(self.artisan)
+        self.client.patch(f"/api/artisan/products/{self.product.pk}/toggle-status/")
+        versions.append(catalog_cache.get_version())
+        with self.captureOnCommitCallbacks(execute=True):
+            inventory.decrement_stock(self.product.pk, 1)
+        versions.append(catalog_cache.get_version())
+
+        self.assertEqual(versions, sorted(set(versions)))
+
+    def test_evicted_version_never_goes_back(self):
+        self.get()
+        old = catalog_cache.bump_version()
+
+        cache.delete(catalog_cache.VERSION_KEY)
+
+        self.assertGreater(catalog_cache.get_version(), old)
+        self.assertEqual(self.get()["X-Cache"], "MISS")
+
+
+class SnapshotTests(TestCase):
+    key = "test_snapshot"
+
+    def setUp(self):
+        cache.clear()
+        self.computed = 0
+
+    def compute(self):
+        self.computed += 1
+        return {"value": self.computed}
+
+    def get(self, **kwargs):
+        return snapshots.get(
+            self.key, self.compute, fresh_for=30, stale_for=600, **kwargs
+        )
+
+    def store(self, data, age):
+        cache.set(self.key, {"data": data, "computed_at": time.time() - age})
+
+    def test_computes_once_then_serves_the_snapshot(self):
+        self.assertEqual(self.get(), ({"value": 1}, "MISS"))
+        self.assertEqual(self.get(), ({"value": 1}, "HIT"))
+        self.assertEqual(self.computed, 1)
+
+    def test_stale_snapshot_is_refreshed_by_the_lock_holder(self):
+        self.store({"value": 0}, age=60)
+
+        self.assertEqual(self.get(), ({"value": 1}, "MISS"))
+        self.assertIsNone(cache.get(f"{self.key}:refresh"))
+
+    def test_stale_snapshot_is_served_while_another_refreshes(self):
+        self.store({"value": 0}, age=60)
+        cache.add(f"{self.key}:refresh", 1)
+
+        self.assertEqual(self.get(), ({"value": 0}, "STALE"))
+        self.assertEqual(self.computed, 0)
+
+    def test_waits_for_the_first_snapshot(self):
+        cache.add(f"{self.key}:refresh", 1)
+
+        def computed_elsewhere(seconds):
+            self.store({"value": 42}, age=0)
+
+        with mock.patch.object(snapshots.time, "sleep", side_effect=computed_elsewhere):
+            self.assertEqual(self.get(), ({"value": 42}, "HIT"))
+        self.assertEqual(self.computed, 0)
+
+    def test_gives_up_waiting(self):
+        cache.add(f"{self.key}:refresh", 1)
+
+        with self.assertRaises(snapshots.SnapshotUnavailable):
+            self.get(wait=0)
+        self.assertEqual(self.computed, 0)
+
+    def test_failed_computation_releases_the_lock(self):
+        def broken():
+            raise RuntimeError("boom")
+
+        with self.assertRaises(RuntimeError):
+            snapshots.get(self.key, broken, fresh_for=30, stale_for=600)
+
+        self.assertIsNone(cache.get(f"{self.key}:refresh"))
+
+
+class ArtisanAnalyticsTests(TestCase):
+    url = "/api/artisan/dashboard/analytics/"
+
+    def setUp(self):
+        self.artisan = User.objects.create(
+            username="stats_artisan", email="stats_artisan@example.com", is_artisan=True
+        )
+        self.buyer = User.objects.create(
+            username="stats_buyer", email="stats_buyer@example.com", is_buyer=True
+        )
+        vase, scarf = [
+            Product.objects.create(
+                artisan=self.artisan,
+                title=title,
+                description="Analytics test",
+                category=category,
+                price=price,
+                stock=10,
+            )
+            for title, category, price in [
+                ("Stats vase", "Pottery", 20),
+                ("Stats scarf", "Textiles", 15),
+            ]
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.buyer)
+        orders = [
+            self.client.post(
+                "/api/buyer/buy-now/",
+                {"product_id": product.pk, "quantity": quantity},
+                format="json",
+            ).data["order_id"]
+            for product, quantity in [(vase, 2), (scarf, 1), (vase, 1)]
+        ]
+        self.client.force_authenticate(self.artisan)
+        # The last order stays pending
+        for order_id in orders[:2]:
+            self.client.patch(
+                f"/api/artisan/orders/{order_id}/update-status/",
+                {"status": "approved"},
+                format="json",
+            )
+
+    def test_totals_come_from_the_rollup_and_ledger(self):
+        data = self.client.get(self.url).data
+
+        self.assertEqual(data["total_sales"], 75.0)
+        self.assertEqual(data["total_orders"], 3)
+        self.assertEqual(data["avg_order_value"], 25.0)
+        self.assertEqual(
+            data["monthly_earnings"], {f"{timezone.localdate():%b %Y}": 75.0}
+        )
+        self.assertEqual(data["category_distribution"], {"Pottery": 1, "Textiles": 1})
+        self.assertEqual(
+            data["top_selling_products"],
+            [
+                {"title": "Stats vase", "total_quantity": 2},
+                {"title": "Stats scarf", "total_quantity": 1},
+            ],
+        )
+        self.assertEqual(len(data["recent_sales"]), 3)
+
+    def test_date_range_limits_the_sales(self):
+        tomorrow = timezone.localdate() + timedelta(days=1)
+
+        data = self.client.get(self.url, {"start": tomorrow.isoformat()}).data
+
+        self.assertEqual((data["total_sales"], data["total_orders"]), (0, 0))
+        # Products and the all-time top sellers are not date-bound
+        self.assertEqual(data["total_products"], 2)
+        self.assertEqual(len(data["top_selling_products"]), 2)
+
+    def test_bad_date_is_rejected(self):
+        response = self.client.get(self.url, {"end": "31/12/2026"})
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_order_list_pages_the_ledger(self):
+        newest_first = list(
+            Order.objects.order_by("-created_at", "-id").values_list("pk", flat=True)
+        )
+
+        with self.assertNumQueries(3):
+            first = self.client.get("/api/artisan/orders/", {"page_size": 2}).data
+        second = self.client.get(first["next"]).data
+
+        self.assertEqual([row["id"] for row in first["results"]], newest_first[:2])
+        self.assertEqual(len(first["results"][0]["items"]), 1)
+        self.assertEqual([row["id"] for row in second["results"]], newest_first[2:])
+        self.assertIsNone(second["next"])
+
+    def test_deleted_buyer_leaves_no_sales_behind(self):
+        archived = Order.objects.earliest("created_at")
+        Order.objects.filter(pk=archived.pk).update(delivery_status="delivered")
+        archive.archive_batch([archived.pk], before=timezone.now() + timedelta(1))
+
+        self.buyer.delete()
+
+        data = self.client.get(self.url).data
+        self.assertEqual((data["total_sales"], data["total_orders"]), (0, 0))
+        self.assertEqual(data["recent_sales"], [])
+        self.assertEqual(data["top_selling_products"], [])
+        self.assertFalse(ArtisanOrder.objects.exists())
+
+
+class KeysetPaginationTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create(
+            username="keyset_admin", email="keyset_admin@example.com", is_admin=True
+        )
+        artisan = User.objects.create(
+            username="keyset_artisan",
+            email="keyset_artisan@example.com",
+            is_artisan=True,
+        )
+        now = timezone.now()
+        self.products = []
+        for i in range(7):
+            product = Product.objects.create(
+                artisan=artisan,
+                title=f"Keyset product {i}",
+                description="Pagination test",
+                category="Jewelry",
+                price=10,
+            )
+            # Two products share each timestamp, so the id breaks the ties
+            Product.objects.filter(pk=product.pk).update(
+                created_at=now - timedelta(hours=i // 2)
+            )
+            self.products.append(product.pk)
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+
+    def walk(self, url, link):
+        pages = []
+        while url:
+            data = self.client.get(url).data
+            pages.append([row["id"] for row in data["results"]])
+            url = data[link]
+        return pages
+
+    def test_next_and_previous_links_round_trip(self):
+        # Newest first, the higher id first within each pair
+        expected = [self.products[i] for i in (1, 0, 3, 2, 5, 4, 6)]
+
+        forward = self.walk("/api/admin/products/?page_size=3", "next")
+        self.assertEqual([pk for page in forward for pk in page], expected)
+        self.assertEqual([len(page) for page in forward], [3, 3, 1])
+
+        last = self.client.get("/api/admin/products/?page_size=3").data
+        while last["next"]:
+            last = self.client.get(last["next"]).data
+        backward = self.walk(last["previous"], "previous")
+        self.assertEqual(backward, forward[-2::-1])
+
+    def test_count_only_on_request(self):
+        plain = self.client.get("/api/admin/products/").data
+        counted = self.client.get("/api/admin/products/?include_count=true").data
+
+        self.assertNotIn("count", plain)
+        self.assertEqual(counted["count"], 7)
+
+    def cursor(self, **data):
+        raw = json.dumps(
+            {
+                "o": "created_at",
+                "v": "2026-01-01T00:00:00+00:00",
+                "id": 1,
+                "f": 1,
+                **data,
+            }
+        )
+        return base64.urlsafe_b64encode(raw.encode()).decode()
+
+    def test_tampered_cursors_are_rejected(self):
+        for cursor in [
+            "not-a-cursor",
+            self.cursor(o="price"),
+            self.cursor(v="yesterday"),
+            self.cursor(id="one"),
+        ]:
+            response = self.client.get("/api/admin/products/", {"cursor": cursor})
+            self.assertEqual(response.status_code, 404, cursor)
+
+    def test_archive_is_read_only_past_the_horizon(self):
+        buyer = User.objects.create(
+            username="keyset_buyer", email="keyset_buyer@example.com", is_buyer=True
+        )
+        now = timezone.now()
+        orders = []
+        for days in (1, 2, 3, 400, 500):
+            order = Order.objects.create(buyer=buyer, status="denied")
+            Order.objects.filter(pk=order.pk).update(
+                created_at=now - timedelta(days=days)
+            )
+            orders.append(order.pk)
+        archive.archive_batch(orders)
+        self.client.force_authenticate(buyer)
+        url = "/api/buyer/orders/?pagination=cursor&page_size=2"
+
+        with CaptureQueriesContext(connection) as queries:
+            first = self.client.get(url).data
+        self.assertFalse(any("api_archivedorder" in query["sql"] for query in queries))
+        self.assertEqual([row["id"] for row in first["results"]], orders[:2])
+
+        pages = self.walk(first["next"], "next")
+        self.assertEqual([pk for page in pages for pk in page], orders[2:])
+
+
+class AdminFilterTests(TestCase):
+    def setUp(self):
+        self.admin = User.objects.create(
+            username="filter_admin", email="filter_admin@example.com", is_admin=True
+        )
+        self.artisan = User.objects.create(
+            username="filter_artisan",
+            email="filter_artisan@example.com",
+            is_artisan=True,
+        )
+        self.buyers = [
+            User.objects.create(
+                username=f"filter_buyer_{i}",
+                email=f"filter_buyer_{i}@example.com",
+                is_buyer=True,
+                is_active=i != 2,
+            )
+            for i in range(3)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def ids(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.data)
+        return [row["id"] for row in response.data["results"]]
+
+    def age(self, model, pk, days, field="created_at"):
+        model.objects.filter(pk=pk).update(
+            **{field: timezone.now() - timedelta(days=days)}
+        )
+
+    def test_orders_by_status_and_date_range(self):
+        orders = {}
+        for days, status in ((1, "approved"), (5, "pending"), (20, "approved")):
+            order = Order.objects.create(buyer=self.buyers[0], status=status)
+            self.age(Order, order.pk, days)
+            orders[days] = order.pk
+        today = timezone.localdate()
+
+        self.assertEqual(
+            self.ids("/api/admin/orders/", status="approved"), [orders[1], orders[20]]
+        )
+        self.assertEqual(
+            self.ids(
+                "/api/admin/orders/",
+                start=(today - timedelta(days=10)).isoformat(),
+                end=(today - timedelta(days=2)).isoformat(),
+            ),
+            [orders[5]],
+        )
+        response = self.client.get("/api/admin/orders/", {"status": "lost"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_users_by_role_status_and_join_date(self):
+        buyer_ids = [buyer.pk for buyer in self.buyers]
+        self.age(User, self.buyers[0].pk, 30, field="date_joined")
+        start = (timezone.localdate() - timedelta(days=7)).isoformat()
+
+        self.assertEqual(
+            self.ids("/api/admin/users/", role="artisan"), [self.artisan.pk]
+        )
+        self.assertEqual(
+            self.ids("/api/admin/users/", status="inactive"), [buyer_ids[2]]
+        )
+        self.assertEqual(
+            sorted(self.ids("/api/admin/users/", role="buyer", start=start)),
+            buyer_ids[1:],
+        )
+
+    def test_products_by_category_and_status(self):
+        pottery, jewelry, hidden = [
+            Product.objects.create(
+                artisan=self.artisan,
+                title=title,
+                description="Filter test",
+                category=category,
+                price=10,
+                is_active=active,
+            ).pk
+            for title, category, active in (
+                ("Clay bowl", "Pottery", True),
+                ("Silver ring", "Jewelry", True),
+                ("Clay jug", "Pottery", False),
+            )
+        ]
+
+        self.assertEqual(
+            self.ids("/api/admin/products/", category="Pottery"), [hidden, pottery]
+        )
+        self.assertEqual(
+            self.ids("/api/admin/products/", status="active"), [jewelry, pottery]
+        )
+        self.assertEqual(
+            self.ids("/api/admin/products/", category="Pottery", status="inactive"),
+            [hidden],
+        )
+
+    def test_search_matches_prefixes(self):
+        order = Order.objects.create(buyer=self.buyers[1])
+        Order.objects.create(buyer=self.buyers[0])
+
+        self.assertEqual(
+            sorted(self.ids("/api/admin/users/", search="filter_buyer")),
+            [buyer.pk for buyer in self.buyers],
+        )
+        self.assertEqual(self.ids("/api/admin/users/", search="buyer"), [])
+        self.assertEqual(
+            self.ids("/api/admin/orders/", search="filter_buyer_1"), [order.pk]
+        )
+
+    def test_cursor_pages_keep_the_filter(self):
+        approved = []
+        for i in range(5):
+            for status in ("approved", "pending"):
+                order = Order.objects.create(buyer=self.buyers[0], status=status)
+                self.age(Order, order.pk, i)
+                if status == "approved":
+                    approved.append(order.pk)
+
+        pages = []
+        url = "/api/admin/orders/?status=approved&page_size=2"
+        while url:
+            data = self.client.get(url).data
+            pages.append([row["id"] for row in data["results"]])
+            self.assertEqual({row["status"] for row in data["results"]}, {"approved"})
+            url = data["next"]
+
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual([pk for page in pages for pk in page], approved)
+
+
+class SparseFieldsTests(TestCase):
+    def setUp(self):
+        artisan = User.objects.create(
+            username="fields_artisan",
+            email="fields_artisan@example.com",
+            is_artisan=True,
+        )
+        self.buyer = User.objects.create(
+            username="fields_buyer", email="fields_buyer@example.com", is_buyer=True
+        )
+        self.product = Product.objects.create(
+            artisan=artisan,
+            title="Woven basket",
+            description="Sparse fieldset test",
+            category="Baskets",
+            price=25,
+            stock=5,
+        )
+        order = Order.objects.create(buyer=self.buyer, subtotal=50, item_count=2)
+        OrderItem.objects.create(
+            order=order, product=self.product, quantity=2, price=25
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.buyer)
+        self.client.post("/api/buyer/wishlist/", {"product_id": self.product.pk})
+
+    def test_nested_products_are_compact_by_default(self):
+        order = self.client.get("/api/buyer/orders/").data[0]
+        wish = self.client.get("/api/buyer/wishlist/").data[0]
+
+        compact = ["id", "title", "price", "thumbnail", "is_active"]
+        self.assertEqual(list(order["items"][0]["product"]), compact)
+        self.assertEqual(list(wish["product"]), compact)
+
+    def test_fields_trims_the_payload(self):
+        products = self.client.get("/api/products/", {"fields": "id,title"}).data[
+            "results"
+        ]
+        orders = self.client.get(
+            "/api/buyer/orders/", {"fields": "id,items.quantity,items.product.title"}
+        ).data
+
+        self.assertEqual(products, [{"id": self.product.pk, "title": "Woven basket"}])
+        self.assertEqual(
+            orders[0]["items"], [{"quantity": 2, "product": {"title": "Woven basket"}}]
+        )
+        self.assertEqual(list(orders[0]), ["id", "items"])
+
+    def test_expand_swaps_in_the_full_product(self):
+        order = self.client.get("/api/buyer/orders/", {"expand": "items.product"}).data[
+            0
+        ]
+        wish = self.client.get("/api/buyer/wishlist/", {"expand": "product"}).data[0]
+
+        for product in (order["items"][0]["product"], wish["product"]):
+            self.assertEqual(product["description"], "Sparse fieldset test")
+            self.assertEqual(product["category"], "Baskets")
+            self.assertNotIn("thumbnail", product)
+
+    def test_writes_ignore_fields(self):
+        other = Product.objects.create(
+            artisan=self.product.artisan,
+            title="Clay cup",
+            description="Sparse fieldset test",
+            category="Pottery",
+            price=8,
+        )
+        response = self.client.post(
+            "/api/buyer/wishlist/?fields=id", {"product_id": other.pk}
+        )
+        self.assertEqual(response.status_code, 201, response.data)
+
+
+class QueryCountTests(TestCase):
+    """List endpoints run the same number of queries however many rows."""
+
+    def setUp(self):
+        self.admin = User.objects.create(
+            username="count_admin", email="count_admin@example.com", is_admin=True
+        )
+        self.artisan = User.objects.create(
+            username="count_artisan",
+            email="count_artisan@example.com",
+            is_artisan=True,
+        )
+        self.buyer = User.objects.create(
+            username="count_buyer", email="count_buyer@example.com", is_buyer=True
+        )
+        self.client = APIClient()
+        self.created = 0
+
+    def add_orders(self, count, buyer=None):
+        for _ in range(count):
+            self.created += 1
+            owner = buyer or User.objects.create(
+                username=f"count_buyer_{self.created}",
+                email=f"count_buyer_{self.created}@example.com",
+                is_buyer=True,
+            )
+            order = Order.objects.create(buyer=owner, subtotal=30, item_count=3)
+            for quantity in (1, 2):
+                product = Product.objects.create(
+                    artisan=self.artisan,
+                    title=f"Count product {self.created}-{quantity}",
+                    description="Query count test",
+                    category="Pottery",
+                    price=10,
+                )
+                OrderItem.objects.create(
+                    order=order, product=product, quantity=quantity, price=10
+                )
+
+    def assertConstantQueries(self, url, user, grow):
+        self.client.force_authenticate(user)
+        grow(1)
+        cache.clear()
+        with CaptureQueriesContext(connection) as small:
+            first = self.client.get(url)
+        queries = len(small)
+
+        grow(6)
+        cache.clear()
+        with self.assertNumQueries(queries):
+            second = self.client.get(url)
+        self.assertEqual(first.status_code, 200)
+        self.assertGreater(len(second.data), 0)
+        return first, second
+
+    def test_product_list(self):
+        first, second = self.assertConstantQueries(
+            "/api/products/", None, self.add_orders
+        )
+        # A full page of the 14 products
+        self.assertEqual(len(second.data["results"]), 10)
+
+    def test_buyer_order_list(self):
+        first, second = self.assertConstantQueries(
+            "/api/buyer/orders/",
+            self.buyer,
+            lambda count: self.add_orders(count, buyer=self.buyer),
+        )
+        self.assertEqual((len(first.data), len(second.data)), (1, 7))
+
+    def test_admin_order_list(self):
+        first, second = self.assertConstantQueries(
+            "/api/admin/orders/", self.admin, self.add_orders
+        )
+        self.assertEqual(len(second.data["results"]), 7)
+
+
+class OrderTotalsMigrationTests(TestCase):
+    def test_backfill_fills_in_orders_without_totals(self):
+        migration = importlib.import_module("api.migrations.0009_order_totals")
+        artisan = User.objects.create(
+            username="totals_artisan",
+            email="totals_artisan@example.com",
+            is_artisan=True,
+        )
+        buyer = User.objects.create(
+            username="totals_buyer", email="totals_buyer@example.com", is_buyer=True
+        )
+        product = Product.objects.create(
+            artisan=artisan,
+            title="Totals lamp",
+            description="Totals test",
+            category="Woodcraft",
+            price=30,
+        )
+        legacy = Order.objects.create(buyer=buyer)
+        OrderItem.objects.create(order=legacy, product=product, quantity=2, price=12)
+        OrderItem.objects.create(order=legacy, product=product, quantity=1, price=5)
+        stored = Order.objects.create(buyer=buyer, subtotal=99, item_count=9)
+        OrderItem.objects.create(order=stored, product=product, quantity=1, price=30)
+
+        migration.backfill(apps, None)
+
+        legacy.refresh_from_db()
+        stored.refresh_from_db()
+        self.assertEqual((legacy.subtotal, legacy.item_count), (29, 3))
+        self.assertEqual((stored.subtotal, stored.item_count), (99, 9))
+
+        # The command does the same for archived orders
+        Order.objects.filter(pk=legacy.pk).update(
+            subtotal=0, item_count=0, status="denied"
+        )
+        archive.archive_batch([legacy.pk], before=timezone.now() + timedelta(1))
+        call_command("backfill_order_totals", stdout=StringIO())
+
+        archived = ArchivedOrder.objects.get(pk=legacy.pk)
+        self.assertEqual((archived.subtotal, archived.item_count), (29, 3))
+
+
+class ConditionalGetTests(TestCase):
+    url = "/api/buyer/cart/"
+
+    def setUp(self):
+        artisan = User.objects.create(
+            username="etag_artisan", email="etag_artisan@example.com", is_artisan=True
+        )
+        self.buyer = User.objects.create(
+            username="etag_buyer", email="etag_buyer@example.com", is_buyer=True
+        )
+        self.items = [
+            CartItem.objects.create(
+                buyer=self.buyer,
+                product=Product.objects.create(
+                    artisan=artisan,
+                    title=f"Etag product {i}",
+                    description="Conditional GET test",
+                    category="Pottery",
+                    price=10,
+                ),
+            )
+            for i in range(3)
+        ]
+        self.client = APIClient()
+        self.client.force_authenticate(self.buyer)
+
+    def etag(self):
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, 200)
+        return response["ETag"]
+
+    def test_unchanged_list_answers_304(self):
+        etag = self.etag()
+
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(response.status_code, 304)
+
+    def test_validators_take_one_query(self):
+        etag = self.etag()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEqual(len(queries), 1)
+
+    def test_changes_and_deletions_change_the_etag(self):
+        etags = [self.etag()]
+        CartItem.objects.filter(pk=self.items[0].pk).update(
+            quantity=3, updated_at=timezone.now()
+        )
+        etags.append(self.etag())
+        # Removing a row leaves the newest timestamp as it was
+        self.items[1].delete()
+        etags.append(self.etag())
+        Product.objects.filter(pk=self.items[2].product_id).update(
+            updated_at=timezone.now()
+        )
+        etags.append(self.etag())
+
+        self.assertEqual(len(set(etags)), 4)
+
+
+class ExportTests(TestCase):
+    def setUp(self):
+        admin = User.objects.create(
+            username="export_admin", email="export_admin@example.com", is_admin=True
+        )
+        self.buyer = User.objects.create(
+            username="export_buyer", email="export_buyer@example.com", is_buyer=True
+        )
+        now = timezone.now()
+        self.orders = []
+        for days, status in ((1, "approved"), (2, "pending"), (400, "denied")):
+            order = Order.objects.create(buyer=self.buyer, status=status)
+            Order.objects.filter(pk=order.pk).update(
+                created_at=now - timedelta(days=days)
+            )
+            self.orders.append(order.pk)
+        self.client = APIClient()
+        self.client.force_authenticate(admin)
+
+    def download(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv_streams_a_header_then_every_row(self):
+        body = self.download("/api/admin/export/orders.csv")
+        header, *rows = csv.reader(StringIO(body))
+
+        self.assertEqual(header, list(exports.DATASETS["orders"].columns))
+        self.assertEqual([int(row[0]) for row in rows], self.orders)
+        self.assertEqual({row[header.index("buyer")] for row in rows}, {"export_buyer"})
+        self.assertEqual({row[header.index("archived")] for row in rows}, {"False"})
+
+    def test_ndjson_includes_archived_orders(self):
+        archive.archive_batch([self.orders[2]])
+
+        body = self.download("/api/admin/export/orders.ndjson")
+        lines = [json.loads(line) for line in body.splitlines()]
+
+        self.assertEqual(
+            [(line["id"], line["archived"]) for line in lines],
+            [(self.orders[0], False), (self.orders[1], False), (self.orders[2], True)],
+        )
+
+    def test_status_and_date_filters(self):
+        start = (timezone.localdate() - timedelta(days=7)).isoformat()
+
+        body = self.download(
+            "/api/admin/export/orders.ndjson", status="approved", start=start
+        )
+        self.assertEqual(
+            [json.loads(line)["id"] for line in body.splitlines()], self.orders[:1]
+        )
+
+        body = self.download("/api/admin/export/users.ndjson", status="inactive")
+        self.assertEqual(body, "")
+
+    def test_bad_requests(self):
+        for url, params, status in [
+            ("/api/admin/export/widgets.csv", {}, 404),
+            ("/api/admin/export/orders.xml", {}, 400),
+            ("/api/admin/export/orders.csv", {"status": "lost"}, 400),
+            ("/api/admin/export/orders.csv", {"start": "yesterday"}, 400),
+        ]:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status, (url, params))
+            self.assertFalse(response.streaming)
+
+        self.client.force_authenticate(self.buyer)
+        response = self.client.get("/api/admin/export/orders.csv")
+        self.assertEqual(response.status_code, 403)
+
+
+class SyntheticDataTests(TestCase):
+    def test_seed_back_dates_orders_and_restores_auto_now_add(self):
+        call_command(
+            "seed_synthetic_data",
+            users=20,
+            products=10,
+            order_items=50,
+            days=30,
+            stdout=StringIO(),
+        )
+
+        self.assertEqual(Product.objects.count(), 10)
+        first = Order.objects.earliest("created_at").created_at
+        self.assertLess(first, timezone.now() - timedelta(days=1))
+        for model in (Order, Product):
+            self.assertTrue(model._meta.get_field("created_at").auto_now_add)
+
+
+class QueryPlanTests(TestCase):
+    def test_every_list_view_query_uses_an_index(self):
+        out = StringIO()
+
+        call_command("check_query_plans", stdout=out)
+
+        self.assertIn("ok    /api/buyer/orders/", out.getvalue())
+
+    def test_a_dropped_index_fails_the_check(self):
+        if connection.vendor != "sqlite":
+            self.skipTest("Drops a SQLite index by name.")
+        with connection.cursor() as cursor:
+            cursor.execute("DROP INDEX order_created_idx")
+        out = StringIO()
+
+        with self.assertRaisesMessage(CommandError, "/api/admin/orders/"):
+            call_command("check_query_plans", stdout=out)
+
+        self.assertIn("FAIL  /api/admin/orders/: sorts every row", out.getvalue())
+
+    def test_postgresql_sort_over_seq_scan_fails(self):
+        plan = (
+            "Limit  (cost=10.00..10.03 rows=10 width=8)\n"
+            "  ->  Sort  (cost=10.00..11.00 rows=400 width=8)\n"
+            "        Sort Key: created_at DESC\n"
+            "        ->  Seq Scan on api_order  (cost=0.00..7.00 rows=400 width=8)"
+        )
+        indexed = (
+            "Limit  (cost=0.15..0.50 rows=10 width=8)\n"
+            "  ->  Index Scan using order_created_idx on api_order"
+            "  (cost=0.15..20.00 rows=400 width=8)"
+        )
+
+        self.assertIn(
+            "Sort above Seq Scan on api_order",
+            check_query_plans.postgresql_problems(plan),
+        )
+        self.assertEqual(check_query_plans.postgresql_problems(indexed), [])
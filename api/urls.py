@@ -16,6 +16,7 @@ from .views import (
     AdminDashboardView,
     # Products
     ProductListView,
+    BestSellerListView,
     ProductDetailView,
     ArtisanCreateProductView,
     ArtisanProductListView,
@@ -36,12 +37,16 @@ from .views import (
     # Analytics
     artisan_dashboard_analytics,
     admin_dashboard_analytics,
+    admin_export,
+    catalog_cache_stats,
     # Wishlist
     WishlistView,
     WishlistDeleteView,
     # Cart
     CartListCreateView,
     CartItemUpdateDeleteView,
+    CartBatchView,
+    cart_summary,
     buy_now_order,
     # Profile
     update_profile,
@@ -76,6 +81,7 @@ urlpatterns = [
     path("admin/dashboard/", AdminDashboardView.as_view()),
     # 🛍️ PRODUCTS
     path("products/", ProductListView.as_view()),
+    path("products/best-sellers/", BestSellerListView.as_view()),
     path("products/<int:pk>/", ProductDetailView.as_view()),
     path("artisan/products/add/", ArtisanCreateProductView.as_view()),
     path("artisan/products/", ArtisanProductListView.as_view()),
@@ -94,15 +100,19 @@ urlpatterns = [
     path("admin/products/<int:pk>/", AdminProductDetailView.as_view()),
     path("admin/orders/", AdminOrderListView.as_view()),
     path("admin/orders/<int:pk>/", AdminOrderDetailView.as_view()),
+    path("admin/export/<str:dataset>.<str:file_format>", admin_export),
     # 📊 ANALYTICS
     path("artisan/dashboard/analytics/", artisan_dashboard_analytics),
     path("admin/analytics/", admin_dashboard_analytics),
+    path("admin/catalog-cache/", catalog_cache_stats),
     # ❤️ WISHLIST
     path("buyer/wishlist/", WishlistView.as_view()),
     path("buyer/wishlist/<int:product_id>/", WishlistDeleteView.as_view()),
     # 🛒 CART
     path("buyer/cart/", CartListCreateView.as_view()),
     path("buyer/cart/<int:pk>/", CartItemUpdateDeleteView.as_view()),
+    path("buyer/cart/batch/", CartBatchView.as_view()),
+    path("buyer/cart/summary/", cart_summary),
     # 🏡 ADDRESS (Buyer)
     path("buyer/addresses/", get_addresses),
     path("buyer/addresses/add/", add_address),
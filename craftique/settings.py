@@ -62,6 +62,16 @@ DATABASES = {
         conn_max_age=600,
     )
 }
+if DATABASES["default"]["ENGINE"] == "django.db.backends.sqlite3":
+    # Concurrent writers wait for the lock (up to 20 s) instead of failing
+    # with "database is locked"; tests use a file, not shared-cache memory,
+    # so the inventory race tests really run their threads side by side.
+    DATABASES["default"]["OPTIONS"] = {
+        "timeout": 20,
+        "transaction_mode": "IMMEDIATE",
+        "init_command": "PRAGMA journal_mode=WAL;",
+    }
+    DATABASES["default"]["TEST"] = {"NAME": str(BASE_DIR / "test_db.sqlite3")}
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -131,6 +141,27 @@ SPECTACULAR_SETTINGS = {
 
 INSTALLED_APPS += ["rest_framework_simplejwt.token_blacklist"]
 
+# Shared cache (set CACHE_BACKEND/CACHE_LOCATION to Redis or Memcached in
+# production so catalog cache invalidation is seen by every worker).
+CACHES = {
+    "default": {
+        "BACKEND": os.getenv(
+            "CACHE_BACKEND", "django.core.cache.backends.locmem.LocMemCache"
+        ),
+        "LOCATION": os.getenv("CACHE_LOCATION", ""),
+    }
+}
+CATALOG_CACHE_TIMEOUT = int(os.getenv("CATALOG_CACHE_TIMEOUT", 300))
+
+# Admin analytics snapshot: served as is for FRESH seconds, then served
+# stale while a single request recomputes it, for up to STALE more seconds.
+ADMIN_ANALYTICS_FRESH_SECONDS = int(os.getenv("ADMIN_ANALYTICS_FRESH_SECONDS", 30))
+ADMIN_ANALYTICS_STALE_SECONDS = int(os.getenv("ADMIN_ANALYTICS_STALE_SECONDS", 600))
+
+# Closed orders older than this move to the archive tables
+# (manage.py archive_orders).
+ORDER_ARCHIVE_AFTER_DAYS = int(os.getenv("ORDER_ARCHIVE_AFTER_DAYS", 180))
+
 EMAIL_BACKEND = "django.core.mail.backends.console.EmailBackend"
 DEFAULT_FROM_EMAIL = "Craftique <noreply@craftique.com>"
 
@@ -142,3 +173,15 @@ MEDIA_ROOT = os.path.join(BASE_DIR, "media")
 
 RAZORPAY_KEY_ID = os.getenv("RAZORPAY_KEY_ID")
 RAZORPAY_KEY_SECRET = os.getenv("RAZORPAY_KEY_SECRET")
+
+# Point at the local stand-in (manage.py payment_gateway_stub) for load
+# tests, e.g. RAZORPAY_BASE_URL=http://127.0.0.1:8765
+RAZORPAY_BASE_URL = os.getenv("RAZORPAY_BASE_URL") or None
+PAYMENT_GATEWAY_CONNECT_TIMEOUT = float(
+    os.getenv("PAYMENT_GATEWAY_CONNECT_TIMEOUT", 3.05)
+)
+PAYMENT_GATEWAY_READ_TIMEOUT = float(os.getenv("PAYMENT_GATEWAY_READ_TIMEOUT", 10))
+PAYMENT_GATEWAY_POOL_SIZE = int(os.getenv("PAYMENT_GATEWAY_POOL_SIZE", 10))
+PAYMENT_GATEWAY_MAX_RETRIES = 2
+PAYMENT_GATEWAY_BREAKER_THRESHOLD = 5
+PAYMENT_GATEWAY_BREAKER_COOLDOWN = 30